@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# Standard library imports
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+VERSION = "1.2.0"
+
+parser = argparse.ArgumentParser(description="Check that the log parsing scripts don't import heavy modules (e.g., matplotlib) when they aren't needed, so that they start quickly. Exits with a non-zero status if any of the checks fail.", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+parser.add_argument('tournament', type=str, nargs='?', help="A tournament folder to also check a plain parse with (parse_pvp_scores.py writes pvp_scores.json to it as usual).")
+parser.add_argument('--forbid', type=str, default="matplotlib", help="Comma-separated list of modules that mustn't be imported.")
+parser.add_argument('-v', '--verbose', action='store_true', help="Show the slowest imports of each check.")
+parser.add_argument("--version", action='store_true', help="Show the script version, then exit.")
+
+scripts = ["parse_tournament_log_files.py", "parse_pvp_scores.py", "parse_n-choose-k_results.py", "parse_CS_log_files.py", "plot_summary.py", "run_all.py", "tournament_history.py", "pack_tournament.py"]
+import_time_pattern = re.compile(r"import time: +(\d+) \| +(\d+) \| ( *)(\S+)")
+
+
+def checks(tournament: Optional[str] = None) -> List[List[str]]:
+    """ The command lines to check, relative to the folder of the scripts.
+
+    Args:
+        tournament (Optional[str]): A tournament folder to also check a plain parse with.
+
+    Returns:
+        List[List[str]]: The script and its arguments for each check.
+    """
+    command_lines = [[script, "--version"] for script in scripts]
+    if tournament is not None:
+        command_lines.extend([
+            ["parse_tournament_log_files.py", tournament, "-q", "-n"],
+            ["parse_pvp_scores.py", tournament],
+            ["run_all.py", tournament, "-q", "-n", "--pvp"],
+        ])
+    return command_lines
+
+
+def import_times(command_line: List[str]) -> Tuple[int, Dict[str, Tuple[int, bool]]]:
+    """ Run a script with -X importtime and collect the imported modules.
+
+    Args:
+        command_line (List[str]): The script and its arguments.
+
+    Returns:
+        Tuple[int, Dict[str, Tuple[int, bool]]]: The return code of the script and the cumulative import time (μs) of each imported module and whether it was imported directly rather than by another module.
+    """
+    script_dir = Path(__file__).resolve().parent
+    process = subprocess.run([sys.executable, "-X", "importtime", str(script_dir / command_line[0])] + command_line[1:], cwd=script_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    modules = {}
+    for line in process.stderr.splitlines():
+        m = import_time_pattern.match(line)
+        if m is not None:
+            modules[m.group(4)] = (int(m.group(2)), len(m.group(3)) == 0)
+    return process.returncode, modules
+
+
+def check_imports(command_line: List[str], forbidden: List[str], verbose: bool = False) -> bool:
+    """ Check that a script runs without importing any of the forbidden modules.
+
+    Args:
+        command_line (List[str]): The script and its arguments.
+        forbidden (List[str]): The forbidden modules (submodules are also forbidden).
+        verbose (bool): Show the slowest imports.
+
+    Returns:
+        bool: Whether the check passed.
+    """
+    returncode, modules = import_times(command_line)
+    found = sorted({module.split('.')[0] for module in modules if any(module == f or module.startswith(f + '.') for f in forbidden)})
+    top_level = {module: t for module, (t, direct) in modules.items() if direct}
+    total = sum(top_level.values())
+    passed = returncode == 0 and len(found) == 0
+    print(f"{'ok  ' if passed else 'FAIL'} {' '.join(command_line)}: {total / 1e3:.0f}ms of imports" + (f", imported {', '.join(found)}" if len(found) > 0 else "") + (f", exit code {returncode}" if returncode != 0 else ""))
+    if verbose:
+        for module, t in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:5]:
+            print(f"       {t / 1e3:7.1f}ms {module}")
+    return passed
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.version:
+        print(f"Version: {VERSION}")
+        sys.exit()
+    if args.tournament is not None:
+        args.tournament = str(Path(args.tournament).resolve())  # The scripts are run from their own folder.
+    forbidden = [module.strip() for module in args.forbid.split(',') if module.strip() != ""]
+    results = [check_imports(command_line, forbidden, args.verbose) for command_line in checks(args.tournament)]
+    sys.exit(0 if all(results) else 1)
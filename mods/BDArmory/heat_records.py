@@ -0,0 +1,264 @@
+""" Compact in-memory records of the parsed tournament heats.
+
+The parsed results of each heat are kept as slotted records rather than as nested dicts so that a tournament (or several) takes less memory:
+    - Heat: the heat result, duration, craft names and the results of each craft, keyed by craft ID.
+    - Result: the heat result, i.e., the result type and the (dead) teams.
+    - CraftResult: the values of a craft in the heat. The craft are referred to by their IDs (indices into the heat's craft names) and all the attributions of a craft (e.g., hitsBy) are packed into a pair of typed arrays.
+Heat.to_dict gives exactly the heat data of results.json and Heat.from_dict converts it back.
+"""
+
+# Standard library imports
+import sys
+from array import array
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+attribution_types = {  # Attribution field: value type.
+    'hitsBy': int,
+    'bulletDamageBy': float,
+    'missileHitsBy': int,
+    'missilePartsHitBy': int,
+    'missileDamageBy': float,
+    'rocketHitsBy': int,
+    'rocketPartsHitBy': int,
+    'rocketDamageBy': float,
+    'rammedPartsLostBy': int,
+    'battleDamageBy': float,
+}
+kill_fields = ('cleanKillBy', 'cleanRocketKillBy', 'cleanMissileKillBy', 'cleanRamKillBy')
+value_fields = ('state', 'deathOrder', 'deathTime', 'GMKillReason', 'partsLostToAsteroids', 'HPremaining', 'accuracy', 'hits', 'shots', 'rocket_accuracy', 'rocket_strikes', 'rockets_fired', 'waypoints')
+
+craft_fields = value_fields + kill_fields + tuple(attribution_types)
+field_indices = {field: index for index, field in enumerate(craft_fields)}
+first_attribution_index = len(value_fields) + len(kill_fields)
+
+
+class CraftResult:
+    """ The values of a craft in a heat.
+
+    The fields that the craft has are listed in order, as indices into craft_fields, in the order that they were set (which is the order of results.json). The other fields are None.
+    The killers (e.g., cleanKillBy) are craft IDs. The attributions (e.g., hitsBy) are packed into two arrays in the order of their fields: attackers has the number of attackers followed by their IDs and values has their values.
+    """
+    __slots__ = ('order', 'attackers', 'values') + value_fields + kill_fields
+
+    def __init__(self):
+        self.order = b''
+        self.attackers = None
+        self.values = None
+        self.state = self.deathOrder = self.deathTime = self.GMKillReason = self.partsLostToAsteroids = self.HPremaining = None
+        self.accuracy = self.hits = self.shots = self.rocket_accuracy = self.rocket_strikes = self.rockets_fired = self.waypoints = None
+        self.cleanKillBy = self.cleanRocketKillBy = self.cleanMissileKillBy = self.cleanRamKillBy = None
+
+    def __contains__(self, field: str) -> bool:
+        return field_indices[field] in self.order
+
+    @property
+    def fields(self) -> List[str]:
+        """ The fields that the craft has, in order. """
+        return [craft_fields[index] for index in self.order]
+
+    def set(self, field: str, value):
+        """ Set the value of a (non-attribution) field. """
+        setattr(self, field, value)
+        index = field_indices[field]
+        if index not in self.order:
+            self.order += bytes((index,))
+
+    def set_attribution(self, field: str, attribution: Dict[int, Union[int, float]]):
+        """ Set an attribution field, replacing any previous values of it.
+
+        Args:
+            field (str): The attribution field, e.g., hitsBy.
+            attribution (Dict[int, Union[int, float]]): The value for each attacker ID.
+        """
+        if field in self:  # Repack the attributions with the new values in place of the old ones.
+            attributions = self.attribution_items()
+            attributions[field] = list(attribution.items())
+            self.attackers, self.values = array('i'), array('d')
+            for items in attributions.values():
+                self.attackers.append(len(items))
+                self.attackers.extend(attacker for attacker, _ in items)
+                self.values.extend(value for _, value in items)
+        else:
+            self.order += bytes((field_indices[field],))
+            if self.attackers is None:
+                self.attackers, self.values = array('i'), array('d')
+            self.attackers.append(len(attribution))
+            self.attackers.extend(attribution.keys())
+            self.values.extend(attribution.values())
+
+    def attribution_items(self) -> Dict[str, List[Tuple[int, Union[int, float]]]]:
+        """ The attacker IDs and values of each attribution field that the craft has, in field order. """
+        attributions = {}
+        if self.attackers is None:
+            return attributions
+        attackers, values = self.attackers.tolist(), self.values.tolist()
+        position = start = 0
+        for index in self.order:
+            if index < first_attribution_index:
+                continue
+            field = craft_fields[index]
+            end = start + attackers[position]
+            field_values = values[start:end]
+            attributions[field] = list(zip(attackers[position + 1:position + 1 + end - start], field_values if attribution_types[field] is float else map(int, field_values)))
+            position += 1 + end - start
+            start = end
+        return attributions
+
+    def attribution(self, field: str) -> List[Tuple[int, Union[int, float]]]:
+        """ The attacker IDs and values of an attribution field (empty if the craft doesn't have it). """
+        return self.attribution_items().get(field, []) if field in self else []
+
+    def to_dict(self, names: List[str]) -> dict:
+        """ The craft data as in results.json.
+
+        Args:
+            names (List[str]): The craft names of the heat.
+
+        Returns:
+            dict: The craft data.
+        """
+        data = {}
+        attributions = self.attribution_items()
+        for field in self.fields:
+            if field in attributions:
+                data[field] = {names[attacker]: value for attacker, value in attributions[field]}
+            elif field in kill_fields:
+                data[field] = names[getattr(self, field)]
+            else:
+                data[field] = getattr(self, field)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict, craft_id: Callable[[str], int]) -> 'CraftResult':
+        """ Create a craft record from the craft data of results.json.
+
+        Args:
+            data (dict): The craft data.
+            craft_id (Callable[[str], int]): Gives the ID of a craft name.
+
+        Returns:
+            CraftResult: The craft record.
+        """
+        craft = cls()
+        for field, value in data.items():
+            if field in attribution_types:
+                craft.set_attribution(field, {craft_id(attacker): v for attacker, v in value.items()})
+            elif field in kill_fields:
+                craft.set(field, craft_id(value))
+            else:
+                craft.set(field, value)
+        return craft
+
+
+class Result:
+    """ The result of a heat: the result type (e.g., Win) and the members of the winning or drawing teams and of the dead teams. """
+    __slots__ = ('result', 'teams', 'dead_teams')
+
+    def __init__(self, result: str, teams: Optional[Dict[str, str]] = None, dead_teams: Optional[Dict[str, str]] = None):
+        self.result = result
+        self.teams = teams
+        self.dead_teams = dead_teams
+
+    def to_dict(self) -> dict:
+        """ The heat result as in results.json. """
+        result = {'result': self.result}
+        if self.teams is not None:
+            result['teams'] = self.teams
+        if self.dead_teams is not None:
+            result['dead teams'] = self.dead_teams
+        return result
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Result':
+        """ Create a heat result from results.json. """
+        return cls(data['result'], data.get('teams'), data.get('dead teams'))
+
+
+class Heat:
+    """ The parsed results of a heat.
+
+    The craft are referred to by their IDs, which are indices into names. The results of each craft that took part are in craft, in log order.
+    """
+    __slots__ = ('result', 'duration', 'names', 'craft')
+
+    def __init__(self, names: Optional[List[str]] = None):
+        self.result: Optional[Result] = None
+        self.duration: float = 0
+        self.names: List[str] = [sys.intern(name) for name in names] if names is not None else []
+        self.craft: Dict[int, CraftResult] = {}
+
+    def __getstate__(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __setstate__(self, state: dict):
+        for field, value in state.items():
+            setattr(self, field, value)
+        self.names = [sys.intern(name) for name in self.names]  # Share the names with the other heats.
+
+    def craft_names(self) -> List[str]:
+        """ The names of the craft that took part, in log order. """
+        return [self.names[craft_id] for craft_id in self.craft]
+
+    def to_dict(self) -> dict:
+        """ The heat data as in results.json. """
+        return {
+            'result': self.result.to_dict() if self.result is not None else None,
+            'duration': self.duration,
+            'craft': {self.names[craft_id]: craft.to_dict(self.names) for craft_id, craft in self.craft.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Heat':
+        """ Create a heat record from the heat data of results.json. """
+        heat = cls()
+        ids = {}
+
+        def craft_id(name: str) -> int:
+            if name not in ids:
+                ids[name] = len(heat.names)
+                heat.names.append(sys.intern(name))
+            return ids[name]
+
+        heat.result = Result.from_dict(data['result']) if data['result'] is not None else None
+        heat.duration = data['duration']
+        for name, craft_data in data['craft'].items():
+            heat.craft[craft_id(name)] = CraftResult.from_dict(craft_data, craft_id)
+        return heat
+
+
+def results_dict(tournamentData: Dict[str, Dict[str, Heat]]) -> dict:
+    """ Convert the heat records of a tournament to the tournament data of results.json.
+
+    Args:
+        tournamentData (Dict[str, Dict[str, Heat]]): The heat records, keyed by round and heat name.
+
+    Returns:
+        dict: The tournament data.
+    """
+    return {round_name: {heat_name: heat.to_dict() for heat_name, heat in heats.items()} for round_name, heats in tournamentData.items()}
+
+
+def heat_dicts(tournamentData: Dict[str, Dict[str, Heat]]) -> Iterator[Tuple[str, str, dict]]:
+    """ The round name, heat name and heat data (as in results.json) of each heat, converted as they're needed.
+
+    Args:
+        tournamentData (Dict[str, Dict[str, Heat]]): The heat records, keyed by round and heat name.
+
+    Yields:
+        Tuple[str, str, dict]: The round name, heat name and heat data of each heat, in order.
+    """
+    for round_name, heats in tournamentData.items():
+        for heat_name, heat in heats.items():
+            yield round_name, heat_name, heat.to_dict()
+
+
+def results_records(results: dict) -> Dict[str, Dict[str, Heat]]:
+    """ Convert the tournament data of results.json to heat records.
+
+    Args:
+        results (dict): The tournament data.
+
+    Returns:
+        Dict[str, Dict[str, Heat]]: The heat records, keyed by round and heat name.
+    """
+    return {round_name: {heat_name: Heat.from_dict(heat) for heat_name, heat in heats.items()} for round_name, heats in results.items()}
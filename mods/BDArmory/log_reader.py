@@ -0,0 +1,190 @@
+""" Shared log reading helpers for the BDArmory log parsing scripts.
+
+Logs can be plain (memory-mapped), compressed (.log.gz, .log.xz or .log.bz2, decompressed as they're read) or packed into a tournament archive (see pack_tournament.py).
+A heat log in an archive is referred to by a path through the archive, e.g., "Tournament 1/heats.logs.zip/Round 0/0.log", so that it can be used like any other log path.
+"""
+
+# Standard library imports
+import bz2
+import gzip
+import json
+import lzma
+import mmap
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+compressors = {'.gz': gzip.open, '.xz': lzma.open, '.bz2': bz2.open}  # Compressed log suffix: opener.
+archive_name = "heats.logs.zip"  # The archive of a tournament's heat logs, in the tournament folder.
+ARCHIVE_VERSION = 1
+_open_archives: Dict[Path, Tuple[int, zipfile.ZipFile, dict]] = {}  # Archive: (modification time, open archive, heat index).
+
+
+def log_name(path: Union[str, Path]) -> str:
+    """ The name of a log file without any compression suffix, e.g., 0.log for 0.log.gz. """
+    name = Path(path).name
+    suffix = Path(name).suffix
+    return name[:-len(suffix)] if suffix in compressors else name
+
+
+def is_log(path: Union[str, Path], extension: str = ".log") -> bool:
+    """ Whether a file name is that of a (possibly compressed) log. """
+    return log_name(path).endswith(extension)
+
+
+def archive_member(path: Union[str, Path]) -> Optional[Tuple[Path, str]]:
+    """ The archive and member name of a log in a tournament archive, or None for other paths. """
+    path = Path(path)
+    for parent in path.parents:
+        if parent.name == archive_name:
+            return parent, path.relative_to(parent).as_posix()
+    return None
+
+
+def open_archive(archive: Union[str, Path]) -> Tuple[zipfile.ZipFile, dict]:
+    """ The open tournament archive and its heat index.
+
+    The archive is kept open (until it changes or close_archives is called) so that its directory is only read once rather than for each heat.
+    """
+    archive = Path(archive)
+    mtime = archive.stat().st_mtime_ns
+    if archive in _open_archives and _open_archives[archive][0] != mtime:
+        _open_archives.pop(archive)[1].close()
+    if archive not in _open_archives:
+        zf = zipfile.ZipFile(archive)
+        index = json.loads(zf.read('index.json').decode('utf-8'))
+        if index.get('version') != ARCHIVE_VERSION:
+            zf.close()
+            raise ValueError(f"Unsupported archive version {index.get('version')} in {archive}")
+        _open_archives[archive] = (mtime, zf, index)
+    return _open_archives[archive][1:]
+
+
+def close_archives():
+    """ Close the open tournament archives (e.g., before replacing one). """
+    while len(_open_archives) > 0:
+        _open_archives.popitem()[1][1].close()
+
+
+def archive_index(archive: Union[str, Path]) -> dict:
+    """ The heat index of a tournament archive: the version and, for each heat, its round, name (as in results.json), the size of the log it was packed from and the number of records kept. """
+    return open_archive(archive)[1]
+
+
+def archive_heat_logs(tournamentDir: Path) -> Dict[str, List[Path]]:
+    """ The heat logs in a tournament's archive (if it has one), as paths through the archive, by round. """
+    archive = tournamentDir / archive_name
+    heats = {}
+    if archive.is_file():
+        for heat in archive_index(archive)['heats']:
+            heats.setdefault(heat['round'], []).append(archive / heat['round'] / heat['heat'])
+    return heats
+
+
+def heat_logs(folder: Path, archived: Sequence[Path] = ()) -> List[Path]:
+    """ The heat logs (e.g., 0.log or 0.log.gz) in a folder together with any archived ones, in name order.
+
+    Where a heat has several logs, a plain log is preferred over a compressed one, which is preferred over an archived one.
+
+    Args:
+        folder (Path): The folder.
+        archived (Sequence[Path]): The archived heat logs of the folder.
+
+    Returns:
+        List[Path]: The heat logs.
+    """
+    logs = {log_name(log): log for log in archived}
+    for log in sorted(folder.glob("[0-9]*.log*"), key=lambda log: log.name, reverse=True) if folder.is_dir() else ():  # Plain logs last, so that they take precedence.
+        if is_log(log):
+            logs[log_name(log)] = log
+    return [logs[name] for name in sorted(logs)]
+
+
+def open_log(path: Union[str, Path]) -> BinaryIO:
+    """ Open a log for reading its (decompressed) bytes. """
+    member = archive_member(path)
+    if member is not None:
+        return open_archive(member[0])[0].open(member[1])
+    opener = compressors.get(Path(path).suffix)
+    return opener(path, 'rb') if opener is not None else open(path, 'rb')
+
+
+def log_stat(path: Union[str, Path]) -> Tuple[int, int]:
+    """ The size and modification time (ns) of a log (for an archived log, its compressed size in the archive and the modification time of the archive). """
+    member = archive_member(path)
+    if member is not None:
+        return open_archive(member[0])[0].getinfo(member[1]).compress_size, member[0].stat().st_mtime_ns
+    stat = Path(path).stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _marked_lines(mm: Union[mmap.mmap, bytes], markers: Sequence[bytes], start: int, end: int, encoding: str) -> Iterator[str]:
+    """ Yield the lines between the start and end offsets of a memory-mapped file (or buffer) that contain any of the markers. """
+    positions = {marker: mm.find(marker, start, end) for marker in markers}  # The next occurrence of each marker.
+    while True:
+        position = min((p for p in positions.values() if p >= 0), default=-1)
+        if position < 0:
+            break
+        line_start = mm.rfind(b'\n', start, position) + 1 or start
+        line_end = mm.find(b'\n', position, end)
+        if line_end < 0:
+            line_end = end
+        yield mm[line_start:line_end].rstrip(b'\r').decode(encoding)
+        for marker, p in positions.items():  # Skip past any other occurrences on the same line.
+            if 0 <= p < line_end + 1:
+                positions[marker] = mm.find(marker, line_end + 1, end)
+
+
+def read_marked_lines(path: Union[str, Path], markers: Sequence[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    """ Read the lines of a log file that contain any of the given markers.
+
+    The markers are searched for in the raw bytes, so only the matching lines get decoded and the memory use doesn't depend on the size of the log.
+    Plain files are memory-mapped, compressed and archived logs are decompressed a chunk at a time.
+
+    Args:
+        path (Union[str, Path]): The log file.
+        markers (Sequence[bytes]): The markers to look for, e.g., b"BDArmory.BDACompetitionMode".
+        encoding (str): The encoding of the log file.
+
+    Yields:
+        str: The matching lines, in order and without their line endings.
+    """
+    if Path(path).suffix in compressors or archive_member(path) is not None:
+        with open_log(path) as f:
+            tail = b''
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                buffer = tail + chunk
+                end = buffer.rfind(b'\n') + 1  # Lines that continue into the next chunk are left for it.
+                yield from _marked_lines(buffer, markers, 0, end, encoding)
+                tail = buffer[end:]
+            yield from _marked_lines(tail, markers, 0, len(tail), encoding)
+        return
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            return  # Empty files can't be memory-mapped.
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from _marked_lines(mm, markers, 0, len(mm), encoding)
+
+
+def read_new_marked_lines(path: Union[str, Path], markers: Sequence[bytes], offset: int = 0, encoding: str = "utf-8") -> Tuple[List[str], int]:
+    """ Read the complete lines that have been added to a growing log file since the given offset and that contain any of the given markers.
+
+    Only the bytes after the offset are searched, so the cost depends on how much has been added rather than on the size of the log.
+
+    Args:
+        path (Union[str, Path]): The log file.
+        markers (Sequence[bytes]): The markers to look for.
+        offset (int): The byte offset to start from, as returned by the previous call.
+        encoding (str): The encoding of the log file.
+
+    Returns:
+        Tuple[List[str], int]: The matching lines, in order and without their line endings, and the offset just past the last complete line to continue from.
+    """
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) <= offset:
+            return [], offset
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = mm.rfind(b'\n', offset) + 1  # A partially written last line is left for the next call.
+            if end == 0:
+                return [], offset
+            return list(_marked_lines(mm, markers, offset, end, encoding)), end
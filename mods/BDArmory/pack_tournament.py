@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+# Standard library imports
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+# Local imports
+from log_reader import ARCHIVE_VERSION, archive_heat_logs, archive_index, archive_member, archive_name, close_archives, heat_logs, log_name, log_stat, read_marked_lines
+
+VERSION = "1.0.0"
+
+parser = argparse.ArgumentParser(description="Pack the heat logs of a tournament into a single archive (heats.logs.zip in the tournament folder) that keeps only the BDArmory records and has an index of the heats. The tournament parser reads the archive in place of the round folders.", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+parser.add_argument('tournament', type=str, nargs='*', help="Tournament folders to pack (default: the latest tournament folder in the Logs folder).")
+parser.add_argument('--all', action='store_true', help="Pack every tournament folder in the Logs folder.")
+parser.add_argument('--level', type=int, default=9, choices=range(1, 10), metavar='{1..9}', help="The compression level.")
+parser.add_argument('--remove-logs', action='store_true', help="Remove the heat logs (and any round folders left empty) once they're packed and the archive has been checked.")
+parser.add_argument('-q', '--quiet', action='store_true', help="Don't show the archive statistics.")
+parser.add_argument("--version", action='store_true', help="Show the script version, then exit.")
+
+record_marker = b'BDArmory'  # The lines that are kept: those of the competition (and other BDArmory) records.
+
+
+def naturalSortKey(key: Union[str, Path]):
+    if isinstance(key, Path):
+        key = key.name
+    try:
+        return int(key.rsplit(' ')[1])  # If the key ends in an integer, split that off and use that as the sort key.
+    except:
+        return key  # Otherwise, just use the key.
+
+
+def tournament_heat_logs(tournamentDir: Path) -> List[Tuple[str, Path]]:
+    """ The heat logs of a tournament, from its round folders and its archive (if it has one).
+
+    Args:
+        tournamentDir (Path): The tournament folder.
+
+    Returns:
+        List[Tuple[str, Path]]: The round name and heat log of each heat, in round order.
+    """
+    archived = archive_heat_logs(tournamentDir)
+    rounds = {roundDir.name for roundDir in tournamentDir.iterdir() if roundDir.is_dir()} | set(archived)
+    return [(round, heat) for round in sorted(rounds, key=naturalSortKey) for heat in heat_logs(tournamentDir / round, archived.get(round, ()))]
+
+
+def pack_tournament(tournamentDir: Path, level: int = 9) -> Tuple[dict, List[Path]]:
+    """ Pack the heat logs of a tournament into its archive, replacing any previous archive.
+
+    Heats that are already in the archive are kept unless there's a log for them in a round folder, which is packed instead.
+    The archive is written to a temporary file and checked before it replaces the previous one.
+
+    Args:
+        tournamentDir (Path): The tournament folder.
+        level (int): The compression level.
+
+    Returns:
+        Tuple[dict, List[Path]]: The archive's index and the heat logs from the round folders that were packed.
+    """
+    heatLogs = tournament_heat_logs(tournamentDir)
+    if len(heatLogs) == 0:
+        raise ValueError("no heat logs found")
+    archive = tournamentDir / archive_name
+    previous = {(heat['round'], heat['heat']): heat for heat in archive_index(archive)['heats']} if archive.is_file() else {}
+    index = {'version': ARCHIVE_VERSION, 'heats': []}
+    packed = []
+    tmp_path = archive.with_suffix('.tmp')
+    try:
+        write_archive(tmp_path, heatLogs, previous, index, packed, level)
+    except:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    close_archives()  # The previous archive can't be replaced while it's open (on Windows).
+    os.replace(tmp_path, archive)
+    return index, packed
+
+
+def write_archive(path: Path, heatLogs: List[Tuple[str, Path]], previous: Dict[Tuple[str, str], dict], index: dict, packed: List[Path], level: int):
+    """ Write and check an archive of the heat logs.
+
+    Args:
+        path (Path): The archive file.
+        heatLogs (List[Tuple[str, Path]]): The round name and heat log of each heat.
+        previous (Dict[Tuple[str, str], dict]): The index entries of the heats in the previous archive, keyed by round and heat name.
+        index (dict): The archive's index, to which the heats are added.
+        packed (List[Path]): The heat logs from the round folders that get packed, added to.
+        level (int): The compression level.
+    """
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=level) as zf:
+        for round, heat in heatLogs:
+            name = log_name(heat)
+            lines = list(read_marked_lines(heat, [record_marker]))
+            zf.writestr(f"{round}/{name}", ''.join(f"{line}\n" for line in lines).encode('utf-8'))
+            if archive_member(heat) is not None:
+                index['heats'].append(previous[(round, name)])
+            else:
+                index['heats'].append({'round': round, 'heat': name, 'size': log_stat(heat)[0], 'records': len(lines)})
+                packed.append(heat)
+        zf.writestr('index.json', json.dumps(index, indent=2, ensure_ascii=False))
+    with zipfile.ZipFile(path) as zf:
+        bad_member = zf.testzip()
+        if bad_member is not None:
+            raise ValueError(f"Failed to check {bad_member} in {path}")
+        if json.loads(zf.read('index.json').decode('utf-8')) != index or len(zf.namelist()) != len(index['heats']) + 1:
+            raise ValueError(f"The index of {path} doesn't match its heats")
+
+
+def remove_logs(tournamentDir: Path, logs: List[Path]):
+    """ Remove packed heat logs and any round folders that are left empty. """
+    for log in logs:
+        log.unlink()
+    for roundDir in {log.parent for log in logs}:
+        if roundDir != tournamentDir and not any(roundDir.iterdir()):
+            roundDir.rmdir()
+
+
+def find_tournament_dirs(args: argparse.Namespace) -> List[Path]:
+    """ The tournament folders to pack, as given on the command line or from the Logs folder. """
+    if len(args.tournament) > 0:
+        return [Path(tournamentDir) for tournamentDir in args.tournament]
+    logsDir = Path(__file__).parent / "Logs"
+    tournamentDirs = sorted((dir for dir in logsDir.glob("Tournament*") if dir.is_dir()), key=naturalSortKey) if logsDir.exists() else []
+    return tournamentDirs if args.all else tournamentDirs[-1:]
+
+
+def format_size(size: int) -> str:
+    """ A human readable file size. """
+    for unit in ('B', 'kB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.version:
+        print(f"Version: {VERSION}")
+        sys.exit()
+    if args.all and len(args.tournament) > 0:
+        parser.error("--all doesn't take tournament folders.")
+    tournamentDirs = find_tournament_dirs(args)
+    if len(tournamentDirs) == 0:
+        parser.error(f"No tournament folders found in {Path(__file__).parent / 'Logs'}.")
+
+    failed = False
+    for tournamentDir in tournamentDirs:
+        start = time.perf_counter()
+        try:
+            if not tournamentDir.is_dir():
+                raise ValueError(f"{tournamentDir} is not a folder")
+            index, packed = pack_tournament(tournamentDir, args.level)
+            if args.remove_logs:
+                remove_logs(tournamentDir, packed)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            print(f"{tournamentDir}: failed to pack: {e}")
+            failed = True
+            continue
+        if not args.quiet:
+            logs_size = sum(heat['size'] for heat in index['heats'])
+            archive_size = (tournamentDir / archive_name).stat().st_size
+            print(f"{tournamentDir}: packed {len(index['heats'])} heats ({len(packed)} new) from {format_size(logs_size)} of logs into {format_size(archive_size)} ({100 * archive_size / logs_size if logs_size > 0 else 0:.1f}%) in {time.perf_counter() - start:.2f}s{', removed the packed logs' if args.remove_logs else ''}.")
+    sys.exit(1 if failed else 0)
@@ -2,232 +2,553 @@
 
 # Standard library imports
 import argparse
+import os
 import re
 import sys
+import time
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, reduce
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-VERSION = "4.2"
+# Local imports
+from log_reader import compressors, is_log, log_name, read_marked_lines, read_new_marked_lines
+
+VERSION = "4.6.1"
 
 parser = argparse.ArgumentParser(description="Log file parser for continuous spawning logs.", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
-parser.add_argument("logs", nargs='*', help="Log files to parse. If none are given, the latest log file is parsed.")
+parser.add_argument("logs", nargs='*', help="Log files to parse (.log, or compressed .log.gz, .log.xz or .log.bz2). If none are given, the latest log file is parsed.")
 parser.add_argument("-n", "--no-file", action='store_true', help="Don't create a csv file.")
 parser.add_argument("-w", "--weights", type=str, default="3,1.5,-1,4e-3,1e-4,4e-5,0.035,6e-4,1.5e-4, 5e-5,0.15,2e-3,3e-5,1.5e-5,0.075,0,0,0", help="Score weights.")
 parser.add_argument("--show-weights", action='store_true', help="Show the score weights.")
 parser.add_argument("-s", "--separately", action='store_true', help="Show the results of each log separately (for multiple logs).")
+parser.add_argument("-f", "--follow", action='store_true', help="Keep reading the log as it grows and update the results as new records are written (Ctrl-C to stop). Without a log, follows the latest log in the Logs folder.")
+parser.add_argument("--follow-interval", type=float, default=5, help="How often to check for new records in --follow mode (seconds).")
+parser.add_argument("-j", "--jobs", type=int, default=1, help="Parse the logs using this many worker processes (0 for one per CPU core).")
 parser.add_argument("--version", action='store_true', help="Show the script version, then exit.")
-args = parser.parse_args()
-
-if args.version:
-    print(f"Version: {VERSION}")
-    sys.exit()
-
-log_dir = Path(__file__).parent / "Logs" if len(args.logs) == 0 else Path('.')
 
 fields = ["kills", "assists", "deaths", "hits", "bullet damage", "bullet damage taken", "rocket strikes", "rocket parts hit", "rocket damage",
     "rocket damage taken", "missile strikes", "missile parts hit", "missile damage", "missile damage taken", "rammed parts", "parts lost to asteroids", "accuracy", "rocket accuracy"]
 fields_short = {field: field_short for field, field_short in zip(fields, ["Kills", "Assists", "Deaths", "Hits", "Damage", "DmgTkn", "RktHits", "RktParts", "RktDmg", "RktDmgTkn", "MisHits", "MisParts", "MisDmg", "MisDmgTkn", "Ram", "Asteroids", "Acc%", "RktAcc%"])}
-try:
-    weights = {field: float(w) for field, w in zip(fields, args.weights.split(','))}
-    if len(weights) != len(fields):
-        raise ValueError("Invalid number of weights.")
-except:
-    raise ValueError("Failed to parse input weights")
-
-if args.show_weights:
-    field_width = max(len(f) for f in fields)
-    for f, w in weights.items():
-        print(f"{f}:{' '*(field_width - len(f))} {w}")
-    sys.exit()
-
-if len(args.logs) > 0:
-    competition_files = [Path(filename) for filename in args.logs if filename.endswith(".log")]
-else:
-    competition_files = list(sorted(list(log_dir.glob("cts-*.log"))))
-    if len(competition_files) > 0:
-        competition_files = competition_files[-1:]
-
-data = {}
-for filename in competition_files:
-    with open(log_dir / filename if len(args.logs) == 0 else filename, "r") as file_data:
-        data[filename] = {}
-        Craft_Name = None
-        for line in file_data:
-            if not "BDArmory.VesselSpawner" in line:  # Identifier for continuous spawn logs.
-                continue
-            if " Name:" in line:  # Next craft
-                Craft_Name = line.split(" Name:")[-1].replace("\n", "")
-                data[filename][Craft_Name] = {"kills": 0, "assists": 0, "deaths": 0, "hits": 0, "bullet damage": 0, "acc hits": 0, "shots": 0, "accuracy": 0, "rocket strikes": 0, "rocket parts hit": 0,
-                    "rocket damage": 0, "acc rocket strikes": 0, "rockets fired": 0, "rocket accuracy": 0, "missile strikes": 0, "missile parts hit": 0, "missile damage": 0, "score": 0, "damage/spawn": 0}
-            elif " DEATHCOUNT:" in line:  # Counts up deaths
-                data[filename][Craft_Name]["deaths"] = int(line.split("DEATHCOUNT:")[-1].replace("\n", ""))
-            elif (m := re.match(".*CLEAN[^:]*:", line)) is not None:  # Counts up clean kills, frags, explodes and rams
-                killedby = {int(nr): killer for nr, killer in (cleanKill.split(":") for cleanKill in m.string[m.end():].replace("\n", "").split(", "))}
-                if "killed by" in data[filename][Craft_Name]:
-                    data[filename][Craft_Name]["killed by"].update(killedby)
-                else:
-                    data[filename][Craft_Name]["killed by"] = killedby  # {death_nr: killer}
-            elif " GMKILL:" in line:  # GM kills
-                data[filename][Craft_Name]["GM kills"] = {int(nr): killer for nr, killer in (gmKill.split(":") for gmKill in line.split(":  GMKILL:")[-1].replace("\n", "").split(", ")) if killer not in ("LandedTooLong", "Asteroids")}
-            elif " WHOSHOTME:" in line:  # Counts up hits
-                data[filename][Craft_Name]["shot by"] = {int(life): {by: int(hits) for hits, by in (entry.split(":", 1) for entry in hitsby.split(";"))}
-                                                                  for life, hitsby in (entry.split(":", 1) for entry in line.split(":  WHOSHOTME:")[-1].replace("\n", "").split(", "))}
-            elif " WHOSTRUCKMEWITHROCKETS:" in line:  # Counts up hits
-                data[filename][Craft_Name]["rocket strike by"] = {int(life): {by: int(hits) for hits, by in (entry.split(":", 1) for entry in hitsby.split(";"))}
-                                                                           for life, hitsby in (entry.split(":", 1) for entry in line.split(":  WHOSTRUCKMEWITHROCKETS:")[-1].replace("\n", "").split(", "))}
-            elif " WHOSTRUCKMEWITHMISSILES:" in line:  # Counts up hits
-                data[filename][Craft_Name]["missile strike by"] = {int(life): {by: int(hits) for hits, by in (entry.split(":", 1) for entry in hitsby.split(";"))}
-                                                                            for life, hitsby in (entry.split(":", 1) for entry in line.split(":  WHOSTRUCKMEWITHMISSILES:")[-1].replace("\n", "").split(", "))}
-            elif " WHOPARTSHITMEWITHROCKETS:" in line:  # Counts up parts hit
-                data[filename][Craft_Name]["rocket parts hit by"] = {int(life): {by: int(parts) for parts, by in (entry.split(":", 1) for entry in partshitby.split(";"))}
-                                                                              for life, partshitby in (entry.split(":", 1) for entry in line.split(":  WHOPARTSHITMEWITHROCKETS:")[-1].replace("\n", "").split(", "))}
-            elif " WHOPARTSHITMEWITHMISSILES:" in line:  # Counts up parts hit
-                data[filename][Craft_Name]["missile parts hit by"] = {int(life): {by: int(parts) for parts, by in (entry.split(":", 1) for entry in partshitby.split(";"))}
-                                                                               for life, partshitby in (entry.split(":", 1) for entry in line.split(":  WHOPARTSHITMEWITHMISSILES:")[-1].replace("\n", "").split(", "))}
-            elif " WHODAMAGEDMEWITHBULLETS:" in line:  # Counts up damage
-                data[filename][Craft_Name]["bullet damage by"] = {int(life): {by: float(damage) for damage, by in (entry.split(":", 1) for entry in damageby.split(";"))}
-                                                                           for life, damageby in (entry.split(":", 1) for entry in line.split(":  WHODAMAGEDMEWITHBULLETS:")[-1].replace("\n", "").split(", "))}
-            elif " WHODAMAGEDMEWITHROCKETS:" in line:  # Counts up damage
-                data[filename][Craft_Name]["rocket damage by"] = {int(life): {by: float(damage) for damage, by in (entry.split(":", 1) for entry in damageby.split(";"))}
-                                                                           for life, damageby in (entry.split(":", 1) for entry in line.split(":  WHODAMAGEDMEWITHROCKETS:")[-1].replace("\n", "").split(", "))}
-            elif " WHODAMAGEDMEWITHMISSILES:" in line:  # Counts up damage
-                data[filename][Craft_Name]["missile damage by"] = {int(life): {by: float(damage) for damage, by in (entry.split(":", 1) for entry in damageby.split(";"))}
-                                                                            for life, damageby in (entry.split(":", 1) for entry in line.split(":  WHODAMAGEDMEWITHMISSILES:")[-1].replace("\n", "").split(", "))}
-            elif " WHORAMMEDME:" in line:  # Counts up rams
-                data[filename][Craft_Name]["rammed by"] = {int(life): {by: int(parts) for parts, by in (entry.split(":", 1) for entry in partshitby.split(";"))}
-                                                                    for life, partshitby in (entry.split(":", 1) for entry in line.split(":  WHORAMMEDME:")[-1].replace("\n", "").split(", "))}
-            elif " PARTSLOSTTOASTEROIDS:" in line:  # Count up parts
-                data[filename][Craft_Name]["parts lost to asteroids"] = {int(life): int(partsLost) for life, partsLost in (entry.split(":", 1) for entry in line.split(":  PARTSLOSTTOASTEROIDS:")[-1].replace("\n", "").split(", "))}
-            elif " ACCURACY:" in line:
-                for item in line.split(" ACCURACY:")[-1].replace("\n", "").split(","):
-                    _, hits, shots, rocketStrikes, rocketsFired = re.split('[:/]', item)
-                    data[filename][Craft_Name]["acc hits"] += int(hits)
-                    data[filename][Craft_Name]["shots"] += int(shots)
-                    data[filename][Craft_Name]["acc rocket strikes"] += int(rocketStrikes)
-                    data[filename][Craft_Name]["rockets fired"] += int(rocketsFired)
-                data[filename][Craft_Name]["accuracy"] = 100 * data[filename][Craft_Name]["acc hits"] / data[filename][Craft_Name]["shots"] if data[filename][Craft_Name]["shots"] > 0 else 0
-                data[filename][Craft_Name]["rocket accuracy"] = 100 * data[filename][Craft_Name]["acc rocket strikes"] / data[filename][Craft_Name]["rockets fired"] if data[filename][Craft_Name]["rockets fired"] > 0 else 0
-
-        for Craft_Name in data[filename]:
-            data[filename][Craft_Name]["hits"] = sum(hitby[life][Craft_Name] for hitby in (data[filename][other]["shot by"] for other in data[filename]
-                                                          if other != Craft_Name and "shot by" in data[filename][other]) for life in hitby if Craft_Name in hitby[life])
-            data[filename][Craft_Name]["rocket strikes"] = sum(hitby[life][Craft_Name] for hitby in (data[filename][other]["rocket strike by"] for other in data[filename]
-                                                                    if other != Craft_Name and "rocket strike by" in data[filename][other]) for life in hitby if Craft_Name in hitby[life])
-            data[filename][Craft_Name]["missile strikes"] = sum(hitby[life][Craft_Name] for hitby in (data[filename][other]["missile strike by"] for other in data[filename]
-                                                                     if other != Craft_Name and "missile strike by" in data[filename][other]) for life in hitby if Craft_Name in hitby[life])
-
-            data[filename][Craft_Name]["rocket parts hit"] = sum(partshitby[life][Craft_Name] for partshitby in (data[filename][other]["rocket parts hit by"] for other in data[filename]
-                                                                      if other != Craft_Name and "rocket parts hit by" in data[filename][other]) for life in partshitby if Craft_Name in partshitby[life])
-            data[filename][Craft_Name]["missile parts hit"] = sum(partshitby[life][Craft_Name] for partshitby in (data[filename][other]["missile parts hit by"]
-                                                                       for other in data[filename] if other != Craft_Name and "missile parts hit by" in data[filename][other]) for life in partshitby if Craft_Name in partshitby[life])
-
-            data[filename][Craft_Name]["bullet damage"] = sum(damageby[life][Craft_Name] for damageby in (data[filename][other]["bullet damage by"] for other in data[filename]
-                                                                   if other != Craft_Name and "bullet damage by" in data[filename][other]) for life in damageby if Craft_Name in damageby[life])
-            data[filename][Craft_Name]["rocket damage"] = sum(damageby[life][Craft_Name] for damageby in (data[filename][other]["rocket damage by"] for other in data[filename]
-                                                                   if other != Craft_Name and "rocket damage by" in data[filename][other]) for life in damageby if Craft_Name in damageby[life])
-            data[filename][Craft_Name]["missile damage"] = sum(damageby[life][Craft_Name] for damageby in (data[filename][other]["missile damage by"] for other in data[filename]
-                                                                    if other != Craft_Name and "missile damage by" in data[filename][other]) for life in damageby if Craft_Name in damageby[life])
-
-            data[filename][Craft_Name]["bullet damage taken"] = sum(damage for damageby in data[filename][Craft_Name]['bullet damage by'].values() for damage in damageby.values()) if 'bullet damage by' in data[filename][Craft_Name] else 0
-            data[filename][Craft_Name]["rocket damage taken"] = sum(damage for damageby in data[filename][Craft_Name]['rocket damage by'].values() for damage in damageby.values()) if 'rocket damage by' in data[filename][Craft_Name] else 0
-            data[filename][Craft_Name]["missile damage taken"] = sum(damage for damageby in data[filename][Craft_Name]['missile damage by'].values()
-                                                                          for damage in damageby.values()) if 'missile damage by' in data[filename][Craft_Name] else 0
-
-            data[filename][Craft_Name]["rammed parts"] = sum(partshitby[life][Craft_Name] for partshitby in (data[filename][other]["rammed by"] for other in data[filename]
-                                                                  if other != Craft_Name and "rammed by" in data[filename][other]) for life in partshitby if Craft_Name in partshitby[life])
-
-            data[filename][Craft_Name]["damage/spawn"] = (data[filename][Craft_Name]["bullet damage"] + data[filename][Craft_Name]["rocket damage"] +
-                                                               data[filename][Craft_Name]["missile damage"]) / (1 + data[filename][Craft_Name]["deaths"])
-
-            data[filename][Craft_Name]["kills"] = sum(1 for kill in (data[filename][other]["killed by"] for other in data[filename] if other !=
-                                                           Craft_Name and "killed by" in data[filename][other]) for life in kill if Craft_Name == kill[life])
-            data[filename][Craft_Name]["parts lost to asteroids"] = sum(data[filename][Craft_Name]["parts lost to asteroids"].values()) if "parts lost to asteroids" in data[filename][Craft_Name] else 0
-
-            # Aggregate the damagers for computing assists later.
-            data[filename][Craft_Name]['damaged by'] = {}
-            if 'bullet damage by' in data[filename][Craft_Name]:
-                data[filename][Craft_Name]['damaged by'] = {k: set(v) for k, v in data[filename][Craft_Name]['bullet damage by'].items() if k < data[filename][Craft_Name]['deaths']}
-            if 'rocket damage by' in data[filename][Craft_Name]:
-                for k, v in data[filename][Craft_Name]['rocket damage by'].items():
-                    if k < data[filename][Craft_Name]['deaths']:
-                        if k in data[filename][Craft_Name]['damaged by']:
-                            data[filename][Craft_Name]['damaged by'][k] = data[filename][Craft_Name]['damaged by'][k].union(set(v))
-                        else:
-                            data[filename][Craft_Name]['damaged by'][k] = set(v)
-            if 'missile damage by' in data[filename][Craft_Name]:
-                for k, v in data[filename][Craft_Name]['missile damage by'].items():
-                    if k < data[filename][Craft_Name]['deaths']:
-                        if k in data[filename][Craft_Name]['damaged by']:
-                            data[filename][Craft_Name]['damaged by'][k] = data[filename][Craft_Name]['damaged by'][k].union(set(v))
-                        else:
-                            data[filename][Craft_Name]['damaged by'][k] = set(v)
-            if 'rammed by' in data[filename][Craft_Name]:
-                for k, v in data[filename][Craft_Name]['rammed by'].items():
-                    if k < data[filename][Craft_Name]['deaths']:
-                        if k in data[filename][Craft_Name]['damaged by']:
-                            data[filename][Craft_Name]['damaged by'][k] = data[filename][Craft_Name]['damaged by'][k].union(set(v))
-                        else:
-                            data[filename][Craft_Name]['damaged by'][k] = set(v)
-
-            # Sanity check
-            if data[filename][Craft_Name]["hits"] != data[filename][Craft_Name]["acc hits"]:
-                print(f"Warning: inconsistency in hit counting {data[filename][Craft_Name]['hits']} vs {data[filename][Craft_Name]['acc hits']} for log {filename}")
-            if data[filename][Craft_Name]["rocket strikes"] != data[filename][Craft_Name]["acc rocket strikes"]:
-                print(f"Warning: inconsistency in rocket strike counting {data[filename][Craft_Name]['rocket strikes']} vs {data[filename][Craft_Name]['acc rocket strikes']} for log {filename}")
-
-        # Compute assists and scores.
-        for Craft_Name in data[filename]:
-            data[filename][Craft_Name]["assists"] = sum(1 for other in data[filename] for life, damagedby in data[filename][other]['damaged by'].items() if Craft_Name in damagedby and not (
-                'killed by' in data[filename][other] and life in data[filename][other]['killed by']) and not ('GM kills' in data[filename][other] and life in data[filename][other]['GM kills']))
-
-            data[filename][Craft_Name]["score"] = sum(weights[field] * data[filename][Craft_Name][field] for field in fields)
-
-if len(data) > 0:
-    # Write results to console
-    if args.separately:
-        for filename, summary in data.items():
-            print(f"Results for {filename}:")
-            name_length = max([len(craft) for craft in summary])
-            field_lengths = {field: max(len(fields_short[field]) + 2, 8) for field in fields}
-            fields_to_show = [field for field in fields if not all(summary[craft][field] == 0 for craft in summary)]
-            print(f"Name{' '*(name_length-4)}     score" + "".join(f"{fields_short[field]:>{field_lengths[field]}}" for field in fields_to_show))
+ratio_fields = {"accuracy": ("acc hits", "shots"), "rocket accuracy": ("acc rocket strikes", "rockets fired")}  # Derived percentages and the counters they're computed from.
+counter_fields = [field for field in fields if field not in ratio_fields] + ["acc hits", "shots", "acc rocket strikes", "rockets fired", "score"]  # The additive per-craft results of a log.
+
+# The per-life attributions of each craft and the stat that they count towards for the attacker.
+# Each is stored as parallel (life, attacker ID, value) arrays, with the attackers interned to integer IDs for the log.
+attribution_fields = {
+    "shot by": "hits",
+    "rocket strike by": "rocket strikes",
+    "missile strike by": "missile strikes",
+    "rocket parts hit by": "rocket parts hit",
+    "missile parts hit by": "missile parts hit",
+    "bullet damage by": "bullet damage",
+    "rocket damage by": "rocket damage",
+    "missile damage by": "missile damage",
+    "rammed by": "rammed parts",
+}
+assist_fields = ("bullet damage by", "rocket damage by", "missile damage by", "rammed by")  # Attributions that count towards assists.
+typecodes = {int: 'q', float: 'd'}  # Array typecodes of the attributed values.
+
+
+def index_attributions(craft_data: Dict[str, dict], names: Dict[str, int]) -> Tuple[Dict[str, list], Counter, Counter]:
+    """ Total the attributions in a log by attacker in a single pass over the per-life attribution arrays of each craft.
+
+    Self-inflicted attributions don't count towards the attacker's stats or kills, but do count towards assists.
+
+    Args:
+        craft_data (Dict[str, dict]): The parsed data of each craft in the log.
+        names (Dict[str, int]): The ID of each craft and attacker in the log.
+
+    Returns:
+        Tuple[Dict[str, list], Counter, Counter]: The attributed totals of each stat indexed by attacker ID, and the kills and assists of each attacker ID.
+    """
+    totals = {stat: [0] * len(names) for stat in attribution_fields.values()}
+    kills, assists = Counter(), Counter()
+    for victim, victim_data in craft_data.items():
+        victim_id = names[victim]
+        for stat, victim_totals in attributed_totals(victim_id, victim_data).items():  # Summed per victim, so that RunningResults gets the same totals.
+            stat_totals = totals[stat]
+            for attacker, total in victim_totals.items():
+                stat_totals[attacker] += total
+        victim_kills, victim_assists = kills_and_assists(victim_id, victim_data)
+        kills.update(victim_kills)
+        assists.update(victim_assists)
+    return totals, kills, assists
+
+
+def kills_and_assists(victim_id: int, victim_data: dict) -> Tuple[Counter, Counter]:
+    """ The kills and assists that the deaths of a craft give to its attackers.
+
+    Args:
+        victim_id (int): The ID of the craft.
+        victim_data (dict): The parsed data of the craft.
+
+    Returns:
+        Tuple[Counter, Counter]: The kills and assists of each attacker ID.
+    """
+    killed_by = victim_data.get("killed by", {})
+    kills = Counter(killer for killer in killed_by.values() if killer != victim_id)
+    gm_kills = victim_data.get("GM kills", {})
+    deaths = victim_data["deaths"]
+    damaged_by = set()  # (life, attacker) pairs for the lives that ended without a kill.
+    for field in assist_fields:
+        if field in victim_data:
+            lives, attackers, _ = victim_data[field]
+            damaged_by.update((life, attacker) for life, attacker in zip(lives, attackers) if life < deaths and life not in killed_by and life not in gm_kills)
+    return kills, Counter(attacker for _, attacker in damaged_by)
+
+
+def attributed_totals(victim_id: int, victim_data: dict) -> Dict[str, Dict[int, Union[int, float]]]:
+    """ The totals of each stat that the attributions of a craft give to its attackers (excluding self-inflicted ones).
+
+    Args:
+        victim_id (int): The ID of the craft.
+        victim_data (dict): The parsed data of the craft.
+
+    Returns:
+        Dict[str, Dict[int, Union[int, float]]]: The total of each stat for each attacker ID.
+    """
+    totals = {}
+    for field, stat in attribution_fields.items():
+        if field in victim_data:
+            stat_totals = totals.setdefault(stat, {})
+            _, attackers, values = victim_data[field]
+            for attacker, value in zip(attackers, values):
+                if attacker != victim_id:
+                    stat_totals[attacker] = stat_totals.get(attacker, 0) + value
+    return totals
+
+
+def decode_lives(payload: str, value_type: type) -> Dict[int, object]:
+    """ Decode a "life:value, life:value, ..." payload into {life: value}. """
+    return {int(life): value_type(value) for life, value in (entry.split(":", 1) for entry in payload.split(", "))}
+
+
+attribution_pattern = re.compile(r"([^:;]*):([^;]*)")  # The "value:craft" entries of a life's attributions.
+
+
+def decode_attributions(payload: str, value_type: type, names: Dict[str, int]) -> Tuple[array, array, array]:
+    """ Decode a "life:value:craft;value:craft, life:..." payload into parallel (life, attacker ID, value) arrays, adding any new attackers to names. """
+    lives, attackers, values = [], [], []
+    for entry in payload.split(", "):
+        life, attributions = entry.split(":", 1)
+        attributed = {by: value for value, by in attribution_pattern.findall(attributions)}
+        lives += [int(life)] * len(attributed)
+        attackers += attributed
+        values += attributed.values()
+    return array('l', lives), array('l', [names.setdefault(by, len(names)) for by in attackers]), array(typecodes[value_type], map(value_type, values))
+
+
+def parse_deaths(craft: dict, payload: str, names: Dict[str, int]):
+    craft["deaths"] = int(payload)
+
+
+def parse_clean_kills(craft: dict, payload: str, names: Dict[str, int]):  # Clean kills, frags, explodes and rams.
+    craft.setdefault("killed by", {}).update({life: names.setdefault(killer, len(names)) for life, killer in decode_lives(payload, str).items()})  # {death_nr: killer ID}
+
+
+def parse_gm_kills(craft: dict, payload: str, names: Dict[str, int]):
+    craft["GM kills"] = {life: names.setdefault(killer, len(names)) for life, killer in decode_lives(payload, str).items() if killer not in ("LandedTooLong", "Asteroids")}
+
+
+def parse_attributions(craft: dict, payload: str, names: Dict[str, int], field: str, value_type: type):
+    craft[field] = decode_attributions(payload, value_type, names)
+
+
+def parse_asteroids(craft: dict, payload: str, names: Dict[str, int]):
+    craft["parts lost to asteroids"] = array('q', decode_lives(payload, int).values())
+
+
+def parse_accuracy(craft: dict, payload: str, names: Dict[str, int]):
+    for item in payload.split(","):
+        _, hits, shots, rocketStrikes, rocketsFired = re.split('[:/]', item)
+        craft["acc hits"] += int(hits)
+        craft["shots"] += int(shots)
+        craft["acc rocket strikes"] += int(rocketStrikes)
+        craft["rockets fired"] += int(rocketsFired)
+    craft["accuracy"] = 100 * craft["acc hits"] / craft["shots"] if craft["shots"] > 0 else 0
+    craft["rocket accuracy"] = 100 * craft["acc rocket strikes"] / craft["rockets fired"] if craft["rockets fired"] > 0 else 0
+
+
+record_marker = b"BDArmory.VesselSpawner"  # Identifier for continuous spawn logs.
+
+# Continuous spawn records are "[BDArmory.VesselSpawner:<id>]: <TAG>:<payload>", with a leading space before each tag except Name.
+record_pattern = re.compile(r"\[BDArmory\.VesselSpawner[^\]]*\]: +(\w+):(.*)")
+
+# Handlers for the records of the current craft, keyed by tag. Tags containing CLEAN (CLEANKILL, CLEANRAM, ...) are clean kills.
+record_handlers = {
+    "DEATHCOUNT": parse_deaths,
+    "GMKILL": parse_gm_kills,
+    "WHOSHOTME": partial(parse_attributions, field="shot by", value_type=int),
+    "WHOSTRUCKMEWITHROCKETS": partial(parse_attributions, field="rocket strike by", value_type=int),
+    "WHOSTRUCKMEWITHMISSILES": partial(parse_attributions, field="missile strike by", value_type=int),
+    "WHOPARTSHITMEWITHROCKETS": partial(parse_attributions, field="rocket parts hit by", value_type=int),
+    "WHOPARTSHITMEWITHMISSILES": partial(parse_attributions, field="missile parts hit by", value_type=int),
+    "WHODAMAGEDMEWITHBULLETS": partial(parse_attributions, field="bullet damage by", value_type=float),
+    "WHODAMAGEDMEWITHROCKETS": partial(parse_attributions, field="rocket damage by", value_type=float),
+    "WHODAMAGEDMEWITHMISSILES": partial(parse_attributions, field="missile damage by", value_type=float),
+    "WHORAMMEDME": partial(parse_attributions, field="rammed by", value_type=int),
+    "PARTSLOSTTOASTEROIDS": parse_asteroids,
+    "ACCURACY": parse_accuracy,
+}
+
+
+def new_craft() -> dict:
+    """ The initial data of a craft, before any of its records. """
+    return {"kills": 0, "assists": 0, "deaths": 0, "hits": 0, "bullet damage": 0, "acc hits": 0, "shots": 0, "accuracy": 0, "rocket strikes": 0, "rocket parts hit": 0,
+            "rocket damage": 0, "acc rocket strikes": 0, "rockets fired": 0, "rocket accuracy": 0, "missile strikes": 0, "missile parts hit": 0, "missile damage": 0, "score": 0, "damage/spawn": 0}
+
+
+def apply_records(data: Dict[str, dict], names: Dict[str, int], lines: Iterable[str], Craft_Name: Optional[str] = None, changed: Optional[Dict[str, None]] = None) -> Optional[str]:
+    """ Apply the continuous spawn records in some log lines to the data of each craft.
+
+    Args:
+        data (Dict[str, dict]): The data of each craft, updated in place.
+        names (Dict[str, int]): The ID of each craft and attacker in the log, updated in place.
+        lines (Iterable[str]): The log lines.
+        Craft_Name (Optional[str]): The craft that the records at the start of the lines are for.
+        changed (Optional[Dict[str, None]]): The crafts whose data the records change get added to this (in order), if given.
+
+    Returns:
+        Optional[str]: The craft that the records at the end of the lines were for.
+    """
+    for line in lines:
+        if (m := record_pattern.search(line)) is None:
+            continue
+        tag, payload = m.groups()
+        if tag == "Name":  # Next craft
+            Craft_Name = payload
+            names.setdefault(Craft_Name, len(names))
+            data[Craft_Name] = new_craft()
+        elif (handler := record_handlers.get(tag, parse_clean_kills if "CLEAN" in tag else None)) is not None:
+            handler(data[Craft_Name], payload, names)
+        else:
+            continue
+        if changed is not None:
+            changed[Craft_Name] = None
+    return Craft_Name
+
+
+def consistency_warnings(craft: dict, path: Path) -> List[str]:
+    """ Sanity check the hits and rocket strikes of a craft against those counted for its accuracy. """
+    warnings = []
+    if craft["hits"] != craft["acc hits"]:
+        warnings.append(f"Warning: inconsistency in hit counting {craft['hits']} vs {craft['acc hits']} for log {path}")
+    if craft["rocket strikes"] != craft["acc rocket strikes"]:
+        warnings.append(f"Warning: inconsistency in rocket strike counting {craft['rocket strikes']} vs {craft['acc rocket strikes']} for log {path}")
+    return warnings
+
+
+def summarise_log(data: Dict[str, dict], names: Dict[str, int], weights: Dict[str, float], path: Path) -> Tuple[Dict[str, dict], List[str]]:
+    """ Compute the counters of each craft from the records of a log.
+
+    Args:
+        data (Dict[str, dict]): The data of each craft from apply_records. This isn't modified, so that more records can be applied later.
+        names (Dict[str, int]): The ID of each craft and attacker in the log from apply_records.
+        weights (Dict[str, float]): The score weight of each field.
+        path (Path): The log file, for the warnings.
+
+    Returns:
+        Tuple[Dict[str, dict], List[str]]: The counter_fields of each craft, in log order, and any warnings about the log.
+    """
+    data = {Craft_Name: dict(craft) for Craft_Name, craft in data.items()}
+    warnings = []
+    totals, kills, assists = index_attributions(data, names)
+    for Craft_Name, craft in data.items():
+        craft_id = names[Craft_Name]
+        for stat, stat_totals in totals.items():
+            craft[stat] = stat_totals[craft_id]
+
+        craft["bullet damage taken"] = sum(craft['bullet damage by'][2]) if 'bullet damage by' in craft else 0
+        craft["rocket damage taken"] = sum(craft['rocket damage by'][2]) if 'rocket damage by' in craft else 0
+        craft["missile damage taken"] = sum(craft['missile damage by'][2]) if 'missile damage by' in craft else 0
+        craft["damage/spawn"] = (craft["bullet damage"] + craft["rocket damage"] + craft["missile damage"]) / (1 + craft["deaths"])
+        craft["kills"] = kills[craft_id]
+        craft["parts lost to asteroids"] = sum(craft["parts lost to asteroids"]) if "parts lost to asteroids" in craft else 0
+
+        warnings.extend(consistency_warnings(craft, path))
+
+    # Compute assists and scores.
+    for Craft_Name, craft in data.items():
+        craft["assists"] = assists[names[Craft_Name]]
+        craft["score"] = sum(weights[field] * craft[field] for field in fields)
+    return {Craft_Name: {field: craft[field] for field in counter_fields} for Craft_Name, craft in data.items()}, warnings
+
+
+def parse_log(path: Path, weights: Dict[str, float]) -> Tuple[Dict[str, dict], List[str]]:
+    """ Parse a continuous spawn log into the counters of each craft.
+
+    Args:
+        path (Path): The log file.
+        weights (Dict[str, float]): The score weight of each field.
+
+    Returns:
+        Tuple[Dict[str, dict], List[str]]: As for summarise_log.
+    """
+    data, names = {}, {}
+    apply_records(data, names, read_marked_lines(path, [record_marker]))
+    return summarise_log(data, names, weights, path)
+
+
+def parse_logs(paths: List[Path], weights: Dict[str, float], jobs: int = 1) -> Iterator[Tuple[Dict[str, dict], List[str]]]:
+    """ Parse continuous spawn logs, optionally using a pool of worker processes.
+
+    Args:
+        paths (List[Path]): The log files.
+        weights (Dict[str, float]): The score weight of each field.
+        jobs (int): The number of worker processes to use (0 for one per CPU core, 1 to parse them in this process).
+
+    Yields:
+        Tuple[Dict[str, dict], List[str]]: As for parse_log, in the same order as the log files.
+    """
+    if jobs == 1 or len(paths) < 2:
+        yield from map(partial(parse_log, weights=weights), paths)
+    else:
+        workers = jobs if jobs > 0 else (os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+            yield from executor.map(partial(parse_log, weights=weights), paths)
+
+
+def merge_results(a: Dict[str, dict], b: Dict[str, dict]) -> Dict[str, dict]:
+    """ Merge the counters of each craft from two sets of results (associative, keeping the crafts in order of first appearance). """
+    merged = {craft: dict(counters) for craft, counters in a.items()}
+    for craft, counters in b.items():
+        if craft in merged:
+            for field in counter_fields:
+                merged[craft][field] += counters[field]
+        else:
+            merged[craft] = dict(counters)
+    return merged
+
+
+def with_ratios(results: Dict[str, dict]) -> Dict[str, dict]:
+    """ Add the ratio_fields derived from the counters of each craft. """
+    return {craft: dict(counters, **{field: 100 * counters[numerator] / counters[denominator] if counters[denominator] > 0 else 0 for field, (numerator, denominator) in ratio_fields.items()}) for craft, counters in results.items()}
+
+
+def show_results(summary: Dict[str, dict], csv_path: Optional[Path] = None):
+    """ Print the results to the console, sorted by score, and optionally write them to a csv file. """
+    name_length = max([len(craft) for craft in summary])
+    field_lengths = {field: max(len(fields_short[field]) + 2, 8) for field in fields}
+    fields_to_show = [field for field in fields if not all(summary[craft][field] == 0 for craft in summary)]
+    print(f"Name{' '*(name_length-4)}     score" + "".join(f"{fields_short[field]:>{field_lengths[field]}}" for field in fields_to_show))
+    for craft in sorted(summary, key=lambda c: summary[c]["score"], reverse=True):
+        print(f"{craft}{' '*(name_length-len(craft))}  {summary[craft]['score']:8.2f}" +
+              "".join(f"{summary[craft][field]:>{field_lengths[field]}.0f}" if 'accuracy' not in field else f"{summary[craft][field]:>{field_lengths[field]-1}.1f}%" for field in fields_to_show))
+
+    if csv_path is not None:
+        # Write results to file, via a temporary file so that readers never see a partially written file.
+        tmp_path = csv_path.with_name(csv_path.name + ".tmp")
+        with open(tmp_path, "w") as results_data:
+            results_data.write("Name,Score," + ",".join(fields_to_show) + "\n")
             for craft in sorted(summary, key=lambda c: summary[c]["score"], reverse=True):
-                print(f"{craft}{' '*(name_length-len(craft))}  {summary[craft]['score']:8.2f}" +
-                      "".join(f"{summary[craft][field]:>{field_lengths[field]}.0f}" if 'accuracy' not in field else f"{summary[craft][field]:>{field_lengths[field]-1}.1f}%" for field in fields_to_show))
-            print("")
-
-            if not args.no_file:
-                # Write results to file
-                with open(log_dir / f"results-{Path(filename).stem}.csv", "w") as results_data:
-                    results_data.write("Name,Score," + ",".join(fields_to_show) + "\n")
-                    for craft in sorted(summary, key=lambda c: summary[c]["score"], reverse=True):
-                        results_data.write(f"{craft},{summary[craft]['score']:.2f}," + ",".join(f"{summary[craft][field]:.2f}" for field in fields_to_show) + "\n")
+                results_data.write(f"{craft},{summary[craft]['score']:.2f}," + ",".join(f"{summary[craft][field]:.2f}" for field in fields_to_show) + "\n")
+        os.replace(tmp_path, csv_path)
+
+
+def apply_difference(totals: Counter, old: Dict[int, Union[int, float]], new: Dict[int, Union[int, float]]) -> List[int]:
+    """ Replace old contributions to some (integer) totals by new ones.
+
+    Args:
+        totals (Counter): The totals for each ID, updated in place.
+        old (Dict[int, Union[int, float]]): The old contributions for each ID.
+        new (Dict[int, Union[int, float]]): The new contributions for each ID.
+
+    Returns:
+        List[int]: The IDs whose totals changed.
+    """
+    changed = changed_keys(old, new)
+    for key in changed:
+        totals[key] += new.get(key, 0) - old.get(key, 0)
+    return changed
+
+
+def changed_keys(old: Dict[int, Union[int, float]], new: Dict[int, Union[int, float]]) -> List[int]:
+    """ The IDs whose values differ between old and new contributions (missing values being 0). """
+    return [key for key, value in new.items() if value != old.get(key, 0)] + [key for key, value in old.items() if key not in new and value != 0]
+
+
+def own_counters(craft_data: dict) -> dict:
+    """ The counters of a craft that only depend on its own data (as in summarise_log), plus the ratio_fields as they're used for its score. """
+    counters = {field: craft_data[field] for field in ("deaths", "acc hits", "shots", "acc rocket strikes", "rockets fired", *ratio_fields)}
+    for field in ("bullet", "rocket", "missile"):
+        counters[f"{field} damage taken"] = sum(craft_data[f"{field} damage by"][2]) if f"{field} damage by" in craft_data else 0
+    counters["parts lost to asteroids"] = sum(craft_data["parts lost to asteroids"]) if "parts lost to asteroids" in craft_data else 0
+    return counters
+
+
+class RunningResults:
+    """ The results of a log that's being followed, kept up to date as records are added.
+
+    The attributed totals, kills and assists are kept per attacker, along with what each craft's attributions and deaths contributed to them.
+    When records change the data of some crafts, their old contributions are replaced by their new ones and only the results of those crafts and the attackers whose totals change are recomputed, so the cost of an update depends on the new records rather than on the length of the log.
+    The attributed totals are re-summed from the contributions of each craft in log order (as in index_attributions), so that they match those of parse_log exactly.
+    """
+
+    def __init__(self, weights: Dict[str, float], path: Path):
+        self.weights = weights
+        self.path = path
+        self.data: Dict[str, dict] = {}  # The parsed data of each craft, as for apply_records.
+        self.names: Dict[str, int] = {}  # The ID of each craft and attacker.
+        self.Craft_Name: Optional[str] = None  # The craft that the next records are for.
+        self.position: Dict[int, int] = {}  # The log order of each craft ID.
+        self.attributed: Dict[str, Dict[int, Dict[int, Union[int, float]]]] = {stat: {} for stat in attribution_fields.values()}  # Stat: {attacker ID: {victim ID: total}}.
+        self.totals: Dict[str, Counter] = {stat: Counter() for stat in attribution_fields.values()}  # The attributed total of each stat for each attacker ID.
+        self.kills, self.assists = Counter(), Counter()  # Of each attacker ID.
+        self.contributions: Dict[int, Tuple[Dict[str, Dict[int, Union[int, float]]], Counter, Counter]] = {}  # Victim ID: (attributed totals, kills, assists).
+        self.own: Dict[str, dict] = {}  # The counters of each craft that only depend on its own data.
+        self.results: Dict[str, dict] = {}  # The counter_fields and ratio_fields of each craft, in log order.
+
+    def apply(self, lines: Iterable[str]) -> List[str]:
+        """ Apply the records in some new log lines and update the results of the affected crafts.
+
+        Args:
+            lines (Iterable[str]): The new log lines.
+
+        Returns:
+            List[str]: The warnings about the updated crafts.
+        """
+        changed = {}
+        self.Craft_Name = apply_records(self.data, self.names, lines, self.Craft_Name, changed)
+        affected = set()  # The attacker IDs whose totals, kills or assists changed.
+        attributed = {stat: set() for stat in attribution_fields.values()}  # The attacker IDs whose attributed totals changed.
+        for craft in changed:
+            self.own[craft] = own_counters(self.data[craft])
+            victim_id = self.names[craft]
+            self.position.setdefault(victim_id, len(self.position))
+            old_totals, old_kills, old_assists = self.contributions.get(victim_id, ({}, Counter(), Counter()))
+            new_totals, new_kills, new_assists = contribution = (attributed_totals(victim_id, self.data[craft]), *kills_and_assists(victim_id, self.data[craft]))
+            self.contributions[victim_id] = contribution
+            for stat in old_totals.keys() | new_totals.keys():
+                stat_totals = new_totals.get(stat, {})
+                for attacker in changed_keys(old_totals.get(stat, {}), stat_totals):
+                    if attacker in stat_totals:
+                        self.attributed[stat].setdefault(attacker, {})[victim_id] = stat_totals[attacker]
+                    else:
+                        del self.attributed[stat][attacker][victim_id]
+                    attributed[stat].add(attacker)
+            affected.update(apply_difference(self.kills, old_kills, new_kills))
+            affected.update(apply_difference(self.assists, old_assists, new_assists))
+        for stat, attackers in attributed.items():
+            for attacker in attackers:
+                victim_totals = self.attributed[stat][attacker]
+                self.totals[stat][attacker] = sum(victim_totals[victim] for victim in sorted(victim_totals, key=self.position.__getitem__))
+            affected.update(attackers)
+        crafts = list(self.names)  # Indexed by ID.
+        updated = list(changed) + [crafts[craft_id] for craft_id in affected if crafts[craft_id] in self.data and crafts[craft_id] not in changed]  # New crafts get added to the results in log order.
+        return [warning for craft in updated for warning in self.update_craft(craft)]
+
+    def update_craft(self, craft: str) -> List[str]:
+        """ Recompute the results of a craft and return any warnings about it. """
+        craft_id = self.names[craft]
+        counters = dict(self.own[craft])
+        for stat in attribution_fields.values():
+            counters[stat] = self.totals[stat][craft_id]
+        counters["kills"] = self.kills[craft_id]
+        counters["assists"] = self.assists[craft_id]
+        counters["score"] = sum(self.weights[field] * counters[field] for field in fields)
+        self.results[craft] = with_ratios({craft: {field: counters[field] for field in counter_fields}})[craft]
+        return consistency_warnings(counters, self.path)
+
+
+def latest_log(log_dir: Path) -> Optional[Path]:
+    """ The latest continuous spawn log in the Logs folder, if any. """
+    logs = sorted(log_dir.glob("cts-*.log"))
+    return logs[-1] if len(logs) > 0 else None
+
+
+def follow_log(path: Optional[Path], log_dir: Path, weights: Dict[str, float], args: argparse.Namespace):
+    """ Keep reading a continuous spawn log as it grows and update the results as new records are written.
+
+    Only the bytes added since the previous poll are read. The new records update the results of the crafts that they affect (see RunningResults), which are then shown.
+    Without any logs on the command line, the latest log in the Logs folder is followed, switching to a newer one when it appears.
+
+    Args:
+        path (Optional[Path]): The log file, or None to wait for one to appear in the Logs folder.
+        log_dir (Path): The Logs folder.
+        weights (Dict[str, float]): The score weight of each field.
+        args (argparse.Namespace): The command line options.
+    """
+    running, offset = RunningResults(weights, path), 0
+    shown_warnings = set()
+    print(f"Following {path if path is not None else log_dir / 'cts-*.log'} for new records every {args.follow_interval}s (Ctrl-C to stop).")
+    try:
+        while True:
+            if len(args.logs) == 0 and (latest := latest_log(log_dir)) != path and latest is not None:
+                if path is not None:
+                    print(f"\nSwitching to {latest}")
+                path, running, offset = latest, RunningResults(weights, latest), 0
+            try:
+                if path is not None and path.stat().st_size < offset:  # The log was truncated or replaced, start again.
+                    running, offset = RunningResults(weights, path), 0
+                lines, offset = read_new_marked_lines(path, [record_marker], offset) if path is not None else ([], offset)
+            except FileNotFoundError:
+                lines = []
+            if len(lines) > 0:
+                warnings = running.apply(lines)
+                if len(running.results) > 0:
+                    for warning in warnings:
+                        if warning not in shown_warnings:
+                            print(warning)
+                            shown_warnings.add(warning)
+                    print(f"\nResults for {path} ({offset} bytes read):")
+                    show_results(running.results, (log_dir / f"results-{path.stem}.csv" if args.separately else log_dir / "results.csv") if not args.no_file else None)
+            time.sleep(args.follow_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.version:
+        print(f"Version: {VERSION}")
+        sys.exit()
+
+    log_dir = Path(__file__).parent / "Logs" if len(args.logs) == 0 else Path('.')
+
+    try:
+        weights = {field: float(w) for field, w in zip(fields, args.weights.split(','))}
+        if len(weights) != len(fields):
+            raise ValueError("Invalid number of weights.")
+    except:
+        raise ValueError("Failed to parse input weights")
+
+    if args.show_weights:
+        field_width = max(len(f) for f in fields)
+        for f, w in weights.items():
+            print(f"{f}:{' '*(field_width - len(f))} {w}")
+        sys.exit()
+
+    if len(args.logs) > 0:
+        competition_files = [Path(filename) for filename in args.logs if is_log(filename)]
+    else:
+        competition_files = [log for log in [latest_log(log_dir)] if log is not None]
+
+    if args.follow:
+        if len(args.logs) > 0 and len(competition_files) != 1:
+            parser.error("--follow only works with a single log.")
+        if len(competition_files) > 0 and competition_files[0].suffix in compressors:
+            parser.error("--follow doesn't work with compressed logs.")
+        follow_log(competition_files[0] if len(competition_files) > 0 else None, log_dir, weights, args)
+        sys.exit()
+
+    data = {}
+    for filename, (results, warnings) in zip(competition_files, parse_logs(competition_files, weights, args.jobs)):
+        for warning in warnings:
+            print(warning)
+        data[filename] = results
+
+    if len(data) > 0:
+        # Write results to console
+        if args.separately:
+            for filename, results in data.items():
+                print(f"Results for {filename}:")
+                show_results(with_ratios(results), log_dir / f"results-{Path(log_name(filename)).stem}.csv" if not args.no_file else None)
+                print("")
+        else:
+            # Merge the results from each log into a single summary.
+            show_results(with_ratios(reduce(merge_results, data.values())), log_dir / "results.csv" if not args.no_file else None)
     else:
-        # Merge the results from each log into a single summary.
-        summary = {}
-        for filename, entry in data.items():
-            for craft, results in entry.items():
-                if craft not in summary:
-                    summary[craft] = {f: results[f] for f in fields + ['acc hits', 'shots', 'acc rocket strikes', 'rockets fired', 'score']}
-                else:
-                    for f in fields + ['acc hits', 'shots', 'acc rocket strikes', 'rockets fired', 'score']:
-                        summary[craft][f] = summary[craft].get(f, 0) + results[f]
-        for craft, entry in summary.items():
-            entry['accuracy'] = entry['hits'] / entry['shots'] * 100 if entry['shots'] > 0 else 0
-            entry['rocket accuracy'] = entry['rocket strikes'] / entry['rockets fired'] * 100 if entry['rockets fired'] > 0 else 0
-
-        name_length = max([len(craft) for craft in summary])
-        field_lengths = {field: max(len(fields_short[field]) + 2, 8) for field in fields}
-        fields_to_show = [field for field in fields if not all(summary[craft][field] == 0 for craft in summary)]
-        print(f"Name{' '*(name_length-4)}     score" + "".join(f"{fields_short[field]:>{field_lengths[field]}}" for field in fields_to_show))
-        for craft in sorted(summary, key=lambda c: summary[c]["score"], reverse=True):
-            print(f"{craft}{' '*(name_length-len(craft))}  {summary[craft]['score']:8.2f}" +
-                  "".join(f"{summary[craft][field]:>{field_lengths[field]}.0f}" if 'accuracy' not in field else f"{summary[craft][field]:>{field_lengths[field]-1}.1f}%" for field in fields_to_show))
-
-        if not args.no_file:
-            # Write results to file
-            with open(log_dir / f"results.csv", "w") as results_data:
-                results_data.write("Name,Score," + ",".join(fields_to_show) + "\n")
-                for craft in sorted(summary, key=lambda c: summary[c]["score"], reverse=True):
-                    results_data.write(f"{craft},{summary[craft]['score']:.2f}," + ",".join(f"{summary[craft][field]:.2f}" for field in fields_to_show) + "\n")
-else:
-    print(f"No valid log files found.")
+        print(f"No valid log files found.")
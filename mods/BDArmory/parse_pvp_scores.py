@@ -3,28 +3,32 @@
 # Standard library imports
 import argparse
 import json
-import math
 import sys
 import traceback
+from functools import lru_cache, partial
+from itertools import groupby
 from pathlib import Path
-from typing import Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 # Third party imports
-import matplotlib.pyplot as plt
+import numpy as np
 
-VERSION = "1.2.0"
+# Local imports
+from results_store import iter_results
+from tournament_batch import run_batch
+
+VERSION = "1.10.0"
 
 parser = argparse.ArgumentParser(description="PVP score parser", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
 parser.add_argument('tournament', type=str, nargs='*', help="Tournament folder to parse.")
 parser.add_argument('-c', '--current-dir', action='store_true', help="Parse the logs in the current directory as if it was a tournament without the folder structure.")
 parser.add_argument('--csv', action='store_true', help="Create a CSV file with the PVP scores for the entire tournament.")
 parser.add_argument('--plot', action='store_true', help="Plot a diagram with of the overall PVP scores.")
+parser.add_argument('--save', type=str, help="Save the diagram of the overall PVP scores to this file in the tournament folder (e.g., pvp_scores.png or pvp_scores.svg) instead of showing it.")
+parser.add_argument('--plot-threshold', type=float, help="Only draw the edges of the diagram with a PVP score of at least this.")
+parser.add_argument('--all', action='store_true', help="Process every tournament folder in the Logs folder, then show the status of each.")
+parser.add_argument('-j', '--jobs', type=int, default=1, help="Process several tournaments using this many worker processes (0 for one per CPU core).")
 parser.add_argument("--version", action='store_true', help="Show the script version, then exit.")
-args = parser.parse_args()
-
-if args.version:
-    print(f"Version: {VERSION}")
-    sys.exit()
 
 
 def CalculateAccuracy(hits, shots): return 100 * hits / shots if shots > 0 else 0
@@ -49,127 +53,307 @@ def naturalSortKey(key: Union[str, Path]):
         return key  # Otherwise, just use the key.
 
 
-if args.current_dir and len(args.tournament) == 0:
-    tournamentDirs = [Path('')]
-else:
-    if len(args.tournament) == 0:
-        tournamentDirs = None
-        logsDir = Path(__file__).parent / "Logs"
-        if logsDir.exists():
-            tournamentFolders = list(logsDir.resolve().glob("Tournament*"))
-            if len(tournamentFolders) > 0:
-                tournamentFolders = sorted(list(dir for dir in tournamentFolders if dir.is_dir()), key=naturalSortKey)
-            if len(tournamentFolders) > 0:
-                tournamentDirs = [tournamentFolders[-1]]  # Latest tournament dir
-        if tournamentDirs is None:  # Didn't find a tournament dir, revert to current-dir
-            tournamentDirs = [Path('')]
-            args.current_dir = True
+shared_stats = ('wins', 'survivedCount', 'miaCount', 'deathCount', 'deathOrder', 'deathTime', 'HPremaining', 'accuracy', 'rocket_accuracy')  # Stats that are shared amongst all opponents.
+individual_stats = ('cleanKills', 'assists', 'hits', 'hitsTaken', 'bulletDamage', 'bulletDamageTaken', 'rocketHits', 'rocketHitsTaken', 'rocketPartsHit', 'rocketPartsHitTaken', 'rocketDamage', 'rocketDamageTaken',
+                    'missileHits', 'missileHitsTaken', 'missilePartsHit', 'missilePartsHitTaken', 'missileDamage', 'missileDamageTaken', 'ramScore', 'ramScoreTaken', 'battleDamage', 'battleDamageTaken')  # Stats against each opponent.
+individual_columns = {stat: column for column, stat in enumerate(individual_stats)}
+attribution_stats = {  # The attacker maps of the victim and the individual stats that they give the attacker and the victim.
+    'hitsBy': ('hits', 'hitsTaken'),
+    'bulletDamageBy': ('bulletDamage', 'bulletDamageTaken'),
+    'rocketHitsBy': ('rocketHits', 'rocketHitsTaken'),
+    'rocketPartsHitBy': ('rocketPartsHit', 'rocketPartsHitTaken'),
+    'rocketDamageBy': ('rocketDamage', 'rocketDamageTaken'),
+    'missileHitsBy': ('missileHits', 'missileHitsTaken'),
+    'missilePartsHitBy': ('missilePartsHit', 'missilePartsHitTaken'),
+    'missileDamageBy': ('missileDamage', 'missileDamageTaken'),
+    'rammedPartsLostBy': ('ramScore', 'ramScoreTaken'),
+    'battleDamageBy': ('battleDamage', 'battleDamageTaken'),
+}
+first_met_stride = 1 << 20  # Larger than the number of craft in a heat, so that first_met orders by heat, then by position in the heat.
+clean_kill_fields = ('cleanKillBy', 'cleanRocketKillBy', 'cleanMissileKillBy', 'cleanRamKillBy')
+assist_fields = ('hitsBy', 'rocketPartsHitBy', 'missilePartsHitBy', 'rammedPartsLostBy')
+
+
+def shared_stat_values(craft: str, stats: dict, heat: dict) -> List[float]:
+    """ The shared_stats of a craft in a heat. """
+    return [
+        1 if heat['result']['result'] == "Win" and craft in next(iter(heat['result']['teams'].values())).split(", ") else 0,
+        1 if stats['state'] == 'ALIVE' else 0,
+        1 if stats['state'] == 'MIA' else 0,
+        1 if stats['state'] == 'DEAD' else 0,
+        stats['deathOrder'] / len(heat['craft']) if 'deathOrder' in stats else 1,
+        stats['deathTime'] if 'deathTime' in stats else heat['duration'],
+        CalculateAvgHP(stats['HPremaining'] if 'HPremaining' in stats and stats['state'] == 'ALIVE' else 0, 1 if stats['state'] == 'ALIVE' else 0),
+        CalculateAccuracy(stats['hits'] if 'hits' in stats else 0, stats['shots'] if 'shots' in stats else 0),
+        CalculateAccuracy(stats['rocket_strikes'] if 'rocket_strikes' in stats else 0, stats['rockets_fired'] if 'rockets_fired' in stats else 0),
+    ]
+
+
+def heat_stats(heat: dict) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """ Arrange the stats of a heat as arrays.
+
+    The interactions are filled in from the attacker maps of each victim, so the cost depends on the number of attributions rather than on the number of pairs of craft.
+    Heats read from the results store come with the map entries as arrays (see results_store.read_results_store), which are scattered into the interactions directly.
+
+    Args:
+        heat (dict): The heat, as in results.json, or with its attacker maps in 'maps'.
+
+    Returns:
+        Tuple[List[str], np.ndarray, np.ndarray]: The craft, their shared stats (craft x shared_stats) and their stats against each opponent (craft x opponent x individual_stats).
+    """
+    crafts = list(heat['craft'])
+    index = {craft: i for i, craft in enumerate(crafts)}
+    shared = np.array([shared_stat_values(craft, stats, heat) for craft, stats in heat['craft'].items()], dtype=float).reshape(len(crafts), len(shared_stats))
+    interactions = np.zeros((len(crafts), len(crafts), len(individual_stats)))
+    for victim, data in heat['craft'].items():
+        v = index[victim]
+        for field in clean_kill_fields:
+            if field in data and data[field] in index and data[field] != victim:
+                interactions[index[data[field]], v, individual_columns['cleanKills']] = 1
+        if 'maps' in heat:
+            continue  # The rest comes from the map arrays.
+        if data['state'] == 'DEAD' and not any(field in data for field in clean_kill_fields):
+            for field in assist_fields:
+                for attacker in data.get(field, {}):
+                    if attacker in index and attacker != victim:
+                        interactions[index[attacker], v, individual_columns['assists']] = 1
+        for field, (stat, stat_taken) in attribution_stats.items():
+            attributions = [(index[attacker], value) for attacker, value in data.get(field, {}).items() if attacker in index and attacker != victim]
+            if len(attributions) > 0:
+                attackers, values = zip(*attributions)
+                interactions[attackers, v, individual_columns[stat]] = values
+                interactions[v, attackers, individual_columns[stat_taken]] = values
+    if 'maps' in heat:
+        add_map_interactions(interactions, heat)
+    return crafts, shared, interactions
+
+
+def add_map_interactions(interactions: np.ndarray, heat: dict):
+    """ Fill in the assists and attributions of a heat from the arrays of its attacker map entries (see results_store.read_results_store).
+
+    Args:
+        interactions (np.ndarray): The (craft x opponent x individual_stats) interactions of the heat, updated in place.
+        heat (dict): The heat, with its attacker maps in 'maps'.
+    """
+    maps = heat['maps']
+    others = (maps['attacker'] >= 0) & (maps['attacker'] != maps['victim'])  # Only attackers in the heat, excluding self-attributions.
+    victim, attacker, field, value = maps['victim'][others], maps['attacker'][others], maps['field'][others], maps['value'][others]
+    columns, is_assist_field = map_field_columns(tuple(maps['fields']))
+    stat, stat_taken = columns[field].T
+    attributed = stat >= 0
+    interactions[attacker[attributed], victim[attributed], stat[attributed]] = value[attributed]
+    interactions[victim[attributed], attacker[attributed], stat_taken[attributed]] = value[attributed]
+    assisted = np.array([data['state'] == 'DEAD' and not any(field in data for field in clean_kill_fields) for data in heat['craft'].values()], dtype=bool)  # Dead without a clean kill.
+    assists = is_assist_field[field] & assisted[victim]
+    interactions[attacker[assists], victim[assists], individual_columns['assists']] = 1
+
+
+@lru_cache(maxsize=None)
+def map_field_columns(fields: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    """ The columns of the individual stats (stat and stat taken, -1 for neither) that each map field gives and whether it counts for assists. """
+    columns = np.array([[individual_columns[stat] for stat in attribution_stats[field]] if field in attribution_stats else [-1, -1] for field in fields], dtype=int).reshape(-1, 2)
+    return columns, np.array([field in assist_fields for field in fields], dtype=bool)
+
+
+def stage_pvp_scores(stage: Iterable[dict], weights: Dict[str, float]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """ Compute the PVP scores of each pair of craft in a stage (round) of a tournament.
+
+    Each heat's scores come from one weighted contraction of its interaction stats, with each craft's shared score spread evenly over its opponents.
+    The heats are added to the craft x opponent arrays as they're read, so only the arrays are kept, not the heats.
+
+    Args:
+        stage (Iterable[dict]): The heats of the stage, as in results.json.
+        weights (Dict[str, float]): The score weights.
+
+    Returns:
+        Tuple[List[str], np.ndarray, np.ndarray]: The craft in order of first appearance, their scores against each opponent (craft x opponent)
+            and the order in which they first met each opponent (craft x opponent, inf for opponents they didn't meet).
+    """
+    individual_weights = np.array([weights.get(stat, 0) for stat in individual_stats], dtype=float)
+    shared_weights = np.array([weights.get(stat, 0) for stat in shared_stats], dtype=float)
+    crafts, heat_number = {}, 0
+    scores, first_met = np.zeros((0, 0)), np.full((0, 0), np.inf)
+    for heat in stage:
+        heat_crafts, shared, interactions = heat_stats(heat)
+        ids = np.array([crafts.setdefault(craft, len(crafts)) for craft in heat_crafts], dtype=int)
+        if len(ids) < 2:
+            continue
+        if len(crafts) > len(scores):  # Grow the arrays geometrically as new craft appear.
+            size = max(len(crafts), 2 * len(scores))
+            scores = np.pad(scores, (0, size - len(scores)))
+            first_met = np.pad(first_met, (0, size - len(first_met)), constant_values=np.inf)
+        heat_scores = interactions @ individual_weights + (shared @ shared_weights)[:, None] / (len(ids) - 1)
+        np.fill_diagonal(heat_scores, 0)
+        block = np.ix_(ids, ids)
+        scores[block] += heat_scores
+        first_met[block] = np.minimum(first_met[block], heat_number * first_met_stride + np.arange(len(ids)))  # Opponents are met in heat order, then in the order of the heat's craft.
+        heat_number += 1
+    scores, first_met = scores[:len(crafts), :len(crafts)], first_met[:len(crafts), :len(crafts)]
+    if len(crafts) > len(scores):  # Craft that were only ever alone in a heat.
+        scores = np.pad(scores, (0, len(crafts) - len(scores)))
+        first_met = np.pad(first_met, (0, len(crafts) - len(first_met)), constant_values=np.inf)
+    np.fill_diagonal(first_met, np.inf)
+    return list(crafts), scores, first_met
+
+
+def plot_pvp_scores(score_totals: Dict[str, Dict[str, float]], threshold: Optional[float] = None, save_path: Optional[Path] = None):
+    """ Plot the overall PVP scores as a graph, with the players around a circle and an edge from each player to each opponent whose width shows the player's score against them.
+
+    The edges are drawn as a single line collection.
+
+    Args:
+        score_totals (Dict[str, Dict[str, float]]): The overall PVP score of each player against each opponent.
+        threshold (Optional[float]): Only draw the edges with a score of at least this.
+        save_path (Optional[Path]): Save the plot to this file instead of showing it.
+    """
+    import matplotlib.pyplot as plt  # Only needed for plotting.
+    from matplotlib.collections import LineCollection
+    if save_path is not None:
+        plt.switch_backend('Agg')  # Render without a display.
+
+    grand_totals = {player: sum(scores.values()) for player, scores in score_totals.items()}
+    players = sorted(grand_totals, key=lambda k: grand_totals[k], reverse=True)
+    L = len(players)
+    angles = 2 * np.pi * np.arange(L) / L
+    nodes = np.stack([np.sin(angles), np.cos(angles)], axis=1)
+    colours = plt.get_cmap('hsv')(np.arange(L) / L)
+    scores = np.array([[score_totals[p0][p1] for p1 in players] for p0 in players], dtype=float)
+    p0, p1 = np.nonzero(~np.eye(L, dtype=bool))  # Every ordered pair of players.
+    widths = scores[p0, p1]
+    minWidth, maxWidth = widths.min(), widths.max()
+    keep = widths >= threshold if threshold is not None else np.ones(len(widths), dtype=bool)
+    order = np.argsort(-widths[keep], kind='stable')  # Widest edges first, so that the narrower ones are drawn on top.
+    p0, p1, widths = p0[keep][order], p1[keep][order], widths[keep][order]
+    linewidths = widths * 10 / (maxWidth - minWidth) + minWidth + 2 if maxWidth > minWidth else np.full(len(widths), minWidth + 2)
+
+    fig, ax = plt.subplots(figsize=(16, 10), dpi=200)
+    ax.add_collection(LineCollection(np.stack([nodes[p0], nodes[p1]], axis=1), colors=colours[p0], linewidths=np.maximum(linewidths, 0), capstyle='round'))
+    for i, player in enumerate(players):
+        ax.plot(nodes[i, 0], nodes[i, 1], color=colours[i], marker='*', markersize=20, label=player)
+    ax.legend(loc='upper right')
+    ax.axis('equal')
+    if save_path is not None:
+        fig.savefig(save_path)
+        plt.close(fig)
     else:
-        tournamentDirs = [Path(tournamentDir) for tournamentDir in args.tournament]  # Specified tournament dir
+        plt.show()
+
+
+def pvp_scores(heats: Iterable[Tuple[str, str, dict]], score_weights: Dict[str, float]) -> dict:
+    """ Compute the PVP scores of a tournament.
+
+    The heats are processed as they're read, one stage at a time.
+
+    Args:
+        heats (Iterable[Tuple[str, str, dict]]): The round name, heat name and heat data (as in results.json) of each heat, in order (see results_store.iter_results).
+        score_weights (Dict[str, float]): The score weights, as in the 'score weights' of summary.json.
+
+    Returns:
+        dict: The PVP scores, as in pvp_scores.json: the score weights, the scores of each craft against each opponent in each stage and the 'totals' over the rounds, in rank order.
+    """
+    weights = {k: w for k, w in score_weights.items() if w != 0}
+    pvp_score = {'score weights': weights}
+    players, round_scores = {}, []  # Players in order of first appearance and the scores of each round.
+    for stage_index, stage in groupby(heats, key=lambda heat: heat[0]):
+        crafts, scores, first_met = stage_pvp_scores((heat for _, _, heat in stage), weights)
+        pvp_score[stage_index] = {}
+        for craft, craft_scores, craft_first_met in zip(crafts, scores.tolist(), first_met):
+            opponents = np.argsort(craft_first_met, kind='stable')[:np.isfinite(craft_first_met).sum()].tolist()
+            pvp_score[stage_index][craft] = {crafts[opponent]: craft_scores[opponent] for opponent in opponents}
+        if stage_index.startswith('Round'):
+            round_scores.append((np.array([players.setdefault(craft, len(players)) for craft in crafts], dtype=int), scores, np.isfinite(first_met)))
+
+    # Add in a totals over the entire tournament entry.
+    totals = np.zeros((len(players), len(players)))
+    met = np.zeros((len(players), len(players)), dtype=bool)
+    for ids, scores, round_met in round_scores:  # Combine scores over all rounds
+        totals[np.ix_(ids, ids)] += scores
+        met[np.ix_(ids, ids)] |= round_met
+    ranking = np.argsort(-totals.sum(axis=1), kind='stable').tolist()  # Sort by overall rank
+    players = list(players)
+    pvp_score['totals'] = {players[p1]: {players[p2]: score if is_met else 0 for p2, score, is_met in zip(ranking, totals[p1, ranking].tolist(), met[p1, ranking].tolist())} for p1 in ranking}
+    return pvp_score
+
+
+def write_pvp_scores(tournamentDir: Path, pvp_score: dict, csv: bool = False):
+    """ Write the PVP scores to pvp_scores.json and optionally the totals to pvp_scores.csv in the tournament folder. """
+    with open(tournamentDir / "pvp_scores.json", 'w') as f:
+        json.dump(pvp_score, f, indent=2)
+
+    if csv:
+        score_totals = pvp_score['totals']
+        players = list(score_totals)
+        lines = ['Player,' + ','.join(players) + ',Sum'] + [f'{player},' + ','.join(str(s) for s in score_totals[player].values()) + f",{sum(score_totals[player].values())}" for player in players]
+        with open(tournamentDir / "pvp_scores.csv", 'w') as f:
+            f.write('\n'.join(lines))
+
 
+def process_tournament(tournamentDir: Path, args: argparse.Namespace) -> str:
+    """ Compute and write the PVP scores of a parsed tournament and plot them as requested by the options.
 
-for tournamentNumber, tournamentDir in enumerate(tournamentDirs):
+    Args:
+        tournamentDir (Path): The tournament folder, containing the summary.json and results.json from the tournament parser.
+        args (argparse.Namespace): The command line options.
+
+    Returns:
+        str: The number of craft.
+    """
+    with open(tournamentDir / "summary.json", 'r') as f:
+        summary = json.load(f)
+    heats = iter_results(tournamentDir / "results.json", map_arrays=True)  # Uses the results store (with its maps as arrays) or streams results.jsonl, whichever is up to date.
+    pvp_score = pvp_scores(heats, summary['meta']['score weights'])
+    write_pvp_scores(tournamentDir, pvp_score, args.csv)
+    if args.plot or args.save is not None:
+        plot_pvp_scores(pvp_score['totals'], args.plot_threshold, tournamentDir / args.save if args.save is not None else None)
+    return f"{len(pvp_score['totals'])} craft"
+
+
+def batch_task(tournamentDir: Path, args: argparse.Namespace) -> str:
+    """ Process a tournament for tournament_batch.run_batch. """
     try:
-        with open(tournamentDir / "summary.json", 'r') as f:
-            summary = json.load(f)
-        with open(tournamentDir / "results.json", 'r') as f:
-            results = json.load(f)
-        weights = {k: w for k, w in summary['meta']['score weights'].items() if w != 0}
-        pvp_data = {}
-        pvp_score = {'score weights': weights}
-        for stage_index, stage in results.items():
-            pvp_data[stage_index] = {}
-            pvp_score[stage_index] = {}
-            for heat_index, heat in stage.items():
-                pvp_data[stage_index][heat_index] = {}
-                number_of_opponents = len(heat['craft']) - 1
-                for craft, stats in heat['craft'].items():
-                    if craft not in pvp_score[stage_index]:
-                        pvp_score[stage_index][craft] = {}
-                    pvp_data[stage_index][heat_index][craft] = {}
-                    pvp_data[stage_index][heat_index][craft]['shared'] = {
-                        'wins': 1 if heat['result']['result'] == "Win" and craft in next(iter(heat['result']['teams'].values())).split(", ") else 0,
-                        'survivedCount': 1 if craft in heat['craft'] and stats['state'] == 'ALIVE' else 0,
-                        'miaCount': 1 if craft in heat['craft'] and stats['state'] == 'MIA' else 0,
-                        'deathCount': 1 if stats['state'] == 'DEAD' else 0,
-                        'deathOrder': stats['deathOrder'] / len(heat['craft']) if craft in heat['craft'] and 'deathOrder' in stats else 1,
-                        'deathTime': stats['deathTime'] if 'deathTime' in stats else heat['duration'],
-                        'HPremaining': CalculateAvgHP(stats['HPremaining'] if 'HPremaining' in stats and stats['state'] == 'ALIVE' else 0, 1 if stats['state'] == 'ALIVE' else 0),
-                        'accuracy': CalculateAccuracy(stats['hits'] if 'hits' in stats else 0, stats['shots'] if 'shots' in stats else 0),
-                        'rocket_accuracy': CalculateAccuracy(stats['rocket_strikes'] if 'rocket_strikes' in stats else 0, stats['rockets_fired'] if 'rockets_fired' in stats else 0),
-                    }
-                    score_vs_all = sum(weights[k] * pvp_data[stage_index][heat_index][craft]['shared'].get(k, 0) for k in weights)  # To be shared amongst all opponents.
-                    pvp_data[stage_index][heat_index][craft]['individual'] = {}
-                    for opponent, data in heat['craft'].items():
-                        if opponent == craft:
-                            continue
-                        pvp_data[stage_index][heat_index][craft]['individual'][opponent] = {
-                            'cleanKills': 1 if any((field in data and data[field] == craft) for field in ('cleanKillBy', 'cleanRocketKillBy', 'cleanMissileKillBy', 'cleanRamKillBy')) else 0,
-                            'assists': 1 if data['state'] == 'DEAD' and any(field in data and craft in data[field] for field in ('hitsBy', 'rocketPartsHitBy', 'missilePartsHitBy', 'rammedPartsLostBy')) and not any((field in data) for field in ('cleanKillBy', 'cleanRocketKillBy', 'cleanMissileKillBy', 'cleanRamKillBy')) else 0,
-                            'hits': data['hitsBy'][craft] if 'hitsBy' in data and craft in data['hitsBy'] else 0,
-                            'hitsTaken': stats['hitsBy'][opponent] if 'hitsBy' in stats and opponent in stats['hitsBy'] else 0,
-                            'bulletDamage': data['bulletDamageBy'][craft] if 'bulletDamageBy' in data and craft in data['bulletDamageBy'] else 0,
-                            'bulletDamageTaken': stats['bulletDamageBy'][opponent] if 'bulletDamageBy' in stats and opponent in stats['bulletDamageBy'] else 0,
-                            'rocketHits': data['rocketHitsBy'][craft] if 'rocketHitsBy' in data and craft in data['rocketHitsBy'] else 0,
-                            'rocketHitsTaken': stats['rocketHitsBy'][opponent] if 'rocketHitsBy' in stats and opponent in stats['rocketHitsBy'] else 0,
-                            'rocketPartsHit': data['rocketPartsHitBy'][craft] if 'rocketPartsHitBy' in data and craft in data['rocketPartsHitBy'] else 0,
-                            'rocketPartsHitTaken': stats['rocketPartsHitBy'][opponent] if 'rocketPartsHitBy' in stats and opponent in stats['rocketPartsHitBy'] else 0,
-                            'rocketDamage': data['rocketDamageBy'][craft] if 'rocketDamageBy' in data and craft in data['rocketDamageBy'] else 0,
-                            'rocketDamageTaken': stats['rocketDamageBy'][opponent] if 'rocketDamageBy' in stats and opponent in stats['rocketDamageBy'] else 0,
-                            'missileHits': data['missileHitsBy'][craft] if 'missileHitsBy' in data and craft in data['missileHitsBy'] else 0,
-                            'missileHitsTaken': stats['missileHitsBy'][opponent] if 'missileHitsBy' in stats and opponent in stats['missileHitsBy'] else 0,
-                            'missilePartsHit': data['missilePartsHitBy'][craft] if 'missilePartsHitBy' in data and craft in data['missilePartsHitBy'] else 0,
-                            'missilePartsHitTaken': stats['missilePartsHitBy'][opponent] if 'missilePartsHitBy' in stats and opponent in stats['missilePartsHitBy'] else 0,
-                            'missileDamage': data['missileDamageBy'][craft] if 'missileDamageBy' in data and craft in data['missileDamageBy'] else 0,
-                            'missileDamageTaken': stats['missileDamageBy'][opponent] if 'missileDamageBy' in stats and opponent in stats['missileDamageBy'] else 0,
-                            'ramScore': data['rammedPartsLostBy'][craft] if 'rammedPartsLostBy' in data and craft in data['rammedPartsLostBy'] else 0,
-                            'ramScoreTaken': stats['rammedPartsLostBy'][opponent] if 'rammedPartsLostBy' in stats and opponent in stats['rammedPartsLostBy'] else 0,
-                            'battleDamage': data['battleDamageBy'][craft] if 'battleDamageBy' in data and craft in data['battleDamageBy'] else 0,
-                            'battleDamageTaken': stats['battleDamageBy'][opponent] if 'battleDamageBy' in stats and opponent in stats['battleDamageBy'] else 0,
-                        }
-                        score_vs_opponent = sum(weights[k] * pvp_data[stage_index][heat_index][craft]['individual'][opponent].get(k, 0) for k in weights)
-                        pvp_score[stage_index][craft][opponent] = pvp_score[stage_index][craft].get(opponent, 0) + score_vs_opponent + score_vs_all / number_of_opponents
-
-        # Add in a totals over the entire tournament entry.
-        players = list(set().union(*[set(round_data.keys()) for round_index, round_data in pvp_score.items() if round_index.startswith('Round')]))
-        score_totals = {player1: {player2: sum(round_data.get(player1, {}).get(player2, 0) for round_index, round_data in pvp_score.items() if round_index.startswith('Round')) for player2 in players} for player1 in players}  # Combine scores over all rounds
-        players = sorted(players, key=lambda p: sum(score_totals[p].values()), reverse=True)  # Sort by overall rank
-        pvp_score['totals'] = score_totals
-
-        with open(tournamentDir / "pvp_scores.json", 'w') as f:
-            json.dump(pvp_score, f, indent=2)
-
-        if args.csv:
-            lines = ['Player,' + ','.join(players) + ',Sum'] + [f'{player},' + ','.join(str(s) for s in score_totals[player].values()) + f",{sum(score_totals[player].values())}" for player in players]
-            with open(tournamentDir / "pvp_scores.csv", 'w') as f:
-                f.write('\n'.join(lines))
-        
-        if args.plot:
-            grand_totals = {player: sum(scores.values()) for player, scores in score_totals.items()}
-            players = sorted(grand_totals, key=lambda k: grand_totals[k], reverse=True)
-            L = len(score_totals)
-            nodes = {players[i]:(math.sin(math.pi*2*i/L), math.cos(math.pi*2*i/L)) for i in range(L)}
-            edges = {p0:{p1:(nodes[p0], nodes[p1], score_totals[p0][p1]) for p1 in players} for p0 in players}
-            colourmap = plt.get_cmap('hsv')
-            colours = {players[i]: colourmap(i/L) for i in range(L)}
-            plt.figure(figsize=(16, 10), dpi=200)
-            lines = []
-            for p0 in players:
-                for p1 in players:
-                    if p0==p1:continue
-                    lines.append(([edges[p0][p1][0][0], edges[p0][p1][1][0]], [edges[p0][p1][0][1], edges[p0][p1][1][1]], colours[p0], edges[p0][p1][2])) # x, y, colour, width
-            lines = sorted(lines, key=lambda l:l[3], reverse=True)
-            minWidth = min([line[3] for line in lines])
-            maxWidth = max([line[3] for line in lines])
-            for p in players:
-                plt.plot(nodes[p][0], nodes[p][1], color=colours[p], marker='*', markersize=20)
-            for line in lines:
-                plt.plot(line[0], line[1], color=line[2], linewidth=line[3]*10/(maxWidth-minWidth)+minWidth+2, solid_capstyle='round')
-            plt.legend(players, loc='upper right')
-            plt.axis('equal')
-            plt.show()
+        return process_tournament(tournamentDir, args)
+    except Exception:
+        print(f"Failed to parse {tournamentDir}. Have you run the tournament parser on it first?")
+        raise
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.version:
+        print(f"Version: {VERSION}")
+        sys.exit()
 
+    if args.all and (len(args.tournament) > 0 or args.current_dir):
+        parser.error("--all processes the tournament folders in the Logs folder, don't give any others.")
+    if args.current_dir and len(args.tournament) == 0:
+        tournamentDirs = [Path('')]
+    else:
+        if len(args.tournament) == 0:
+            tournamentDirs = None
+            logsDir = Path(__file__).parent / "Logs"
+            if logsDir.exists():
+                tournamentFolders = list(logsDir.resolve().glob("Tournament*"))
+                if len(tournamentFolders) > 0:
+                    tournamentFolders = sorted(list(dir for dir in tournamentFolders if dir.is_dir()), key=naturalSortKey)
+                if args.all:
+                    tournamentDirs = tournamentFolders
+                elif len(tournamentFolders) > 0:
+                    tournamentDirs = [tournamentFolders[-1]]  # Latest tournament dir
+            if args.all and not tournamentDirs:
+                parser.error(f"No tournament folders found in {logsDir}.")
+            if tournamentDirs is None:  # Didn't find a tournament dir, revert to current-dir
+                tournamentDirs = [Path('')]
+                args.current_dir = True
+        else:
+            tournamentDirs = [Path(tournamentDir) for tournamentDir in args.tournament]  # Specified tournament dir
+
+    if len(tournamentDirs) > 1:
+        if args.plot and args.save is None and args.jobs != 1:
+            parser.error("The diagrams can only be shown when processing the tournaments one at a time, use --save or -j 1.")
+        sys.exit(0 if run_batch(partial(batch_task, args=args), tournamentDirs, args.jobs, quiet=True) else 1)
+
+    try:
+        process_tournament(tournamentDirs[0], args)
     except Exception as e:
-        print(f"Failed to parse {tournamentDir}. Have you run the tournament parser on it first?")
+        print(f"Failed to parse {tournamentDirs[0]}. Have you run the tournament parser on it first?")
         traceback.print_exc()
-        continue
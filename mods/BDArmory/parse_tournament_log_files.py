@@ -2,16 +2,42 @@
 
 # Standard library imports
 import argparse
+import hashlib
 import json
+import os
 import re
 import sys
+import time
 from base64 import b64decode, b64encode
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Tuple, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Third party imports
+import numpy as np
+
+# Local imports
+from heat_records import CraftResult, Heat, Result, attribution_types, results_dict
+from log_reader import archive_heat_logs, archive_member, heat_logs, log_name, log_stat, open_log, read_marked_lines
+from results_store import ResultsJsonlWriter, jsonl_path, store_path, write_results_store
+from tournament_batch import run_batch
+
+VERSION = "1.36.4"
+
+
+def shard_spec(value: str) -> Tuple[int, int]:
+    """ Parse a --shard option of the form K/N. """
+    try:
+        k, n = (int(v) for v in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard '{value}', expected K/N")
+    if not 0 <= k < n:
+        raise argparse.ArgumentTypeError(f"invalid shard '{value}', K must be from 0 to N-1")
+    return k, n
 
-VERSION = "1.23.4"
 
 parser = argparse.ArgumentParser(description="Tournament log parser", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
 parser.add_argument('tournament', type=str, nargs='*', help="Tournament folder to parse.")
@@ -26,16 +52,21 @@ parser.add_argument('-nc', '--no-cumulative', action='store_true', help="Don't d
 parser.add_argument('-nh', '--no-header', action='store_true', help="Don't display the header.")
 parser.add_argument('-N', type=int, help="Only the first N logs in the folder (in -c mode).")
 parser.add_argument('-z', '--zero-lowest-score', action='store_true', help="Shift the scores so that the lowest is 0.")
+parser.add_argument('-wf', '--weights-file', type=str, help="JSON file of named score weights to compare: ranking, rank correlation and rank sensitivity of each set of weights. Weights are given as for --weights, as lists or as {field: weight} objects.")
 parser.add_argument('-sw', '--show-weights', action='store_true', help="Display the score weights.")
 parser.add_argument('-wp', '--waypoint-scores', action='store_true', help="Use the default waypoint scores.")
 parser.add_argument('--average-duplicates', action='store_true', help="Average the values of duplicates in the summary.")
+parser.add_argument('--no-cache', action='store_true', help="Don't use or update the cache of parsed heats in the tournament folder.")
+parser.add_argument('-f', '--follow', action='store_true', help="Keep watching the tournament folder and update the summary as each new heat finishes (Ctrl-C to stop).")
+parser.add_argument('--follow-interval', type=float, default=5, help="How often to check for new heats in --follow mode (seconds).")
+parser.add_argument('-j', '--jobs', type=int, default=1, help="Parse the heat logs using this many worker processes (0 for one per CPU core). With several tournaments, the tournaments are parsed in parallel instead.")
+parser.add_argument('--results-format', choices=['json', 'jsonl', 'both'], default='json', help="Write the per-heat results to results.json (and the results.npz store), to results.jsonl (one heat per line, written as the heats are parsed) or to both.")
+parser.add_argument('--all', action='store_true', help="Parse every tournament folder in the Logs folder (in parallel with -j), then show the status of each.")
+parser.add_argument('--rounds', type=str, help="Only parse these round folders (comma-separated, e.g., 'Round 0,Round 3'). Unless they're for --emit-partial, the summary of these rounds is only shown on the console, leaving the tournament's files as they are.")
+parser.add_argument('--shard', type=shard_spec, help="Only parse every Nth heat log, starting from the Kth, given as K/N (K from 0 to N-1), to split the heats over several partial results files (requires --emit-partial).")
+parser.add_argument('--emit-partial', type=str, help="Write the parsed heats to this partial results file for --merge instead of summarising the tournament.")
+parser.add_argument('--merge', type=str, nargs='+', help="Combine partial results files from --emit-partial (in any order) into the results and summary, written to the tournament folder (the current directory if none is given).")
 parser.add_argument("--version", action='store_true', help="Show the script version, then exit.")
-args = parser.parse_args()
-args.score = args.score or args.scores_only
-
-if args.version:
-    print(f"Version: {VERSION}")
-    sys.exit()
 
 
 def naturalSortKey(key: Union[str, Path]):
@@ -47,39 +78,9 @@ def naturalSortKey(key: Union[str, Path]):
         return key  # Otherwise, just use the key.
 
 
-if args.current_dir and len(args.tournament) == 0:
-    tournamentDirs = [Path('')]
-else:
-    if len(args.tournament) == 0:
-        tournamentDirs = None
-        logsDir = Path(__file__).parent / "Logs"
-        if logsDir.exists():
-            tournamentFolders = list(logsDir.resolve().glob("Tournament*"))
-            if len(tournamentFolders) > 0:
-                tournamentFolders = sorted(list(dir for dir in tournamentFolders if dir.is_dir()), key=naturalSortKey)
-            if len(tournamentFolders) > 0:
-                tournamentDirs = [tournamentFolders[-1]]  # Latest tournament dir
-        if tournamentDirs is None:  # Didn't find a tournament dir, revert to current-dir
-            tournamentDirs = [Path('')]
-            args.current_dir = True
-    else:
-        tournamentDirs = [Path(tournamentDir) for tournamentDir in args.tournament]  # Specified tournament dir
-
-if args.waypoint_scores:
-    args.weights = "0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,-0.02,-0.003"
-
 score_fields = ('wins', 'survivedCount', 'miaCount', 'deathCount', 'deathOrder', 'deathTime', 'cleanKills', 'assists', 'hits', 'hitsTaken', 'bulletDamage', 'bulletDamageTaken', 'rocketHits', 'rocketHitsTaken', 'rocketPartsHit', 'rocketPartsHitTaken', 'rocketDamage', 'rocketDamageTaken',
                 'missileHits', 'missileHitsTaken', 'missilePartsHit', 'missilePartsHitTaken', 'missileDamage', 'missileDamageTaken', 'ramScore', 'ramScoreTaken', 'battleDamage', 'partsLostToAsteroids', 'HPremaining', 'accuracy', 'rocket_accuracy', 'waypointCount', 'waypointTime', 'waypointDeviation')
-try:
-    weights = list(float(w) for w in args.weights.split(','))
-except:
-    weights = []
-
-if args.show_weights:
-    field_width = max(len(f) for f in score_fields)
-    for w, f in zip(weights, score_fields):
-        print(f"{f}:{' ' * (field_width - len(f))} {w}")
-    sys.exit()
+waypoint_score_fields = np.array([f.startswith('waypoint') for f in score_fields])  # Waypoint scores are clamped to be non-negative per round.
 
 
 def CalculateAccuracy(hits, shots): return 100 * hits / shots if shots > 0 else 0
@@ -88,13 +89,6 @@ def CalculateAccuracy(hits, shots): return 100 * hits / shots if shots > 0 else
 def CalculateAvgHP(hp, heats): return hp / heats if heats > 0 else 0
 
 
-def cumsum(l):
-    v = 0
-    for i in l:
-        v += i
-        yield v
-
-
 def encode_names(log_lines: List[str]) -> Tuple[Dict[str, str], List[str]]:
     """ Encode the craft names in base64 to avoid issues with naming.
 
@@ -120,179 +114,597 @@ def encode_names(log_lines: List[str]) -> Tuple[Dict[str, str], List[str]]:
         if field == 'ALIVE':
             craft_names.add(entry)
     craft_names.update({json.dumps(name, ensure_ascii=False)[1:-1] for name in craft_names})  # Handle manually encoded DEADTEAMS.
-    craft_names = {cn: b64encode(cn.encode()) for cn in craft_names}
-    sorted_craft_names = list(sorted(craft_names, key=lambda k: len(k), reverse=True))  # Sort the craft names from longest to shortest to avoid accidentally replacing substrings.
-    for i in range(1, len(log_lines)):  # The first line doesn't contain craft names
-        for name in sorted_craft_names:
-            log_lines[i] = log_lines[i].replace(name, craft_names[name].decode())
-    encoded_craft_names = {v.decode(): k for k, v in craft_names.items()}
+    craft_names = {cn: b64encode(cn.encode()).decode() for cn in craft_names if len(cn) > 0}
+    if len(craft_names) > 0:
+        # Match all the craft names in a single pass over each line, trying them from longest to shortest to avoid accidentally replacing substrings.
+        craft_names_pattern = re.compile('|'.join(re.escape(name) for name in sorted(craft_names, key=lambda k: len(k), reverse=True)))
+        for i in range(len(log_lines)):
+            if 'BDArmory.BDACompetitionMode' in log_lines[i]:  # Other lines are ignored by the parser anyway.
+                log_lines[i] = craft_names_pattern.sub(lambda m: craft_names[m.group(0)], log_lines[i])
+    encoded_craft_names = {v: k for k, v in craft_names.items()}
     return encoded_craft_names, log_lines
 
 
-for tournamentNumber, tournamentDir in enumerate(tournamentDirs):
-    if tournamentNumber > 0 and not args.quiet:
-        print("")
-    tournamentData = {}
-    tournamentMetadata = {}
-    m = re.search('Tournament (\\d+)', str(tournamentDir))
-    if m is not None and len(m.groups()) > 0:
-        tournamentMetadata['ID'] = m.groups()[0]
-    tournamentMetadata['rounds'] = len([roundDir for roundDir in tournamentDir.iterdir() if roundDir.is_dir() and roundDir.name.startswith('Round')])
-    for round in sorted((roundDir for roundDir in tournamentDir.iterdir() if roundDir.is_dir()), key=naturalSortKey) if not args.current_dir else (tournamentDir,):
-        if not args.current_dir and len(round.name) == 0:
-            continue
-        tournamentData[round.name] = {}
-        logFiles = sorted(round.glob("[0-9]*.log"))
-        if len(logFiles) == 0:
-            del tournamentData[round.name]
-            continue
-        for heat in logFiles if args.N == None else logFiles[:args.N]:
-            with open(heat, "r", encoding="utf-8") as logFile:
-                log_lines = [line.strip() for line in logFile]
-            tournamentData[round.name][heat.name] = {'result': None, 'duration': 0, 'craft': {}}
-            encoded_craft_names, log_lines = encode_names(log_lines)
-            for line in log_lines:
-                if 'BDArmory.BDACompetitionMode' not in line:
-                    continue  # Ignore irrelevant lines
-                _, field = line.split(' ', 1)
-                if field.startswith('Dumping Results'):
-                    duration = float(field[field.find('(') + 4:field.find(')') - 1])
-                    timestamp = datetime.fromisoformat(field[field.find(' at ') + 4:])
-                    tournamentData[round.name][heat.name]['duration'] = duration
-                    tournamentMetadata['duration'] = (min(tournamentMetadata['duration'][0], timestamp), max(tournamentMetadata['duration'][1], timestamp + timedelta(seconds=duration))
-                                                      ) if 'duration' in tournamentMetadata else (timestamp, timestamp + timedelta(seconds=duration))
-                elif field.startswith('ALIVE:'):
-                    state, craft = field.split(':', 1)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]] = {'state': state}
-                elif field.startswith('DEAD:'):
-                    state, order, time, craft = field.split(':', 3)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]] = {'state': state, 'deathOrder': int(order), 'deathTime': float(time)}
-                elif field.startswith('MIA:'):
-                    state, craft = field.split(':', 1)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]] = {'state': state}
-                elif field.startswith('WHOSHOTWHOWITHGUNS:'):
-                    _, craft, shooters = field.split(':', 2)
-                    data = shooters.split(':')
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'hitsBy': {encoded_craft_names[player]: int(hits) for player, hits in zip(data[1::2], data[::2])}})
-                elif field.startswith('WHODAMAGEDWHOWITHGUNS:'):
-                    _, craft, shooters = field.split(':', 2)
-                    data = shooters.split(':')
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'bulletDamageBy': {encoded_craft_names[player]: float(damage) for player, damage in zip(data[1::2], data[::2])}})
-                elif field.startswith('WHOHITWHOWITHMISSILES:'):
-                    _, craft, shooters = field.split(':', 2)
-                    data = shooters.split(':')
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'missileHitsBy': {encoded_craft_names[player]: int(hits) for player, hits in zip(data[1::2], data[::2])}})
-                elif field.startswith('WHOPARTSHITWHOWITHMISSILES:'):
-                    _, craft, shooters = field.split(':', 2)
-                    data = shooters.split(':')
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'missilePartsHitBy': {encoded_craft_names[player]: int(hits) for player, hits in zip(data[1::2], data[::2])}})
-                elif field.startswith('WHODAMAGEDWHOWITHMISSILES:'):
-                    _, craft, shooters = field.split(':', 2)
-                    data = shooters.split(':')
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'missileDamageBy': {encoded_craft_names[player]: float(damage) for player, damage in zip(data[1::2], data[::2])}})
-                elif field.startswith('WHOHITWHOWITHROCKETS:'):
-                    _, craft, shooters = field.split(':', 2)
-                    data = shooters.split(':')
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'rocketHitsBy': {encoded_craft_names[player]: int(hits) for player, hits in zip(data[1::2], data[::2])}})
-                elif field.startswith('WHOPARTSHITWHOWITHROCKETS:'):
-                    _, craft, shooters = field.split(':', 2)
-                    data = shooters.split(':')
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'rocketPartsHitBy': {encoded_craft_names[player]: int(hits) for player, hits in zip(data[1::2], data[::2])}})
-                elif field.startswith('WHODAMAGEDWHOWITHROCKETS:'):
-                    _, craft, shooters = field.split(':', 2)
-                    data = shooters.split(':')
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'rocketDamageBy': {encoded_craft_names[player]: float(damage) for player, damage in zip(data[1::2], data[::2])}})
-                elif field.startswith('WHORAMMEDWHO:'):
-                    _, craft, rammers = field.split(':', 2)
-                    data = rammers.split(':')
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'rammedPartsLostBy': {encoded_craft_names[player]: int(partsLost) for player, partsLost in zip(data[1::2], data[::2])}})
-                elif field.startswith('WHODAMAGEDWHOWITHBATTLEDAMAGE'):
-                    _, craft, rammers = field.split(':', 2)
-                    data = rammers.split(':')
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'battleDamageBy': {encoded_craft_names[player]: float(damage) for player, damage in zip(data[1::2], data[::2])}})
-                elif field.startswith('CLEANKILLGUNS:'):
-                    _, craft, killer = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'cleanKillBy': encoded_craft_names[killer]})
-                elif field.startswith('CLEANKILLROCKETS:'):
-                    _, craft, killer = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'cleanRocketKillBy': encoded_craft_names[killer]})
-                elif field.startswith('CLEANKILLMISSILES:'):
-                    _, craft, killer = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'cleanMissileKillBy': encoded_craft_names[killer]})
-                elif field.startswith('CLEANKILLRAMMING:'):
-                    _, craft, killer = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'cleanRamKillBy': encoded_craft_names[killer]})
-                elif field.startswith('HEADSHOTGUNS:'):  # FIXME make head-shots separate from clean-kills
-                    _, craft, killer = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'cleanKillBy': encoded_craft_names[killer]})
-                elif field.startswith('HEADSHOTROCKETS:'):
-                    _, craft, killer = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'cleanRocketKillBy': encoded_craft_names[killer]})
-                elif field.startswith('HEADSHOTMISSILES:'):
-                    _, craft, killer = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'cleanMissileKillBy': encoded_craft_names[killer]})
-                elif field.startswith('HEADSHOTRAMMING:'):
-                    _, craft, killer = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'cleanRamKillBy': encoded_craft_names[killer]})
-                elif field.startswith('KILLSTEALGUNS:'):  # FIXME make kill-steals separate from clean-kills
-                    _, craft, killer = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'cleanKillBy': encoded_craft_names[killer]})
-                elif field.startswith('KILLSTEALROCKETS:'):
-                    _, craft, killer = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'cleanRocketKillBy': encoded_craft_names[killer]})
-                elif field.startswith('KILLSTEALMISSILES:'):
-                    _, craft, killer = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'cleanMissileKillBy': encoded_craft_names[killer]})
-                elif field.startswith('KILLSTEALRAMMING:'):
-                    _, craft, killer = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'cleanRamKillBy': encoded_craft_names[killer]})
-                elif field.startswith('GMKILL'):
-                    _, craft, reason = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'GMKillReason': reason})
-                elif field.startswith('PARTSLOSTTOASTEROIDS:'):
-                    _, craft, partsLost = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'partsLostToAsteroids': int(partsLost)})
-                elif field.startswith('HPLEFT:'):
-                    _, craft, hp = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'HPremaining': float(hp)})
-                elif field.startswith('ACCURACY:'):
-                    _, craft, accuracy, rocket_accuracy = field.split(':', 3)
-                    hits, shots = accuracy.split('/')
-                    rocket_strikes, rockets_fired = rocket_accuracy.split('/')
-                    accuracy = CalculateAccuracy(int(hits), int(shots))
-                    rocket_accuracy = CalculateAccuracy(int(rocket_strikes), int(rockets_fired))
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'accuracy': accuracy, 'hits': int(hits), 'shots': int(
-                        shots), 'rocket_accuracy': rocket_accuracy, 'rocket_strikes': int(rocket_strikes), 'rockets_fired': int(rockets_fired)})
-                elif field.startswith('RESULT:'):
-                    heat_result = field.split(':', 2)
-                    result_type = heat_result[1]
-                    if (len(heat_result) > 2):
-                        teams = json.loads(heat_result[2])
-                        if isinstance(teams, dict):  # Win, single team
-                            tournamentData[round.name][heat.name]['result'] = {'result': result_type, 'teams': {encoded_craft_names.get(teams['team'], teams['team']): ', '.join((encoded_craft_names[craft] for craft in teams['members']))}}
-                        elif isinstance(teams, list):  # Draw, multiple teams
-                            tournamentData[round.name][heat.name]['result'] = {'result': result_type, 'teams': {encoded_craft_names.get(team['team'], team['team']): ', '.join((encoded_craft_names[craft] for craft in team['members'])) for team in teams}}
-                    else:  # Mutual Annihilation
-                        tournamentData[round.name][heat.name]['result'] = {'result': result_type}
-                elif field.startswith('DEADTEAMS:'):
-                    dead_teams = json.loads(field.split(':', 1)[1])
-                    if len(dead_teams) > 0:
-                        tournamentData[round.name][heat.name]['result'].update({'dead teams': {encoded_craft_names.get(team['team'], team['team']): ', '.join((encoded_craft_names[craft] for craft in team['members'])) for team in dead_teams}})
-                # Ignore Tag mode for now.
-                elif field.startswith('WAYPOINTS:'):
-                    _, craft, waypoints_str = field.split(':', 2)
-                    tournamentData[round.name][heat.name]['craft'][encoded_craft_names[craft]].update({'waypoints': [waypoint.split(':') for waypoint in waypoints_str.split(';')]})  # List[Tuple[int, float, float]] = [(index, deviation, timestamp),]
-
-    if not args.no_files and len(tournamentData) > 0:
-        with open(tournamentDir / 'results.json', 'w', encoding="utf-8") as outFile:
-            json.dump(tournamentData, outFile, indent=2, ensure_ascii=False)
-
-    craftNames = sorted(list(set(craft for round in tournamentData.values() for heat in round.values() for craft in heat['craft'].keys())))
-    teamWins = Counter([team for round in tournamentData.values() for heat in round.values() if heat['result']['result'] == "Win" for team in heat['result']['teams']])
-    teamDraws = Counter([team for round in tournamentData.values() for heat in round.values() if heat['result']['result'] == "Draw" for team in heat['result']['teams']])
-    teamDeaths = Counter([team for round in tournamentData.values() for heat in round.values() if 'dead teams' in heat['result'] for team in heat['result']['dead teams']])
-    teams = {team: members for round in tournamentData.values() for heat in round.values() if 'teams' in heat['result'] for team, members in heat['result']['teams'].items()}
-    teams.update({team: members for round in tournamentData.values() for heat in round.values() if 'dead teams' in heat['result'] for team, members in heat['result']['dead teams'].items()})
+def team_name(heat: Heat, team: str, ids: Dict[str, int]) -> str:
+    return heat.names[ids[team]] if team in ids else team
+
+
+def parse_state(heat: Heat, payload: str, ids: Dict[str, int], state: str):
+    craft_data = CraftResult()
+    if state == 'DEAD':
+        order, time, craft = payload.split(':', 2)
+        craft_data.set('state', state)
+        craft_data.set('deathOrder', int(order))
+        craft_data.set('deathTime', float(time))
+    else:
+        craft = payload
+        craft_data.set('state', state)
+    heat.craft[ids[craft]] = craft_data
+
+
+def parse_attribution(heat: Heat, payload: str, ids: Dict[str, int], field: str):
+    craft, attackers = payload.split(':', 1)
+    data = attackers.split(':')
+    value_type = attribution_types[field]
+    heat.craft[ids[craft]].set_attribution(field, {ids[player]: value_type(value) for player, value in zip(data[1::2], data[::2])})
+
+
+def parse_kill(heat: Heat, payload: str, ids: Dict[str, int], field: str):
+    craft, killer = payload.split(':', 1)
+    heat.craft[ids[craft]].set(field, ids[killer])
+
+
+def parse_value(heat: Heat, payload: str, ids: Dict[str, int], field: str, value_type: type):
+    craft, value = payload.split(':', 1)
+    heat.craft[ids[craft]].set(field, value_type(value))
+
+
+def parse_accuracy(heat: Heat, payload: str, ids: Dict[str, int]):
+    craft, accuracy, rocket_accuracy = payload.split(':', 2)
+    hits, shots = accuracy.split('/')
+    rocket_strikes, rockets_fired = rocket_accuracy.split('/')
+    accuracy = CalculateAccuracy(int(hits), int(shots))
+    rocket_accuracy = CalculateAccuracy(int(rocket_strikes), int(rockets_fired))
+    craft_data = heat.craft[ids[craft]]
+    for field, value in (('accuracy', accuracy), ('hits', int(hits)), ('shots', int(shots)), ('rocket_accuracy', rocket_accuracy), ('rocket_strikes', int(rocket_strikes)), ('rockets_fired', int(rockets_fired))):
+        craft_data.set(field, value)
+
+
+def parse_result(heat: Heat, payload: str, ids: Dict[str, int]):
+    heat_result = payload.split(':', 1)
+    result_type = heat_result[0]
+    if (len(heat_result) > 1):
+        teams = json.loads(heat_result[1])
+        if isinstance(teams, dict):  # Win, single team
+            heat.result = Result(result_type, {team_name(heat, teams['team'], ids): ', '.join((heat.names[ids[craft]] for craft in teams['members']))})
+        elif isinstance(teams, list):  # Draw, multiple teams
+            heat.result = Result(result_type, {team_name(heat, team['team'], ids): ', '.join((heat.names[ids[craft]] for craft in team['members'])) for team in teams})
+    else:  # Mutual Annihilation
+        heat.result = Result(result_type)
+
+
+def parse_dead_teams(heat: Heat, payload: str, ids: Dict[str, int]):
+    dead_teams = json.loads(payload)
+    if len(dead_teams) > 0:
+        heat.result.dead_teams = {team_name(heat, team['team'], ids): ', '.join((heat.names[ids[craft]] for craft in team['members'])) for team in dead_teams}
+
+
+def parse_waypoints(heat: Heat, payload: str, ids: Dict[str, int]):
+    craft, waypoints_str = payload.split(':', 1)
+    heat.craft[ids[craft]].set('waypoints', [waypoint.split(':') for waypoint in waypoints_str.split(';')])  # List[Tuple[int, float, float]] = [(index, deviation, timestamp),]
+
+
+# Handlers for the competition log records, keyed by the record tag (the text before the first ':').
+# Each handler takes the heat record, the rest of the record after the tag and the mapping of encoded craft names to craft IDs.
+record_handlers = {
+    'ALIVE': partial(parse_state, state='ALIVE'),
+    'DEAD': partial(parse_state, state='DEAD'),
+    'MIA': partial(parse_state, state='MIA'),
+    'WHOSHOTWHOWITHGUNS': partial(parse_attribution, field='hitsBy'),
+    'WHODAMAGEDWHOWITHGUNS': partial(parse_attribution, field='bulletDamageBy'),
+    'WHOHITWHOWITHMISSILES': partial(parse_attribution, field='missileHitsBy'),
+    'WHOPARTSHITWHOWITHMISSILES': partial(parse_attribution, field='missilePartsHitBy'),
+    'WHODAMAGEDWHOWITHMISSILES': partial(parse_attribution, field='missileDamageBy'),
+    'WHOHITWHOWITHROCKETS': partial(parse_attribution, field='rocketHitsBy'),
+    'WHOPARTSHITWHOWITHROCKETS': partial(parse_attribution, field='rocketPartsHitBy'),
+    'WHODAMAGEDWHOWITHROCKETS': partial(parse_attribution, field='rocketDamageBy'),
+    'WHORAMMEDWHO': partial(parse_attribution, field='rammedPartsLostBy'),
+    'WHODAMAGEDWHOWITHBATTLEDAMAGE': partial(parse_attribution, field='battleDamageBy'),
+    'CLEANKILLGUNS': partial(parse_kill, field='cleanKillBy'),
+    'CLEANKILLROCKETS': partial(parse_kill, field='cleanRocketKillBy'),
+    'CLEANKILLMISSILES': partial(parse_kill, field='cleanMissileKillBy'),
+    'CLEANKILLRAMMING': partial(parse_kill, field='cleanRamKillBy'),
+    'HEADSHOTGUNS': partial(parse_kill, field='cleanKillBy'),  # FIXME make head-shots separate from clean-kills
+    'HEADSHOTROCKETS': partial(parse_kill, field='cleanRocketKillBy'),
+    'HEADSHOTMISSILES': partial(parse_kill, field='cleanMissileKillBy'),
+    'HEADSHOTRAMMING': partial(parse_kill, field='cleanRamKillBy'),
+    'KILLSTEALGUNS': partial(parse_kill, field='cleanKillBy'),  # FIXME make kill-steals separate from clean-kills
+    'KILLSTEALROCKETS': partial(parse_kill, field='cleanRocketKillBy'),
+    'KILLSTEALMISSILES': partial(parse_kill, field='cleanMissileKillBy'),
+    'KILLSTEALRAMMING': partial(parse_kill, field='cleanRamKillBy'),
+    'GMKILL': partial(parse_value, field='GMKillReason', value_type=str),
+    'PARTSLOSTTOASTEROIDS': partial(parse_value, field='partsLostToAsteroids', value_type=int),
+    'HPLEFT': partial(parse_value, field='HPremaining', value_type=float),
+    'ACCURACY': parse_accuracy,
+    'RESULT': parse_result,
+    'DEADTEAMS': parse_dead_teams,
+    'WAYPOINTS': parse_waypoints,
+    # Ignore Tag mode for now.
+}
+
+
+def parse_heat(log_lines: List[str]) -> Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]:
+    """ Parse the competition records of a heat.
+
+    Args:
+        log_lines (List[str]): The log lines of the heat.
+
+    Returns:
+        Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]: The heat record, the start and end times of the heat (if known) and the counts of unknown record tags.
+    """
+    span = None
+    unknown_records = Counter()
+    encoded_craft_names, log_lines = encode_names(log_lines)
+    heat = Heat(list(encoded_craft_names.values()))
+    ids = {encoded: craft_id for craft_id, encoded in enumerate(encoded_craft_names)}
+    for line in log_lines:
+        if 'BDArmory.BDACompetitionMode' not in line:
+            continue  # Ignore irrelevant lines
+        _, field = line.split(' ', 1)
+        tag, _, payload = field.partition(':')
+        handler = record_handlers.get(tag)
+        if handler is not None:
+            handler(heat, payload, ids)
+        elif field.startswith('Dumping Results'):
+            duration = float(field[field.find('(') + 4:field.find(')') - 1])
+            timestamp = datetime.fromisoformat(field[field.find(' at ') + 4:])
+            heat.duration = duration
+            span = (min(span[0], timestamp), max(span[1], timestamp + timedelta(seconds=duration))) if span is not None else (timestamp, timestamp + timedelta(seconds=duration))
+        elif tag.isupper() and len(payload) > 0:  # Looks like a record, but not one that we know about.
+            unknown_records[tag] += 1
+    return heat, span, unknown_records
+
+
+def parse_heat_log(heat: Path) -> Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]:
+    """ Read and parse a heat log file.
+
+    Args:
+        heat (Path): The heat log file.
+
+    Returns:
+        Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]: As for parse_heat.
+    """
+    try:
+        log_lines = [line.strip() for line in read_marked_lines(heat, [b'BDArmory.BDACompetitionMode'])]  # Only keep the competition records.
+        return parse_heat(log_lines)
+    except Exception as e:
+        raise RuntimeError(f"Failed to parse heat log {heat}: {e!r}") from e
+
+
+def parse_heat_logs(heats: List[Path], jobs: int = 1) -> Iterator[Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]]:
+    """ Parse heat log files, optionally using a pool of worker processes.
+
+    Args:
+        heats (List[Path]): The heat log files.
+        jobs (int): The number of worker processes to use (0 for one per CPU core, 1 to parse them in this process).
+
+    Yields:
+        Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]: The parsed heats, in the same order as the heat log files.
+    """
+    if jobs == 1 or len(heats) < 2:
+        yield from map(parse_heat_log, heats)
+    else:
+        workers = jobs if jobs > 0 else (os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(parse_heat_log, heats, chunksize=max(1, len(heats) // (4 * workers)))
+
+
+heat_cache_file = "heat_cache.json"
+
+
+def heat_log_signature(heat: Path) -> dict:
+    """ Identify the contents of a heat log file for the parse cache.
+
+    Args:
+        heat (Path): The heat log file.
+
+    Returns:
+        dict: The size, modification time and content hash of the file (of the member for an archived heat log).
+    """
+    size, mtime = log_stat(heat)
+    digest = hashlib.sha256()
+    with open_log(heat) if archive_member(heat) is not None else open(heat, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return {'size': size, 'mtime': mtime, 'hash': digest.hexdigest()}
+
+
+def load_heat_cache(tournamentDir: Path) -> Dict[str, dict]:
+    """ Load the cache of parsed heats for a tournament.
+
+    The cache is discarded if it was written by a different version of this script or is unreadable.
+
+    Args:
+        tournamentDir (Path): The tournament folder.
+
+    Returns:
+        Dict[str, dict]: The cache entries, keyed by the heat log path relative to the tournament folder.
+    """
+    try:
+        with open(tournamentDir / heat_cache_file, 'r', encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache['heats'] if cache.get('version') == VERSION else {}
+    except (OSError, ValueError, KeyError, AttributeError):
+        return {}
+
+
+def save_heat_cache(tournamentDir: Path, heats: Dict[str, dict]):
+    """ Save the cache of parsed heats for a tournament.
+
+    Args:
+        tournamentDir (Path): The tournament folder.
+        heats (Dict[str, dict]): The cache entries, keyed by the heat log path relative to the tournament folder.
+    """
+    with open(tournamentDir / heat_cache_file, 'w', encoding="utf-8") as f:
+        json.dump({'version': VERSION, 'heats': heats}, f, ensure_ascii=False)
+
+
+def heat_entry(parsed: Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]) -> dict:
+    """ Convert a parsed heat to JSON-compatible data for the cache and partial results files. """
+    heat, span, unknown_records = parsed
+    return {'heat': heat.to_dict(), 'span': [ts.isoformat() for ts in span] if span is not None else None, 'unknown': dict(unknown_records)}
+
+
+def parsed_heat(entry: dict) -> Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]:
+    """ Convert the data from heat_entry back to a parsed heat. """
+    span = tuple(datetime.fromisoformat(ts) for ts in entry['span']) if entry['span'] is not None else None
+    return Heat.from_dict(entry['heat']), span, Counter(entry['unknown'])
+
+
+def cached_heat(entry: Optional[dict], heat: Path) -> Optional[Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]]:
+    """ Get the parsed heat from a cache entry if the heat log hasn't changed since it was parsed.
+
+    A different size is a miss straight away, otherwise the content hash is compared every time, so that an edit that keeps the size and modification time is still noticed.
+    Hashing a log is still much quicker than parsing it. If only the modification time changed (e.g., the file was copied), the entry's modification time is updated.
+
+    Args:
+        entry (Optional[dict]): The cache entry for the heat log (if any).
+        heat (Path): The heat log file.
+
+    Returns:
+        Optional[Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]]: As for parse_heat, or None if the heat needs parsing.
+    """
+    if entry is None:
+        return None
+    size, mtime = log_stat(heat)
+    if entry['size'] != size or heat_log_signature(heat)['hash'] != entry['hash']:
+        return None
+    entry['mtime'] = mtime
+    return parsed_heat(entry)
+
+
+def heat_cache_entry(signature: dict, parsed: Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]) -> dict:
+    """ Create a cache entry for a parsed heat.
+
+    Args:
+        signature (dict): The heat log signature from before it was parsed.
+        parsed (Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]): The parsed heat.
+
+    Returns:
+        dict: The cache entry.
+    """
+    return dict(signature, **heat_entry(parsed))
+
+
+clean_kill_fields = ('cleanKillBy', 'cleanRocketKillBy', 'cleanMissileKillBy', 'cleanRamKillBy')
+hit_fields = ('hitsBy', 'rocketPartsHitBy', 'missilePartsHitBy', 'rammedPartsLostBy')
+interaction_fields = {  # Summary field: attribution field of the victim, in summary order. Fields ending in 'Taken' are credited to the victim, the others to the attacker.
+    'hitsTaken': 'hitsBy',
+    'bulletDamage': 'bulletDamageBy', 'bulletDamageTaken': 'bulletDamageBy',
+    'rocketHits': 'rocketHitsBy', 'rocketHitsTaken': 'rocketHitsBy',
+    'rocketPartsHit': 'rocketPartsHitBy', 'rocketPartsHitTaken': 'rocketPartsHitBy',
+    'rocketDamage': 'rocketDamageBy', 'rocketDamageTaken': 'rocketDamageBy',
+    'missileHits': 'missileHitsBy', 'missileHitsTaken': 'missileHitsBy',
+    'missilePartsHit': 'missilePartsHitBy', 'missilePartsHitTaken': 'missilePartsHitBy',
+    'missileDamage': 'missileDamageBy', 'missileDamageTaken': 'missileDamageBy',
+    'ramScore': 'rammedPartsLostBy', 'ramScoreTaken': 'rammedPartsLostBy',
+    'battleDamage': 'battleDamageBy', 'battleDamageTaken': 'battleDamageBy',
+}
+
+
+def heat_contributions(heat: Heat) -> Dict[str, Dict[str, list]]:
+    """ Walk a heat once, collecting each craft's contributions to the summary statistics.
+
+    The contributions are kept as lists of addends in the order that they'd be summed when scanning the heats, so that accumulating them gives bit-identical sums.
+
+    Args:
+        heat (Heat): The parsed heat.
+
+    Returns:
+        Dict[str, Dict[str, list]]: The addends for each statistic for each craft that contributed something in the heat.
+    """
+    contributions = {}
+    names = heat.names
+
+    def add(craft, field, value):
+        contributions.setdefault(craft, {}).setdefault(field, []).append(value)
+
+    if heat.result.result == "Win":
+        for craft in set(next(iter(heat.result.teams.values())).split(", ")):
+            add(craft, 'wins', 1)
+    craft_attributions = {craft_id: data.attribution_items() for craft_id, data in heat.craft.items()}  # Unpacked once per craft.
+    rammers = {player for attributions in craft_attributions.values() for player, _ in attributions.get('rammedPartsLostBy', ())}
+    for craft_id, data in heat.craft.items():
+        craft = names[craft_id]
+        attributions = craft_attributions[craft_id]
+        state = data.state
+        if state == 'ALIVE':
+            add(craft, 'survivedCount', 1)
+            if data.HPremaining is not None:
+                add(craft, 'HPremaining', data.HPremaining)
+        elif state == 'MIA':
+            add(craft, 'miaCount', 1)
+        killers = [getattr(data, field) for field in clean_kill_fields]
+        clean_killed = any(killer is not None for killer in killers)
+        was_hit = any(field in attributions for field in hit_fields)
+        if state == 'DEAD':
+            add(craft, 'deathCount', (
+                1,  # Total
+                *(1 if killer is not None else 0 for killer in killers),  # Bullets, Rockets, Missiles, Rams
+                1 if not clean_killed and was_hit else 0,  # Dirty kill
+                1 if not was_hit and craft_id not in rammers else 0,  # Suicide (died without being hit or ramming anyone).
+            ))
+        add(craft, 'deathOrder', data.deathOrder / len(heat.craft) if data.deathOrder is not None else 1)
+        add(craft, 'deathTime', data.deathTime if data.deathTime is not None else heat.duration)
+        for killer in set(killer for killer in killers if killer is not None):
+            add(names[killer], 'cleanKills', tuple(1 if k == killer else 0 for k in [killer] + killers))  # Total, Bullets, Rockets, Missiles, Rams
+        if state == 'DEAD' and not clean_killed:
+            for player in set(player for field in hit_fields if field in attributions for player, _ in attributions[field]):
+                add(names[player], 'assists', 1)
+        for field in ('hits', 'shots', 'rocket_strikes', 'rockets_fired', 'partsLostToAsteroids'):
+            value = getattr(data, field)
+            if value is not None:
+                add(craft, field, value)
+        for summary_field, field in interaction_fields.items():
+            if field not in attributions:
+                continue
+            if summary_field.endswith('Taken'):
+                add(craft, summary_field, sum(value for _, value in attributions[field]))
+            else:
+                for player, value in attributions[field]:
+                    if summary_field != 'battleDamage' or player != craft_id:
+                        add(names[player], summary_field, value)
+        if data.waypoints is not None:
+            waypoints = data.waypoints
+            deviations = [float(waypoint[1]) for waypoint in waypoints]
+            time = float(waypoints[-1][2]) - float(waypoints[0][2])
+            add(craft, 'waypointCount', len(waypoints))
+            add(craft, 'waypointTime', time)
+            for deviation in deviations:
+                add(craft, 'waypointDeviation', deviation)
+            add(craft, 'waypointHeats', (len(waypoints), time, sum(deviations)))
+    return contributions
+
+
+def accumulate(totals: Dict[str, dict], contributions: Dict[str, Dict[str, list]]):
+    """ Add a heat's contributions into a set of per-craft running totals.
+
+    Args:
+        totals (Dict[str, dict]): The running totals for each craft, updated in place.
+        contributions (Dict[str, Dict[str, list]]): The contributions from heat_contributions.
+    """
+    for craft, fields in contributions.items():
+        craft_totals = totals.setdefault(craft, {})
+        for field, addends in fields.items():
+            if field == 'waypointHeats':
+                craft_totals.setdefault(field, []).extend(addends)
+            elif isinstance(addends[0], tuple):
+                total = craft_totals.get(field, (0,) * len(addends[0]))
+                for addend in addends:
+                    total = tuple(t + a for t, a in zip(total, addend))
+                craft_totals[field] = total
+            else:
+                total = craft_totals.get(field, 0)
+                for addend in addends:
+                    total += addend
+                craft_totals[field] = total
+
+
+def summarise_totals(totals: dict, waypoints: bool = False) -> dict:
+    """ Convert a craft's accumulated totals into summary statistics.
+
+    Args:
+        totals (dict): The accumulated totals for the craft.
+        waypoints (bool): Include the waypoint statistics.
+
+    Returns:
+        dict: The summary statistics.
+    """
+    summary_data = {
+        'wins': totals.get('wins', 0),
+        'survivedCount': totals.get('survivedCount', 0),
+        'miaCount': totals.get('miaCount', 0),
+        'deathCount': totals.get('deathCount', (0,) * 7),
+        'deathOrder': totals.get('deathOrder', 0),
+        'deathTime': totals.get('deathTime', 0),
+        'cleanKills': totals.get('cleanKills', (0,) * 5),
+        'assists': totals.get('assists', 0),
+        'hits': totals.get('hits', 0),
+    }
+    summary_data.update({field: totals.get(field, 0) for field in interaction_fields})
+    summary_data.update({
+        'partsLostToAsteroids': totals.get('partsLostToAsteroids', 0),
+        'HPremaining': CalculateAvgHP(totals.get('HPremaining', 0), totals.get('survivedCount', 0)),
+        'accuracy': CalculateAccuracy(totals.get('hits', 0), totals.get('shots', 0)),
+        'rocket_accuracy': CalculateAccuracy(totals.get('rocket_strikes', 0), totals.get('rockets_fired', 0)),
+    })
+    if waypoints:
+        summary_data.update({
+            'waypointCount': totals.get('waypointCount', 0),
+            'waypointTime': totals.get('waypointTime', 0),
+            'waypointDeviation': totals.get('waypointDeviation', 0),
+        })
+    return summary_data
+
+
+def write_results(tournamentDir: Path, tournamentData: Dict[str, Dict[str, Heat]]):
+    """ Write the parsed tournament data to results.json and the compact results store (results.npz) used by the other scripts. """
+    results = results_dict(tournamentData)
+    with open(tournamentDir / 'results.json', 'w', encoding="utf-8") as outFile:
+        json.dump(results, outFile, indent=2, ensure_ascii=False)
+    write_results_store(store_path(tournamentDir / 'results.json'), results)  # Written after results.json so that it's at least as recent.
+
+
+def aggregate_heat(tournament_totals: Dict[str, dict], round_totals: Dict[str, dict], heat: Heat):
+    """ Add a heat's contributions to the tournament totals and the totals of its round.
+
+    Args:
+        tournament_totals (Dict[str, dict]): The per-craft tournament totals to update.
+        round_totals (Dict[str, dict]): The per-craft totals of the heat's round to update.
+        heat (Heat): The parsed heat.
+    """
+    contributions = heat_contributions(heat)
+    accumulate(round_totals, contributions)
+    accumulate(tournament_totals, contributions)
+
+
+def aggregate_tournament(tournamentData: Dict[str, Dict[str, Heat]]) -> Tuple[Dict[str, dict], Dict[str, Dict[str, dict]]]:
+    """ Aggregate the per-craft totals over the tournament and for each round in a single pass over the heats.
+
+    Args:
+        tournamentData (Dict[str, Dict[str, Heat]]): The parsed heats, keyed by round and heat name.
+
+    Returns:
+        Tuple[Dict[str, dict], Dict[str, Dict[str, dict]]]: The tournament totals for each craft and the totals for each craft in each round.
+    """
+    tournament_totals = {}
+    round_totals = {}
+    for roundName, round in tournamentData.items():
+        for heat in round.values():
+            aggregate_heat(tournament_totals, round_totals.setdefault(roundName, {}), heat)
+    return tournament_totals, round_totals
+
+
+def merge_duration(tournamentMetadata: dict, span: Optional[Tuple[datetime, datetime]]):
+    """ Extend the tournament duration to cover a heat's time span. """
+    if span is not None:
+        tournamentMetadata['duration'] = (min(tournamentMetadata['duration'][0], span[0]), max(tournamentMetadata['duration'][1], span[1])) if 'duration' in tournamentMetadata else span
+
+
+def weight_vector(weights: List[float]) -> np.ndarray:
+    """ The score weights as an array following score_fields, with any missing weights as 0. """
+    w = np.zeros(len(score_fields))
+    w[:min(len(weights), len(score_fields))] = weights[:len(score_fields)]
+    return w
+
+
+def summary_stats(summaries: Iterable[dict]) -> np.ndarray:
+    """ Arrange the summary data of some craft as a (craft x stat) array whose columns follow score_fields.
+
+    Tuple-valued fields (deathCount, cleanKills) contribute their totals and missing fields are 0.
+
+    Args:
+        summaries (Iterable[dict]): The summary data of each craft.
+
+    Returns:
+        np.ndarray: The stats array.
+    """
+    return np.array([[value[0] if isinstance(value, tuple) else value for value in (summary_data.get(f, 0) for f in score_fields)] for summary_data in summaries], dtype=float).reshape(-1, len(score_fields))
+
+
+def round_stats(per_round_summaries: List[List[dict]], rounds: int) -> np.ndarray:
+    """ Arrange the per-round summary data of some craft as a (craft x round x stat) array whose last axis follows score_fields.
+
+    Args:
+        per_round_summaries (List[List[dict]]): The summary data of each craft in each round.
+        rounds (int): The number of rounds.
+
+    Returns:
+        np.ndarray: The stats array.
+    """
+    return summary_stats(summary_data for summaries in per_round_summaries for summary_data in summaries).reshape(len(per_round_summaries), rounds, len(score_fields))
+
+
+def weighted_stats(stats: np.ndarray, w: np.ndarray, fields: np.ndarray) -> np.ndarray:
+    """ Sum the weighted stats over the selected fields.
+
+    The fields are added one at a time in score_fields order so that the results don't depend on how numpy would otherwise group the additions.
+
+    Args:
+        stats (np.ndarray): The stats array, with the last axis following score_fields.
+        w (np.ndarray): The score weights, or a (weights x field) array of several sets of weights.
+        fields (np.ndarray): Boolean mask of the fields to include.
+
+    Returns:
+        np.ndarray: The weighted sums, with the shape of stats without its last axis, followed by the number of sets of weights if w is 2D.
+    """
+    total = np.zeros(stats.shape[:-1] + w.shape[:-1])
+    for f in np.flatnonzero(fields):
+        total += np.multiply.outer(stats[..., f], w[..., f])
+    return total
+
+
+def waypoint_round_scores(per_round_stats: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """ The (craft x round) waypoint scores, clamped to be non-negative in each round. """
+    return np.maximum(weighted_stats(per_round_stats, w, waypoint_score_fields), 0)
+
+
+def tournament_scores(craft_stats: np.ndarray, waypoint_scores: np.ndarray, w: np.ndarray, rows: Optional[List[int]] = None) -> np.ndarray:
+    """ The tournament scores from the tournament stats and the per-round waypoint scores.
+
+    Args:
+        craft_stats (np.ndarray): The (craft x stat) tournament stats.
+        waypoint_scores (np.ndarray): The (craft x round) waypoint scores.
+        w (np.ndarray): The score weights, or a (weights x field) array of several sets of weights.
+        rows (Optional[List[int]]): The rows of waypoint_scores corresponding to those of craft_stats, if they differ.
+
+    Returns:
+        np.ndarray: The score of each craft, or a (craft x weights) array for several sets of weights.
+    """
+    waypoint_totals = np.cumsum(waypoint_scores, axis=1)[:, -1] if waypoint_scores.shape[1] > 0 else np.zeros(waypoint_scores.shape[:1] + waypoint_scores.shape[2:])  # cumsum adds in order, unlike sum.
+    return weighted_stats(craft_stats, w, ~waypoint_score_fields) + (waypoint_totals if rows is None else waypoint_totals[rows])
+
+
+def score_stats(craft_stats: np.ndarray, per_round_stats: np.ndarray, w: np.ndarray, rows: Optional[List[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """ Score the craft from their stats.
+
+    Waypoint scores are counted per round and clamped to be non-negative, the other stats are scored over the whole tournament.
+
+    Args:
+        craft_stats (np.ndarray): The (craft x stat) tournament stats.
+        per_round_stats (np.ndarray): The (craft x round x stat) per-round stats.
+        w (np.ndarray): The score weights.
+        rows (Optional[List[int]]): The rows of per_round_stats corresponding to those of craft_stats, if they differ (e.g., with averaged duplicates).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The tournament score of each craft in craft_stats and the (craft x round) scores of each craft in per_round_stats.
+    """
+    waypoint_scores = waypoint_round_scores(per_round_stats, w)
+    round_scores = weighted_stats(per_round_stats, w, ~waypoint_score_fields) + waypoint_scores
+    return tournament_scores(craft_stats, waypoint_scores, w, rows), round_scores
+
+
+def summarise_tournament(tournamentData: Dict[str, Dict[str, Heat]], tournamentMetadata: dict, craft_totals: Dict[str, dict], round_totals: Dict[str, Dict[str, dict]], weights: List[float], args: argparse.Namespace) -> Tuple[dict, Dict[str, List[float]], bool, Tuple[np.ndarray, np.ndarray, List[int]]]:
+    """ Build the tournament summary from the aggregated totals and compute the scores.
+
+    Args:
+        tournamentData (Dict[str, Dict[str, Heat]]): The parsed heats, keyed by round and heat name.
+        tournamentMetadata (dict): The tournament ID, duration and number of rounds.
+        craft_totals (Dict[str, dict]): The tournament totals for each craft.
+        round_totals (Dict[str, Dict[str, dict]]): The totals for each craft in each round.
+        weights (List[float]): The score weights.
+        args (argparse.Namespace): The command line options.
+
+    Returns:
+        Tuple[dict, Dict[str, List[float]], bool, Tuple[np.ndarray, np.ndarray, List[int]]]: The summary, the cumulative scores of each craft after each round, whether there was any waypoint data,
+            and the tournament stats, per-round stats and the rows of the per-round stats for the craft in the summary.
+    """
+    craftNames = sorted(list(set(craft for round in tournamentData.values() for heat in round.values() for craft in heat.craft_names())))
+    teamWins = Counter([team for round in tournamentData.values() for heat in round.values() if heat.result.result == "Win" for team in heat.result.teams])
+    teamDraws = Counter([team for round in tournamentData.values() for heat in round.values() if heat.result.result == "Draw" for team in heat.result.teams])
+    teamDeaths = Counter([team for round in tournamentData.values() for heat in round.values() if heat.result.dead_teams is not None for team in heat.result.dead_teams])
+    teams = {team: members for round in tournamentData.values() for heat in round.values() if heat.result.teams is not None for team, members in heat.result.teams.items()}
+    teams.update({team: members for round in tournamentData.values() for heat in round.values() if heat.result.dead_teams is not None for team, members in heat.result.dead_teams.items()})
     summary = {
         'meta': {
             'ID': tournamentMetadata.get('ID', 'unknown'),
@@ -300,61 +712,7 @@ for tournamentNumber, tournamentDir in enumerate(tournamentDirs):
             'rounds': tournamentMetadata.get('rounds', -1),
             'score weights': {f: w for f, w in zip(score_fields, weights)},
         },
-        'craft': {
-            craft: {
-                'wins': len([1 for round in tournamentData.values() for heat in round.values() if heat['result']['result'] == "Win" and craft in next(iter(heat['result']['teams'].values())).split(", ")]),
-                'survivedCount': len([1 for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'ALIVE']),
-                'miaCount': len([1 for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'MIA']),
-                'deathCount': (
-                    len([1 for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD']),  # Total
-                    len([1 for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD' and 'cleanKillBy' in heat['craft'][craft]]),  # Bullets
-                    len([1 for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD' and 'cleanRocketKillBy' in heat['craft'][craft]]),  # Rockets
-                    len([1 for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD' and 'cleanMissileKillBy' in heat['craft'][craft]]),  # Missiles
-                    len([1 for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD' and 'cleanRamKillBy' in heat['craft'][craft]]),  # Rams
-                    len([1 for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD' and not any(field in heat['craft'][craft]
-                        # Dirty kill
-                        for field in ('cleanKillBy', 'cleanRocketKillBy', 'cleanMissileKillBy', 'cleanRamKillBy')) and any(field in heat['craft'][craft] for field in ('hitsBy', 'rocketPartsHitBy', 'missilePartsHitBy', 'rammedPartsLostBy'))]),
-                    len([1 for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD' and not any(field in heat['craft'][craft] for field in ('hitsBy', 'rocketPartsHitBy',
-                        'missilePartsHitBy', 'rammedPartsLostBy')) and not any('rammedPartsLostBy' in data and craft in data['rammedPartsLostBy'] for data in heat['craft'].values())]),  # Suicide (died without being hit or ramming anyone).
-                ),
-                'deathOrder': sum([heat['craft'][craft]['deathOrder'] / len(heat['craft']) if 'deathOrder' in heat['craft'][craft] else 1 for round in tournamentData.values() for heat in round.values() if craft in heat['craft']]),
-                'deathTime': sum([heat['craft'][craft]['deathTime'] if 'deathTime' in heat['craft'][craft] else heat['duration'] for round in tournamentData.values() for heat in round.values() if craft in heat['craft']]),
-                'cleanKills': (
-                    len([1 for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() if any((field in data and data[field] == craft)
-                        for field in ('cleanKillBy', 'cleanRocketKillBy', 'cleanMissileKillBy', 'cleanRamKillBy'))]),  # Total
-                    len([1 for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() if 'cleanKillBy' in data and data['cleanKillBy'] == craft]),  # Bullets
-                    len([1 for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() if 'cleanRocketKillBy' in data and data['cleanRocketKillBy'] == craft]),  # Rockets
-                    len([1 for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() if 'cleanMissileKillBy' in data and data['cleanMissileKillBy'] == craft]),  # Missiles
-                    len([1 for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() if 'cleanRamKillBy' in data and data['cleanRamKillBy'] == craft]),  # Rams
-                ),
-                'assists': len([1 for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() if data['state'] == 'DEAD' and any(field in data and craft in data[field] for field in ('hitsBy', 'rocketPartsHitBy', 'missilePartsHitBy', 'rammedPartsLostBy')) and not any((field in data) for field in ('cleanKillBy', 'cleanRocketKillBy', 'cleanMissileKillBy', 'cleanRamKillBy'))]),
-                'hits': sum([heat['craft'][craft]['hits'] for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'hits' in heat['craft'][craft]]),
-                'hitsTaken': sum([sum(heat['craft'][craft]['hitsBy'].values()) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'hitsBy' in heat['craft'][craft]]),
-                'bulletDamage': sum([data[field][craft] for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() for field in ('bulletDamageBy',) if field in data and craft in data[field]]),
-                'bulletDamageTaken': sum([sum(heat['craft'][craft]['bulletDamageBy'].values()) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'bulletDamageBy' in heat['craft'][craft]]),
-                'rocketHits': sum([data[field][craft] for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() for field in ('rocketHitsBy',) if field in data and craft in data[field]]),
-                'rocketHitsTaken': sum([sum(heat['craft'][craft]['rocketHitsBy'].values()) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'rocketHitsBy' in heat['craft'][craft]]),
-                'rocketPartsHit': sum([data[field][craft] for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() for field in ('rocketPartsHitBy',) if field in data and craft in data[field]]),
-                'rocketPartsHitTaken': sum([sum(heat['craft'][craft]['rocketPartsHitBy'].values()) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'rocketPartsHitBy' in heat['craft'][craft]]),
-                'rocketDamage': sum([data[field][craft] for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() for field in ('rocketDamageBy',) if field in data and craft in data[field]]),
-                'rocketDamageTaken': sum([sum(heat['craft'][craft]['rocketDamageBy'].values()) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'rocketDamageBy' in heat['craft'][craft]]),
-                'missileHits': sum([data[field][craft] for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() for field in ('missileHitsBy',) if field in data and craft in data[field]]),
-                'missileHitsTaken': sum([sum(heat['craft'][craft]['missileHitsBy'].values()) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'missileHitsBy' in heat['craft'][craft]]),
-                'missilePartsHit': sum([data[field][craft] for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() for field in ('missilePartsHitBy',) if field in data and craft in data[field]]),
-                'missilePartsHitTaken': sum([sum(heat['craft'][craft]['missilePartsHitBy'].values()) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'missilePartsHitBy' in heat['craft'][craft]]),
-                'missileDamage': sum([data[field][craft] for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() for field in ('missileDamageBy',) if field in data and craft in data[field]]),
-                'missileDamageTaken': sum([sum(heat['craft'][craft]['missileDamageBy'].values()) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'missileDamageBy' in heat['craft'][craft]]),
-                'ramScore': sum([data[field][craft] for round in tournamentData.values() for heat in round.values() for data in heat['craft'].values() for field in ('rammedPartsLostBy',) if field in data and craft in data[field]]),
-                'ramScoreTaken': sum([sum(heat['craft'][craft]['rammedPartsLostBy'].values()) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'rammedPartsLostBy' in heat['craft'][craft]]),
-                'battleDamage': sum([data[field][craft] for round in tournamentData.values() for heat in round.values() for player, data in heat['craft'].items() if player != craft for field in ('battleDamageBy',) if field in data and craft in data[field]]),
-                'battleDamageTaken': sum([sum(heat['craft'][craft]['battleDamageBy'].values()) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'battleDamageBy' in heat['craft'][craft]]),
-                'partsLostToAsteroids': sum([heat['craft'][craft]['partsLostToAsteroids'] for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'partsLostToAsteroids' in heat['craft'][craft]]),
-                'HPremaining': CalculateAvgHP(sum([heat['craft'][craft]['HPremaining'] for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'HPremaining' in heat['craft'][craft] and heat['craft'][craft]['state'] == 'ALIVE']), len([1 for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'ALIVE'])),
-                'accuracy': CalculateAccuracy(sum([heat['craft'][craft]['hits'] for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'hits' in heat['craft'][craft]]), sum([heat['craft'][craft]['shots'] for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'shots' in heat['craft'][craft]])),
-                'rocket_accuracy': CalculateAccuracy(sum([heat['craft'][craft]['rocket_strikes'] for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'rocket_strikes' in heat['craft'][craft]]), sum([heat['craft'][craft]['rockets_fired'] for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'rockets_fired' in heat['craft'][craft]])),
-            }
-            for craft in craftNames
-        },
+        'craft': {craft: summarise_totals(craft_totals.get(craft, {})) for craft in craftNames},
         'team results': {
             'wins': teamWins,
             'draws': teamDraws,
@@ -386,233 +744,762 @@ for tournamentNumber, tournamentDir in enumerate(tournamentDirs):
         })
 
     per_round_summary = {  # Compute this here, since we need the per-round waypoint info to avoid negative scores.
-        craft: [
-            {
-                'wins': len([1 for heat in round.values() if heat['result']['result'] == "Win" and craft in next(iter(heat['result']['teams'].values())).split(", ")]),
-                'survivedCount': len([1 for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'ALIVE']),
-                'miaCount': len([1 for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'MIA']),
-                'deathCount': (
-                    len([1 for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD']),  # Total
-                    len([1 for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD' and 'cleanKillBy' in heat['craft'][craft]]),  # Bullets
-                    len([1 for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD' and 'cleanRocketKillBy' in heat['craft'][craft]]),  # Rockets
-                    len([1 for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD' and 'cleanMissileKillBy' in heat['craft'][craft]]),  # Missiles
-                    len([1 for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD' and 'cleanRamKillBy' in heat['craft'][craft]]),  # Rams
-                    len([1 for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD' and not any(field in heat['craft'][craft] for field in ('cleanKillBy', 'cleanRocketKillBy',
-                        'cleanMissileKillBy', 'cleanRamKillBy')) and any(field in heat['craft'][craft] for field in ('hitsBy', 'rocketPartsHitBy', 'missilePartsHitBy', 'rammedPartsLostBy'))]),  # Dirty kill
-                    len([1 for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'DEAD' and not any(field in heat['craft'][craft] for field in ('hitsBy', 'rocketPartsHitBy', 'missilePartsHitBy',
-                        'rammedPartsLostBy')) and not any('rammedPartsLostBy' in data and craft in data['rammedPartsLostBy'] for data in heat['craft'].values())]),  # Suicide (died without being hit or ramming anyone).
-                ),
-                'deathOrder': sum([heat['craft'][craft]['deathOrder'] / len(heat['craft']) if 'deathOrder' in heat['craft'][craft] else 1 for heat in round.values() if craft in heat['craft']]),
-                'deathTime': sum([heat['craft'][craft]['deathTime'] if 'deathTime' in heat['craft'][craft] else heat['duration'] for heat in round.values() if craft in heat['craft']]),
-                'cleanKills': (
-                    len([1 for heat in round.values() for data in heat['craft'].values() if any((field in data and data[field] == craft) for field in ('cleanKillBy', 'cleanRocketKillBy', 'cleanMissileKillBy', 'cleanRamKillBy'))]),  # Total
-                    len([1 for heat in round.values() for data in heat['craft'].values() if 'cleanKillBy' in data and data['cleanKillBy'] == craft]),  # Bullets
-                    len([1 for heat in round.values() for data in heat['craft'].values() if 'cleanRocketKillBy' in data and data['cleanRocketKillBy'] == craft]),  # Rockets
-                    len([1 for heat in round.values() for data in heat['craft'].values() if 'cleanMissileKillBy' in data and data['cleanMissileKillBy'] == craft]),  # Missiles
-                    len([1 for heat in round.values() for data in heat['craft'].values() if 'cleanRamKillBy' in data and data['cleanRamKillBy'] == craft]),  # Rams
-                ),
-                'assists': len([1 for heat in round.values() for data in heat['craft'].values() if data['state'] == 'DEAD' and any(field in data and craft in data[field] for field in ('hitsBy', 'rocketPartsHitBy', 'missilePartsHitBy', 'rammedPartsLostBy')) and not any((field in data) for field in ('cleanKillBy', 'cleanRocketKillBy', 'cleanMissileKillBy', 'cleanRamKillBy'))]),
-                'hits': sum([heat['craft'][craft]['hits'] for heat in round.values() if craft in heat['craft'] and 'hits' in heat['craft'][craft]]),
-                'hitsTaken': sum([sum(heat['craft'][craft]['hitsBy'].values()) for heat in round.values() if craft in heat['craft'] and 'hitsBy' in heat['craft'][craft]]),
-                'bulletDamage': sum([data[field][craft] for heat in round.values() for data in heat['craft'].values() for field in ('bulletDamageBy',) if field in data and craft in data[field]]),
-                'bulletDamageTaken': sum([sum(heat['craft'][craft]['bulletDamageBy'].values()) for heat in round.values() if craft in heat['craft'] and 'bulletDamageBy' in heat['craft'][craft]]),
-                'rocketHits': sum([data[field][craft] for heat in round.values() for data in heat['craft'].values() for field in ('rocketHitsBy',) if field in data and craft in data[field]]),
-                'rocketHitsTaken': sum([sum(heat['craft'][craft]['rocketHitsBy'].values()) for heat in round.values() if craft in heat['craft'] and 'rocketHitsBy' in heat['craft'][craft]]),
-                'rocketPartsHit': sum([data[field][craft] for heat in round.values() for data in heat['craft'].values() for field in ('rocketPartsHitBy',) if field in data and craft in data[field]]),
-                'rocketPartsHitTaken': sum([sum(heat['craft'][craft]['rocketPartsHitBy'].values()) for heat in round.values() if craft in heat['craft'] and 'rocketPartsHitBy' in heat['craft'][craft]]),
-                'rocketDamage': sum([data[field][craft] for heat in round.values() for data in heat['craft'].values() for field in ('rocketDamageBy',) if field in data and craft in data[field]]),
-                'rocketDamageTaken': sum([sum(heat['craft'][craft]['rocketDamageBy'].values()) for heat in round.values() if craft in heat['craft'] and 'rocketDamageBy' in heat['craft'][craft]]),
-                'missileHits': sum([data[field][craft] for heat in round.values() for data in heat['craft'].values() for field in ('missileHitsBy',) if field in data and craft in data[field]]),
-                'missileHitsTaken': sum([sum(heat['craft'][craft]['missileHitsBy'].values()) for heat in round.values() if craft in heat['craft'] and 'missileHitsBy' in heat['craft'][craft]]),
-                'missilePartsHit': sum([data[field][craft] for heat in round.values() for data in heat['craft'].values() for field in ('missilePartsHitBy',) if field in data and craft in data[field]]),
-                'missilePartsHitTaken': sum([sum(heat['craft'][craft]['missilePartsHitBy'].values()) for heat in round.values() if craft in heat['craft'] and 'missilePartsHitBy' in heat['craft'][craft]]),
-                'missileDamage': sum([data[field][craft] for heat in round.values() for data in heat['craft'].values() for field in ('missileDamageBy',) if field in data and craft in data[field]]),
-                'missileDamageTaken': sum([sum(heat['craft'][craft]['missileDamageBy'].values()) for heat in round.values() if craft in heat['craft'] and 'missileDamageBy' in heat['craft'][craft]]),
-                'ramScore': sum([data[field][craft] for heat in round.values() for data in heat['craft'].values() for field in ('rammedPartsLostBy',) if field in data and craft in data[field]]),
-                'ramScoreTaken': sum([sum(heat['craft'][craft]['rammedPartsLostBy'].values()) for heat in round.values() if craft in heat['craft'] and 'rammedPartsLostBy' in heat['craft'][craft]]),
-                'battleDamage': sum([data[field][craft] for heat in round.values() for player, data in heat['craft'].items() if player != craft for field in ('battleDamageBy',) if field in data and craft in data[field]]),
-                'battleDamageTaken': sum([sum(heat['craft'][craft]['battleDamageBy'].values()) for heat in round.values() if craft in heat['craft'] and 'battleDamageBy' in heat['craft'][craft]]),
-                'partsLostToAsteroids': sum([heat['craft'][craft]['partsLostToAsteroids'] for heat in round.values() if craft in heat['craft'] and 'partsLostToAsteroids' in heat['craft'][craft]]),
-                'HPremaining': CalculateAvgHP(sum([heat['craft'][craft]['HPremaining'] for heat in round.values() if craft in heat['craft'] and 'HPremaining' in heat['craft'][craft] and heat['craft'][craft]['state'] == 'ALIVE']), len([1 for heat in round.values() if craft in heat['craft'] and heat['craft'][craft]['state'] == 'ALIVE'])),
-                'accuracy': CalculateAccuracy(sum([heat['craft'][craft]['hits'] for heat in round.values() if craft in heat['craft'] and 'hits' in heat['craft'][craft]]), sum([heat['craft'][craft]['shots'] for heat in round.values() if craft in heat['craft'] and 'shots' in heat['craft'][craft]])),
-                'rocket_accuracy': CalculateAccuracy(sum([heat['craft'][craft]['rocket_strikes'] for heat in round.values() if craft in heat['craft'] and 'rocket_strikes' in heat['craft'][craft]]), sum([heat['craft'][craft]['rockets_fired'] for heat in round.values() if craft in heat['craft'] and 'rockets_fired' in heat['craft'][craft]])),
-                'waypointCount': sum(len(heat['craft'][craft]['waypoints']) for heat in round.values() if craft in heat['craft'] and 'waypoints' in heat['craft'][craft]),
-                'waypointTime': sum(float(heat['craft'][craft]['waypoints'][-1][2]) - float(heat['craft'][craft]['waypoints'][0][2]) for heat in round.values() if craft in heat['craft'] and 'waypoints' in heat['craft'][craft]),
-                'waypointDeviation': sum(float(waypoint[1]) for heat in round.values() if craft in heat['craft'] and 'waypoints' in heat['craft'][craft] for waypoint in heat['craft'][craft]['waypoints']),
-            } for round in tournamentData.values()
-        ] for craft in craftNames
+        craft: [summarise_totals(round_totals.get(round, {}).get(craft, {}), waypoints=True) for round in tournamentData] for craft in craftNames
     }
 
     hasWaypoints = False
-    if any('waypoints' in heat['craft'][craft].keys() for round in tournamentData.values() for heat in round.values() for craft in craftNames if craft in heat['craft']):
+    if any('waypointHeats' in craft_totals.get(craft, {}) for craft in craftNames):
         hasWaypoints = True
         for craft in craftNames:
-            WPbestCount = max((len(heat['craft'][craft]['waypoints']) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'waypoints' in heat['craft'][craft]), default=0)
+            waypoint_heats = craft_totals[craft].get('waypointHeats', [])  # [(count, time, deviation),] for each heat.
+            WPbestCount = max((count for count, _, _ in waypoint_heats), default=0)
             summary['craft'][craft].update({
-                'waypointCount': sum(len(heat['craft'][craft]['waypoints']) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'waypoints' in heat['craft'][craft]),
-                'waypointTime': sum((float(heat['craft'][craft]['waypoints'][-1][2]) - float(heat['craft'][craft]['waypoints'][0][2])) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'waypoints' in heat['craft'][craft]),
-                'waypointDeviation': sum(sum(float(waypoint[1]) for waypoint in heat['craft'][craft]['waypoints']) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'waypoints' in heat['craft'][craft]),
+                'waypointCount': craft_totals[craft].get('waypointCount', 0),
+                'waypointTime': craft_totals[craft].get('waypointTime', 0),
+                'waypointDeviation': sum(deviation for _, _, deviation in waypoint_heats),
                 'waypointBestCount': WPbestCount,
-                'waypointBestTime': min(((float(heat['craft'][craft]['waypoints'][-1][2]) - float(heat['craft'][craft]['waypoints'][0][2])) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'waypoints' in heat['craft'][craft] and len(heat['craft'][craft]['waypoints']) == WPbestCount), default=0),
-                'waypointBestDeviation': min((sum(float(waypoint[1]) for waypoint in heat['craft'][craft]['waypoints']) for round in tournamentData.values() for heat in round.values() if craft in heat['craft'] and 'waypoints' in heat['craft'][craft] and len(heat['craft'][craft]['waypoints']) == WPbestCount), default=0),
-                })
+                'waypointBestTime': min((time for count, time, _ in waypoint_heats if count == WPbestCount), default=0),
+                'waypointBestDeviation': min((deviation for count, _, deviation in waypoint_heats if count == WPbestCount), default=0),
+            })
 
+    stats = (summary_stats(summary['craft'].values()), round_stats(list(per_round_summary.values()), len(tournamentData)), [craftNames.index(craft) for craft in summary['craft']])
+    cumulative_scores = {}
     if args.score:
-        for craftName, summary_data in summary['craft'].items():
-            # Treat waypoints separately so we can avoid non-negative scores for waypoints.
-            score = sum(w * summary_data[f][0] if isinstance(summary_data[f], tuple) else w * summary_data[f] for w, f in zip(weights, score_fields) if f in summary_data and not f.startswith('waypoint'))
-            waypoint_data = per_round_summary[craftName]
-            score += sum(max(0, sum(
-                            w * waypoint_data[round][f][0] if isinstance(waypoint_data[round][f], tuple) else w * waypoint_data[round][f] for w, f in zip(weights, score_fields) if f.startswith('waypoint')
-                        )) for round in range(len(waypoint_data)))
+        w = weight_vector(weights)
+        scores, round_scores = score_stats(*stats[:2], w, stats[2])
+        if args.zero_lowest_score and len(scores) > 0:
+            scores -= scores.min()
+        for summary_data, score in zip(summary['craft'].values(), scores.tolist()):
             summary_data.update({'score': score})
-        if args.zero_lowest_score and len(summary['craft']) > 0:
-            offset = min(summary_data['score'] for summary_data in summary['craft'].values())
-            for summary_data in summary['craft'].values():
-                summary_data['score'] -= offset
+        if not args.no_cumulative:  # Per round scores.
+            cumulative_scores = dict(zip(craftNames, np.cumsum(round_scores, axis=1).tolist()))
 
-    if not args.no_files and len(summary['craft']) > 0:
-        with open(tournamentDir / 'summary.json', 'w', encoding="utf-8") as outFile:
-            json.dump(summary, outFile, indent=2, ensure_ascii=False)
+    return summary, cumulative_scores, hasWaypoints, stats
 
-    if len(summary['craft']) > 0:
-        if not args.no_files:
-            headers = (["score", ] if args.score else []) + [k for k in next(iter(summary['craft'].values())).keys() if k not in ('score',)]
-            csv_summary = ["craft," + ",".join(
-                ",".join(('deathCount', 'dcB', 'dcR', 'dcM', 'dcR', 'dcA', 'dcS')) if k == 'deathCount' else
-                ",".join(('cleanKills', 'ckB', 'ckR', 'ckM', 'ckR')) if k == 'cleanKills' else
-                k for k in headers), ]
-            for craft, score in sorted(summary['craft'].items(), key=lambda i: i[1]['score'], reverse=True):
-                csv_summary.append(craft + "," + ",".join(
-                    ",".join(str(int(100 * sf) / 100) for sf in score[h]) if isinstance(score[h], tuple)
-                    else ",".join(str(int(100 * sf) / 100) for sf in score[h].values()) if isinstance(score[h], dict)
-                    else str(int(100 * score[h]) / 100)
-                for h in headers))
-            # Write main summary results to the summary.csv file.
-            with open(tournamentDir / 'summary.csv', 'w', encoding="utf-8") as outFile:
-                outFile.write("\n".join(csv_summary))
-
-        teamNames = sorted(list(set([team for result_type in summary['team results'].values() for team in result_type])))
-        default_team_names = [chr(k) for k in range(ord('A'), ord('A') + len(summary['craft']))]
-
-        if args.score and not args.no_cumulative:  # Per round scores.
-            per_round_scores = {
-                craft: [
-                    sum(
-                        w * scores[round][f][0] if isinstance(scores[round][f], tuple) else w * scores[round][f] for w, f in zip(weights, score_fields) if not f.startswith('waypoint')
-                    )
-                    + max(0, sum(
-                        w * scores[round][f][0] if isinstance(scores[round][f], tuple) else w * scores[round][f] for w, f in zip(weights, score_fields) if f.startswith('waypoint')  # Compute waypoint score separately to avoid non-negative values.
-                    ))
-                    for round in range(len(scores))
-                ] for craft, scores in per_round_summary.items()
+
+def write_file_atomically(path: Path, contents: str):
+    """ Write a file via a temporary file in the same folder so that readers never see a partially written file. """
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding="utf-8") as outFile:
+        outFile.write(contents)
+    os.replace(tmp_path, path)
+
+
+def write_summary_files(tournamentDir: Path, summary: dict, cumulative_scores: Dict[str, List[float]], args: argparse.Namespace):
+    """ Write the summary to the summary.json and summary.csv files in the tournament folder.
+
+    Args:
+        tournamentDir (Path): The tournament folder.
+        summary (dict): The tournament summary.
+        cumulative_scores (Dict[str, List[float]]): The cumulative scores of each craft after each round.
+        args (argparse.Namespace): The command line options.
+    """
+    write_file_atomically(tournamentDir / 'summary.json', json.dumps(summary, indent=2, ensure_ascii=False))
+
+    headers = (["score", ] if args.score else []) + [k for k in next(iter(summary['craft'].values())).keys() if k not in ('score',)]
+    csv_summary = ["craft," + ",".join(
+        ",".join(('deathCount', 'dcB', 'dcR', 'dcM', 'dcR', 'dcA', 'dcS')) if k == 'deathCount' else
+        ",".join(('cleanKills', 'ckB', 'ckR', 'ckM', 'ckR')) if k == 'cleanKills' else
+        k for k in headers), ]
+    for craft, score in sorted(summary['craft'].items(), key=lambda i: i[1]['score'], reverse=True):
+        csv_summary.append(craft + "," + ",".join(
+            ",".join(str(int(100 * sf) / 100) for sf in score[h]) if isinstance(score[h], tuple)
+            else ",".join(str(int(100 * sf) / 100) for sf in score[h].values()) if isinstance(score[h], dict)
+            else str(int(100 * score[h]) / 100)
+        for h in headers))
+
+    # Teams results.
+    teamWins, teamDraws, teamDeaths = (summary['team results'][result_type] for result_type in ('wins', 'draws', 'deaths'))
+    teamNames = sorted(list(set([team for result_type in summary['team results'].values() for team in result_type])))
+    csv_teams = ['\n\nTeam,Wins,Draws,Deaths,Vessels']
+    for team in sorted(teamNames, key=lambda team: teamWins[team], reverse=True):
+        csv_teams.append('\n' + ','.join([str(v) for v in (team, teamWins[team], teamDraws[team], teamDeaths[team], summary['teams'][team].replace(", ", ","))]))
+
+    # Per round cumulative score results.
+    if args.score and not args.no_cumulative:
+        csv_teams.append(f"\n\nName \\ Cumulative Score Per Round," + ",".join(f"{r:>7d}" for r in range(len(next(iter(cumulative_scores.values()))))))
+        for craft in sorted(cumulative_scores, key=lambda craft: summary['craft'][craft]['score'], reverse=True):
+            csv_teams.append(f"\n{craft}," + ",".join(f"{s:.2f}" for s in cumulative_scores[craft]))
+
+    write_file_atomically(tournamentDir / 'summary.csv', "\n".join(csv_summary) + ''.join(csv_teams))
+
+
+def print_summary(summary: dict, tournamentMetadata: dict, cumulative_scores: Dict[str, List[float]], hasWaypoints: bool, args: argparse.Namespace):
+    """ Write the summary to the console.
+
+    Args:
+        summary (dict): The tournament summary.
+        tournamentMetadata (dict): The tournament ID, duration and number of rounds.
+        cumulative_scores (Dict[str, List[float]]): The cumulative scores of each craft after each round.
+        hasWaypoints (bool): Whether to show the waypoint columns.
+        args (argparse.Namespace): The command line options.
+    """
+    teamWins, teamDraws, teamDeaths = (summary['team results'][result_type] for result_type in ('wins', 'draws', 'deaths'))
+    teamNames = sorted(list(set([team for result_type in summary['team results'].values() for team in result_type])))
+    default_team_names = [chr(k) for k in range(ord('A'), ord('A') + len(summary['craft']))]
+
+    strings = []
+    if not args.no_header and not args.current_dir and 'duration' in tournamentMetadata:
+        strings.append(
+            f"Tournament {tournamentMetadata.get('ID', '???')} of duration {tournamentMetadata['duration'][1] - tournamentMetadata['duration'][0]} with {tournamentMetadata['rounds']} rounds starting at {tournamentMetadata['duration'][0]}"
+        )  # Python <3.12 has issues with line breaks in f-strings.
+    headers = [
+        'Name', 'Wins', 'Survive', 'MIA', 'Deaths (BRMRAS)', 'D.Order', 'D.Time',
+        'Kills (BRMR)', 'Assists', 'Hits', 'Damage', 'DmgTaken',
+        'RocHits', 'RocParts', 'RocDmg', 'HitByRoc',
+        'MisHits', 'MisParts', 'MisDmg', 'HitByMis',
+        'Ram', 'BD dealt', 'BD taken', 'Ast.',
+        'Acc%', 'RktAcc%', 'HP%', 'Dmg/Hit', 'Hits/Sp', 'Dmg/Sp'
+    ] if not args.scores_only else ['Name']
+    if hasWaypoints and not args.scores_only:
+        headers.extend(['WPcount', 'WPtime', 'WPdev', 'WPbestC', 'WPbestT', 'WPbestD'])
+    if args.score:
+        headers.insert(1, 'Score')
+    summary_strings = {'header': {field: field for field in headers}}
+    for craft in sorted(summary['craft']):
+        tmp = summary['craft'][craft]
+        spawns = tmp['survivedCount'] + tmp['deathCount'][0]
+        summary_strings.update({
+            craft: {
+                'Name': craft,
+                'Wins': f"{tmp['wins']:.0f}",
+                'Survive': f"{tmp['survivedCount']:.0f}",
+                'MIA': f"{tmp['miaCount']:.0f}",
+                'Deaths (BRMRAS)': f"{tmp['deathCount'][0]:.0f} ({' '.join(f'{s:.0f}' for s in tmp['deathCount'][1:])})",
+                'D.Order': f"{tmp['deathOrder']:.3f}",
+                'D.Time': f"{tmp['deathTime']:.1f}",
+                'Kills (BRMR)': f"{tmp['cleanKills'][0]:.0f} ({' '.join(f'{s:.0f}' for s in tmp['cleanKills'][1:])})",
+                'Assists': f"{tmp['assists']:.0f}",
+                'Hits': f"{tmp['hits']:.0f}",
+                'Damage': f"{tmp['bulletDamage']:.0f}",
+                'DmgTaken': f"{tmp['bulletDamageTaken']:.0f}",
+                'RocHits': f"{tmp['rocketHits']:.0f}",
+                'RocParts': f"{tmp['rocketPartsHit']:.0f}",
+                'RocDmg': f"{tmp['rocketDamage']:.0f}",
+                'HitByRoc': f"{tmp['rocketHitsTaken']:.0f}",
+                'MisHits': f"{tmp['missileHits']:.0f}",
+                'MisParts': f"{tmp['missilePartsHit']:.0f}",
+                'MisDmg': f"{tmp['missileDamage']:.0f}",
+                'HitByMis': f"{tmp['missileHitsTaken']:.0f}",
+                'Ram': f"{tmp['ramScore']:.0f}",
+                'BD dealt': f"{tmp['battleDamage']:.0f}",
+                'BD taken': f"{tmp['battleDamageTaken']:.0f}",
+                'Ast.': f"{tmp['partsLostToAsteroids']:.0f}",
+                'Acc%': f"{tmp['accuracy']:.3g}",
+                'RktAcc%': f"{tmp['rocket_accuracy']:.3g}",
+                'HP%': f"{tmp['HPremaining']:.3g}",
+                'Dmg/Hit': f"{tmp['damage/hit']:.1f}",
+                'Hits/Sp': f"{tmp['hits/spawn']:.1f}",
+                'Dmg/Sp': f"{tmp['damage/spawn']:.1f}",
             }
+        })
+        if hasWaypoints:
+            summary_strings[craft].update({
+                'WPcount': f"{tmp['waypointCount']:.0f}",
+                'WPtime': f"{tmp['waypointTime']:.1f}",
+                'WPdev': f"{tmp['waypointDeviation']:.1f}",
+                'WPbestC': f"{tmp['waypointBestCount']:.0f}",
+                'WPbestT': f"{tmp['waypointBestTime']:.1f}",
+                'WPbestD': f"{tmp['waypointBestDeviation']:.1f}",
+            })
+        if args.score:
+            summary_strings[craft]['Score'] = f"{tmp['score']:.3f}"
+    columns_to_show = [header for header in headers if not all(craft[header] == "0" for craft in list(summary_strings.values())[1:])]
+    column_widths = {column: max(len(craft[column]) + 2 for craft in summary_strings.values()) for column in headers}
+    strings.append(''.join(f"{header:{column_widths[header]}s}" for header in columns_to_show))
+    for craft in sorted(summary['craft'], key=None if not args.score else lambda craft: summary['craft'][craft]['score'], reverse=False if not args.score else True):
+        strings.append(''.join(f"{summary_strings[craft][header]:{column_widths[header]}s}" for header in columns_to_show))
+
+    # Teams summary
+    if len(teamNames) > 0 and not all(name in default_team_names for name in teamNames):  # Don't do teams if they're assigned as 'A', 'B', ... as they won't be consistent between rounds.
+        name_length = max([len(team) for team in teamNames])
+        strings.append(f"\nTeam{' ' * (name_length - 4)}\tWins\tDraws\tDeaths\tVessels")
+        for team in sorted(teamNames, key=lambda team: teamWins[team], reverse=True):
+            strings.append(f"{team}{' ' * (name_length - len(team))}\t{teamWins[team]}\t{teamDraws[team]}\t{teamDeaths[team]}\t{summary['teams'][team]}")
+
+    # Per round cumulative score
+    if args.score and not args.no_cumulative:
+        name_length = max([len(name) for name in cumulative_scores.keys()] + [23])
+        strings.append(f"\nName \\ Cumulative Score{' ' * (name_length - 22)}\t" + "\t".join(f"{r:>7d}" for r in range(len(next(iter(cumulative_scores.values()))))))
+        strings.append('\n'.join(f"{craft}:{' ' * (name_length - len(craft))}\t" + "\t".join(f"{s:>7.2f}" for s in cumulative_scores[craft])
+                       for craft in sorted(cumulative_scores, key=lambda craft: summary['craft'][craft]['score'], reverse=True)))
+
+    # Print stuff to the console.
+    for string in strings:
+        print(string)
+
+
+def load_weights_file(path: Union[str, Path]) -> Dict[str, List[float]]:
+    """ Load named sets of score weights from a JSON file.
+
+    Each set of weights is either a comma-separated string (as for --weights), a list or a {field: weight} object (as in the 'score weights' of summary.json).
+
+    Args:
+        path (Union[str, Path]): The weights file.
+
+    Returns:
+        Dict[str, List[float]]: The weights for each name.
+    """
+    with open(path, 'r', encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or len(data) == 0:
+        raise ValueError("Expected an object of named score weights.")
+    weight_sets = {}
+    for name, weights in data.items():
+        if isinstance(weights, str):
+            weights = weights.split(',')
+        elif isinstance(weights, dict):
+            unknown_fields = [f for f in weights if f not in score_fields]
+            if len(unknown_fields) > 0:
+                raise ValueError(f"Unknown score fields for '{name}': {', '.join(unknown_fields)}")
+            weights = [weights.get(f, 0) for f in score_fields]
+        weight_sets[name] = [float(w) for w in weights]
+    return weight_sets
+
+
+def rank_crafts(scores: np.ndarray) -> np.ndarray:
+    """ Rank the craft (the rows of scores) for each set of weights (the columns), 1 being the highest score.
+
+    Ties are ranked in craft order, as in the sorted summary.
+    """
+    return np.argsort(np.argsort(-scores, axis=0, kind='stable'), axis=0) + 1
+
+
+def rank_sensitivity(craft_stats: np.ndarray, per_round_stats: np.ndarray, W: np.ndarray, rows: List[int], ranks: np.ndarray) -> np.ndarray:
+    """ How many places each craft would drop for each set of weights if each of its weights were dropped (set to 0).
+
+    Args:
+        craft_stats (np.ndarray): The (craft x stat) tournament stats.
+        per_round_stats (np.ndarray): The (craft x round x stat) per-round stats.
+        W (np.ndarray): The (weights x field) sets of weights.
+        rows (List[int]): The rows of per_round_stats corresponding to those of craft_stats.
+        ranks (np.ndarray): The (craft x weights) ranks with all the weights.
+
+    Returns:
+        np.ndarray: The (craft x weights x field) rank changes. Negative values mean that the craft would move up.
+    """
+    sensitivity = np.zeros(ranks.shape + (len(score_fields),), dtype=int)
+    waypoint_scores = waypoint_round_scores(per_round_stats, W)
+    for f in np.flatnonzero(np.any(W != 0, axis=0)):
+        W_f = W.copy()
+        W_f[:, f] = 0
+        scores = tournament_scores(craft_stats, waypoint_round_scores(per_round_stats, W_f) if waypoint_score_fields[f] else waypoint_scores, W_f, rows)
+        sensitivity[:, :, f] = rank_crafts(scores) - ranks
+    return sensitivity
+
+
+def compare_weights(tournamentDir: Path, summary: dict, stats: Tuple[np.ndarray, np.ndarray, List[int]], weight_sets: Dict[str, List[float]], args: argparse.Namespace):
+    """ Score the tournament with each set of weights and compare the resulting rankings.
+
+    The rankings, rank correlations (Spearman) between the sets of weights and the rank sensitivity of each craft to each weight are written to weights_summary.csv.
+    The rankings and rank correlations are also shown on the console.
+
+    Args:
+        tournamentDir (Path): The tournament folder.
+        summary (dict): The tournament summary.
+        stats (Tuple[np.ndarray, np.ndarray, List[int]]): The tournament stats, per-round stats and the rows of the per-round stats for the craft in the summary.
+        weight_sets (Dict[str, List[float]]): The named sets of weights.
+        args (argparse.Namespace): The command line options.
+    """
+    craft_stats, per_round_stats, rows = stats
+    names = list(weight_sets)
+    crafts = list(summary['craft'])
+    W = np.array([weight_vector(weights) for weights in weight_sets.values()])
+    scores = tournament_scores(craft_stats, waypoint_round_scores(per_round_stats, W), W, rows)
+    if args.zero_lowest_score:
+        scores -= scores.min(axis=0)
+    ranks = rank_crafts(scores)
+    correlations = np.atleast_2d(np.corrcoef(ranks, rowvar=False)) if len(crafts) > 1 else np.ones((len(names), len(names)))
+    order = np.argsort(ranks[:, 0], kind='stable')  # Show the craft in the order of the first set of weights.
+
+    if not args.no_files:
+        csv_lines = ["Name \\ Rank," + ",".join(names)]
+        csv_lines.extend(f"{crafts[c]}," + ",".join(str(r) for r in ranks[c]) for c in order)
+        csv_lines.append("\nName \\ Score," + ",".join(names))
+        csv_lines.extend(f"{crafts[c]}," + ",".join(f"{s:.2f}" for s in scores[c]) for c in order)
+        csv_lines.append("\nWeights \\ Rank correlation," + ",".join(names))
+        csv_lines.extend(f"{name}," + ",".join(f"{rho:.3f}" for rho in correlations[v]) for v, name in enumerate(names))
+        csv_lines.append("\nWeights,Name \\ Rank sensitivity," + ",".join(score_fields))
+        sensitivity = rank_sensitivity(craft_stats, per_round_stats, W, rows, ranks)
+        csv_lines.extend(f"{name},{crafts[c]}," + ",".join(str(d) for d in sensitivity[c, v]) for v, name in enumerate(names) for c in order)
+        write_file_atomically(tournamentDir / 'weights_summary.csv', "\n".join(csv_lines))
+
+    if not args.quiet:
+        strings = []
+        name_length = max([len(craft) for craft in crafts] + [10])
+        column_widths = [max(len(name), 5) + 2 for name in names]
+        strings.append(f"\nName \\ Rank{' ' * (name_length - 10)}\t" + "".join(f"{name:>{width}s}" for name, width in zip(names, column_widths)))
+        strings.extend(f"{crafts[c]}:{' ' * (name_length - len(crafts[c]))}\t" + "".join(f"{r:>{width}d}" for r, width in zip(ranks[c], column_widths)) for c in order)
+        if len(names) > 1:
+            name_length = max([len(name) for name in names] + [15])
+            strings.append(f"\nRank correlation{' ' * (name_length - 15)}\t" + "".join(f"{name:>{width}s}" for name, width in zip(names, column_widths)))
+            strings.extend(f"{name}:{' ' * (name_length - len(name))}\t" + "".join(f"{rho:>{width}.3f}" for rho, width in zip(correlations[v], column_widths)) for v, name in enumerate(names))
+        for string in strings:
+            print(string)
+
+
+def find_heat_logs(tournamentDir: Path, args: argparse.Namespace) -> List[Tuple[str, Path]]:
+    """ Find the heat logs in the tournament folder.
+
+    Args:
+        tournamentDir (Path): The tournament folder.
+        args (argparse.Namespace): The command line options.
+
+    Returns:
+        List[Tuple[str, Path]]: The round name and heat log of each heat, in round order, restricted to the --rounds and --shard selections.
+    """
+    heatFiles = []  # [(round, heat log file),]
+    rounds = {name.strip() for name in args.rounds.split(',')} if args.rounds is not None else None
+    if args.current_dir:
+        logFiles = heat_logs(tournamentDir)
+        heatFiles.extend((tournamentDir.name, heat) for heat in (logFiles if args.N == None else logFiles[:args.N]))
+    else:
+        archived = archive_heat_logs(tournamentDir)  # The rounds in the tournament archive (if any), which may no longer have round folders.
+        for round in sorted({roundDir.name for roundDir in tournamentDir.iterdir() if roundDir.is_dir()} | set(archived), key=naturalSortKey):
+            if len(round) == 0 or (rounds is not None and round not in rounds):
+                continue
+            logFiles = heat_logs(tournamentDir / round, archived.get(round, ()))
+            heatFiles.extend((round, heat) for heat in (logFiles if args.N == None else logFiles[:args.N]))
+    if args.shard is not None:
+        k, n = args.shard
+        heatFiles = heatFiles[k::n]
+    return heatFiles
+
+
+def round_folders(tournamentDir: Path) -> List[str]:
+    """ The names of the round folders in the tournament folder, including the rounds that are only in its archive. """
+    rounds = {roundDir.name for roundDir in tournamentDir.iterdir() if roundDir.is_dir() and roundDir.name.startswith('Round')}
+    return list(rounds) + [round for round in archive_heat_logs(tournamentDir) if round.startswith('Round') and round not in rounds]
+
+
+def count_rounds(tournamentDir: Path) -> int:
+    """ Count the round folders in the tournament folder. """
+    return len(round_folders(tournamentDir))
+
+
+def heat_log_finished(heat: Path) -> bool:
+    """ Check whether the competition has finished writing its results to a heat log.
+
+    "Dumping Results" starts the results dump, which ends with the RESULT record (and any DEADTEAMS record), so the RESULT record has to follow it.
+    """
+    dumping = False
+    for line in read_marked_lines(heat, [b'Dumping Results', b'RESULT:']):
+        if 'BDArmory.BDACompetitionMode' not in line:
+            continue
+        if 'Dumping Results' in line:
+            dumping = True
+        elif dumping and ' RESULT:' in line:
+            return True
+    return False
+
+
+def follow_tournament(tournamentDir: Path, tournamentData: Dict[str, Dict[str, Heat]], tournamentMetadata: dict, craft_totals: Dict[str, dict], round_totals: Dict[str, Dict[str, dict]], weights: List[float], args: argparse.Namespace):
+    """ Watch the tournament folder and update the summary as each new heat finishes.
+
+    A heat log is picked up once it contains the whole results dump (up to the RESULT record) and its size hasn't changed since the previous poll.
+    Only the new heat gets parsed, its contributions are added to the running totals and the summary files are then rewritten.
+    A heat that fails to parse is reported and left pending, to be tried again once its log changes.
+    Each new heat is added to results.jsonl as it finishes (for --results-format jsonl or both), whereas results.json and the results store are updated when following stops (Ctrl-C or an error).
+
+    Args:
+        tournamentDir (Path): The tournament folder.
+        tournamentData (Dict[str, Dict[str, Heat]]): The parsed heats, keyed by round and heat name, updated in place.
+        tournamentMetadata (dict): The tournament ID, duration and number of rounds, updated in place.
+        craft_totals (Dict[str, dict]): The tournament totals for each craft, updated in place.
+        round_totals (Dict[str, Dict[str, dict]]): The totals for each craft in each round, updated in place.
+        weights (List[float]): The score weights.
+        args (argparse.Namespace): The command line options.
+    """
+    knownHeats = {(round, heat) for round, heats in tournamentData.items() for heat in heats}
+    pendingSizes = {}  # Size of each unfinished heat log at the previous poll.
+    failedSizes = {}  # Size of each heat log that failed to parse, which isn't tried again until it changes.
+    if not args.quiet:
+        print(f"\nFollowing {tournamentDir.resolve()} for new heats every {args.follow_interval}s (Ctrl-C to stop).")
+    try:
+        while True:
+            time.sleep(args.follow_interval)
+            finishedHeats = []
+            for round, heat in find_heat_logs(tournamentDir, args):
+                if (round, log_name(heat)) in knownHeats:
+                    continue
+                try:
+                    size = log_stat(heat)[0]
+                except FileNotFoundError:
+                    continue
+                if pendingSizes.get(heat) == size and failedSizes.get(heat) != size and heat_log_finished(heat):
+                    finishedHeats.append((round, heat))
+                else:
+                    pendingSizes[heat] = size
+            newHeats = 0
+            for round, heat in finishedHeats:
+                roundTotals = round_totals.get(round, {})
+                try:
+                    heatData, span, _ = parse_heat_log(heat)
+                    aggregate_heat(craft_totals, roundTotals, heatData)  # Fails (on an incomplete heat) before any of the totals are updated.
+                except (RuntimeError, AttributeError, KeyError, ValueError) as e:
+                    print(f"Failed to parse the finished heat {heat}, trying again once it changes: {e}")
+                    failedSizes[heat] = pendingSizes[heat]
+                    continue
+                round_totals[round] = roundTotals
+                tournamentData.setdefault(round, {})[log_name(heat)] = heatData
+                if not args.no_files and args.results_format != 'json':
+                    with ResultsJsonlWriter(jsonl_path(tournamentDir / 'results.json'), append=True) as jsonl:
+                        jsonl.write_heat(round, log_name(heat), heatData.to_dict())
+                merge_duration(tournamentMetadata, span)
+                knownHeats.add((round, log_name(heat)))
+                del pendingSizes[heat]
+                failedSizes.pop(heat, None)
+                newHeats += 1
+                if not args.quiet:
+                    print(f"\nFinished heat: {round}/{log_name(heat)}" if round else f"\nFinished heat: {log_name(heat)}")
+            if newHeats == 0:
+                continue
+            tournamentMetadata['rounds'] = count_rounds(tournamentDir)
+            summary, cumulative_scores, hasWaypoints, stats = summarise_tournament(tournamentData, tournamentMetadata, craft_totals, round_totals, weights, args)
+            if len(summary['craft']) > 0:
+                if not args.no_files:
+                    write_summary_files(tournamentDir, summary, cumulative_scores, args)
+                if not args.quiet:
+                    print_summary(summary, tournamentMetadata, cumulative_scores, hasWaypoints, args)
+    except KeyboardInterrupt:
+        pass
+    finally:  # Keep the heats parsed so far, even if following stops on an error.
+        if not args.no_files and args.results_format != 'jsonl' and len(tournamentData) > 0:
+            write_results(tournamentDir, tournamentData)
+
+
+def find_tournament_dirs(args: argparse.Namespace) -> List[Path]:
+    """ The tournament folders to parse: those given on the command line, all of those in the Logs folder for --all, otherwise the latest one in the Logs folder.
+
+    If there's no tournament folder to use, args.current_dir is set and the current directory is used instead.
+
+    Args:
+        args (argparse.Namespace): The command line options.
+
+    Returns:
+        List[Path]: The tournament folders.
+    """
+    if args.current_dir and len(args.tournament) == 0:
+        tournamentDirs = [Path('')]
+    else:
+        if len(args.tournament) == 0:
+            tournamentDirs = None
+            logsDir = Path(__file__).parent / "Logs"
+            if logsDir.exists():
+                tournamentFolders = list(logsDir.resolve().glob("Tournament*"))
+                if len(tournamentFolders) > 0:
+                    tournamentFolders = sorted(list(dir for dir in tournamentFolders if dir.is_dir()), key=naturalSortKey)
+                if args.all:
+                    return tournamentFolders
+                if len(tournamentFolders) > 0:
+                    tournamentDirs = [tournamentFolders[-1]]  # Latest tournament dir
+            if args.all:
+                return []
+            if tournamentDirs is None:  # Didn't find a tournament dir, revert to current-dir
+                tournamentDirs = [Path('')]
+                args.current_dir = True
         else:
-            per_round_scores = {}  # Silence Pylance warnings.
-
-        if not args.quiet:  # Write results to console
-            strings = []
-            if not args.no_header and not args.current_dir and 'duration' in tournamentMetadata:
-                strings.append(
-                    f"Tournament {tournamentMetadata.get('ID', '???')} of duration {tournamentMetadata['duration'][1] - tournamentMetadata['duration'][0]} with {tournamentMetadata['rounds']} rounds starting at {tournamentMetadata['duration'][0]}"
-                )  # Python <3.12 has issues with line breaks in f-strings.
-            headers = [
-                'Name', 'Wins', 'Survive', 'MIA', 'Deaths (BRMRAS)', 'D.Order', 'D.Time',
-                'Kills (BRMR)', 'Assists', 'Hits', 'Damage', 'DmgTaken',
-                'RocHits', 'RocParts', 'RocDmg', 'HitByRoc',
-                'MisHits', 'MisParts', 'MisDmg', 'HitByMis',
-                'Ram', 'BD dealt', 'BD taken', 'Ast.',
-                'Acc%', 'RktAcc%', 'HP%', 'Dmg/Hit', 'Hits/Sp', 'Dmg/Sp'
-            ] if not args.scores_only else ['Name']
-            if hasWaypoints and not args.scores_only:
-                headers.extend(['WPcount', 'WPtime', 'WPdev', 'WPbestC', 'WPbestT', 'WPbestD'])
-            if args.score:
-                headers.insert(1, 'Score')
-            summary_strings = {'header': {field: field for field in headers}}
-            for craft in sorted(summary['craft']):
-                tmp = summary['craft'][craft]
-                spawns = tmp['survivedCount'] + tmp['deathCount'][0]
-                summary_strings.update({
-                    craft: {
-                        'Name': craft,
-                        'Wins': f"{tmp['wins']:.0f}",
-                        'Survive': f"{tmp['survivedCount']:.0f}",
-                        'MIA': f"{tmp['miaCount']:.0f}",
-                        'Deaths (BRMRAS)': f"{tmp['deathCount'][0]:.0f} ({' '.join(f'{s:.0f}' for s in tmp['deathCount'][1:])})",
-                        'D.Order': f"{tmp['deathOrder']:.3f}",
-                        'D.Time': f"{tmp['deathTime']:.1f}",
-                        'Kills (BRMR)': f"{tmp['cleanKills'][0]:.0f} ({' '.join(f'{s:.0f}' for s in tmp['cleanKills'][1:])})",
-                        'Assists': f"{tmp['assists']:.0f}",
-                        'Hits': f"{tmp['hits']:.0f}",
-                        'Damage': f"{tmp['bulletDamage']:.0f}",
-                        'DmgTaken': f"{tmp['bulletDamageTaken']:.0f}",
-                        'RocHits': f"{tmp['rocketHits']:.0f}",
-                        'RocParts': f"{tmp['rocketPartsHit']:.0f}",
-                        'RocDmg': f"{tmp['rocketDamage']:.0f}",
-                        'HitByRoc': f"{tmp['rocketHitsTaken']:.0f}",
-                        'MisHits': f"{tmp['missileHits']:.0f}",
-                        'MisParts': f"{tmp['missilePartsHit']:.0f}",
-                        'MisDmg': f"{tmp['missileDamage']:.0f}",
-                        'HitByMis': f"{tmp['missileHitsTaken']:.0f}",
-                        'Ram': f"{tmp['ramScore']:.0f}",
-                        'BD dealt': f"{tmp['battleDamage']:.0f}",
-                        'BD taken': f"{tmp['battleDamageTaken']:.0f}",
-                        'Ast.': f"{tmp['partsLostToAsteroids']:.0f}",
-                        'Acc%': f"{tmp['accuracy']:.3g}",
-                        'RktAcc%': f"{tmp['rocket_accuracy']:.3g}",
-                        'HP%': f"{tmp['HPremaining']:.3g}",
-                        'Dmg/Hit': f"{tmp['damage/hit']:.1f}",
-                        'Hits/Sp': f"{tmp['hits/spawn']:.1f}",
-                        'Dmg/Sp': f"{tmp['damage/spawn']:.1f}",
-                    }
-                })
-                if hasWaypoints:
-                    summary_strings[craft].update({
-                        'WPcount': f"{tmp['waypointCount']:.0f}",
-                        'WPtime': f"{tmp['waypointTime']:.1f}",
-                        'WPdev': f"{tmp['waypointDeviation']:.1f}",
-                        'WPbestC': f"{tmp['waypointBestCount']:.0f}",
-                        'WPbestT': f"{tmp['waypointBestTime']:.1f}",
-                        'WPbestD': f"{tmp['waypointBestDeviation']:.1f}",
-                    })
-                if args.score:
-                    summary_strings[craft]['Score'] = f"{tmp['score']:.3f}"
-            columns_to_show = [header for header in headers if not all(craft[header] == "0" for craft in list(summary_strings.values())[1:])]
-            column_widths = {column: max(len(craft[column]) + 2 for craft in summary_strings.values()) for column in headers}
-            strings.append(''.join(f"{header:{column_widths[header]}s}" for header in columns_to_show))
-            for craft in sorted(summary['craft'], key=None if not args.score else lambda craft: summary['craft'][craft]['score'], reverse=False if not args.score else True):
-                strings.append(''.join(f"{summary_strings[craft][header]:{column_widths[header]}s}" for header in columns_to_show))
-
-            # Teams summary
-            if len(teamNames) > 0 and not all(name in default_team_names for name in teamNames):  # Don't do teams if they're assigned as 'A', 'B', ... as they won't be consistent between rounds.
-                name_length = max([len(team) for team in teamNames])
-                strings.append(f"\nTeam{' ' * (name_length - 4)}\tWins\tDraws\tDeaths\tVessels")
-                for team in sorted(teamNames, key=lambda team: teamWins[team], reverse=True):
-                    strings.append(f"{team}{' ' * (name_length - len(team))}\t{teamWins[team]}\t{teamDraws[team]}\t{teamDeaths[team]}\t{summary['teams'][team]}")
-
-            # Per round cumulative score
-            if args.score and not args.no_cumulative:
-                name_length = max([len(name) for name in per_round_scores.keys()] + [23])
-                strings.append(f"\nName \\ Cumulative Score{' ' * (name_length - 22)}\t" + "\t".join(f"{r:>7d}" for r in range(len(next(iter(per_round_scores.values()))))))
-                strings.append('\n'.join(f"{craft}:{' ' * (name_length - len(craft))}\t" + "\t".join(f"{s:>7.2f}" for s in cumsum(per_round_scores[craft]))
-                               for craft in sorted(per_round_scores, key=lambda craft: summary['craft'][craft]['score'], reverse=True)))
-
-            # Print stuff to the console.
-            for string in strings:
-                print(string)
-
-        # Write teams results to the summary.csv file.
-        if not args.no_files:
-            with open(tournamentDir / 'summary.csv', 'a', encoding="utf-8") as f:
-                f.write('\n\nTeam,Wins,Draws,Deaths,Vessels')
-                for team in sorted(teamNames, key=lambda team: teamWins[team], reverse=True):
-                    f.write('\n' + ','.join([str(v) for v in (team, teamWins[team], teamDraws[team], teamDeaths[team], summary['teams'][team].replace(", ", ","))]))
+            tournamentDirs = [Path(tournamentDir) for tournamentDir in args.tournament]  # Specified tournament dir
+    return tournamentDirs
+
+
+def score_weights(args: argparse.Namespace) -> List[float]:
+    """ The score weights from the command line options (empty if they can't be parsed). """
+    if args.waypoint_scores:
+        args.weights = "0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,-0.02,-0.003"
+    try:
+        return list(float(w) for w in args.weights.split(','))
+    except:
+        return []
+
+
+def parse_heat_files(tournamentDir: Path, heatFiles: List[Tuple[str, Path]], args: argparse.Namespace, on_heat: Optional[Callable[[str, Path, Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]], None]] = None) -> List[Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]]:
+    """ Parse the heat logs of a tournament, using the cache of parsed heats for the logs that haven't changed and updating it.
+
+    Args:
+        tournamentDir (Path): The tournament folder.
+        heatFiles (List[Tuple[str, Path]]): The round name and heat log of each heat.
+        args (argparse.Namespace): The command line options.
+        on_heat (Optional[Callable[[str, Path, Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]], None]]): Called with the round name, heat log and parsed heat of each heat, in the order of heatFiles, as soon as it's available.
+
+    Returns:
+        List[Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]]: The parsed heats (as for parse_heat), in the order of heatFiles.
+    """
+    cache = load_heat_cache(tournamentDir) if not args.no_cache else {}
+    heatCache = {}  # Only keep entries for the current heat logs.
+    parsedHeats = {}
+    cacheModified = False
+    for round, heat in heatFiles:  # Use the cached heats where the logs haven't changed.
+        key = heat.relative_to(tournamentDir).as_posix()
+        mtime = cache[key].get('mtime') if key in cache else None
+        parsed = cached_heat(cache.get(key), heat)
+        if parsed is not None:
+            parsedHeats[heat] = parsed
+            heatCache[key] = cache[key]
+            cacheModified |= heatCache[key]['mtime'] != mtime
+    heatsToParse = [heat for _, heat in heatFiles if heat not in parsedHeats]
+    signatures = [heat_log_signature(heat) for heat in heatsToParse] if not args.no_cache else []  # Taken before parsing so that a log that's still being written gets reparsed later.
+    newHeats = parse_heat_logs(heatsToParse, args.jobs)  # In the order of heatFiles.
+    heatNumber = 0
+    for round, heat in heatFiles:
+        if heat not in parsedHeats:
+            parsedHeats[heat] = next(newHeats)
+            if not args.no_cache:
+                heatCache[heat.relative_to(tournamentDir).as_posix()] = heat_cache_entry(signatures[heatNumber], parsedHeats[heat])
+            heatNumber += 1
+        if on_heat is not None:
+            on_heat(round, heat, parsedHeats[heat])
+    if not args.no_cache and not args.no_files and args.shard is None and args.rounds is None and (cacheModified or len(heatsToParse) > 0 or len(heatCache) != len(cache)):
+        save_heat_cache(tournamentDir, heatCache)  # Not for a selection of the heats, which would drop the others from the cache.
+    return [parsedHeats[heat] for _, heat in heatFiles]
+
+
+def assemble_tournament(heats: Iterable[Tuple[str, str, Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]]], tournamentMetadata: dict) -> Tuple[Dict[str, Dict[str, Heat]], Counter]:
+    """ Collect parsed heats into the tournament data.
+
+    Args:
+        heats (Iterable[Tuple[str, str, Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]]]): The round name, heat name and parsed heat of each heat, in order.
+        tournamentMetadata (dict): The tournament metadata, whose duration is updated to cover the heats.
+
+    Returns:
+        Tuple[Dict[str, Dict[str, Heat]], Counter]: The parsed heats, keyed by round and heat name, and the counts of unknown record tags.
+    """
+    tournamentData = {}
+    unknownRecords = Counter()
+    for round, heatName, (heatData, span, unknown_records) in heats:
+        tournamentData.setdefault(round, {})[heatName] = heatData
+        merge_duration(tournamentMetadata, span)
+        unknownRecords.update(unknown_records)
+    return tournamentData, unknownRecords
+
+
+def report_tournament(tournamentDir: Path, tournamentData: Dict[str, Dict[str, Heat]], tournamentMetadata: dict, unknownRecords: Counter, weights: List[float], args: argparse.Namespace, weight_sets: Optional[Dict[str, List[float]]] = None) -> Tuple[dict, Dict[str, List[float]], Dict[str, dict], Dict[str, Dict[str, dict]]]:
+    """ Write and show the results and summary of a tournament as requested by the options.
+
+    Args:
+        tournamentDir (Path): The tournament folder, where the files are written.
+        tournamentData (Dict[str, Dict[str, Heat]]): The parsed heats, keyed by round and heat name.
+        tournamentMetadata (dict): The tournament ID, duration and number of rounds.
+        unknownRecords (Counter): The counts of unknown record tags.
+        weights (List[float]): The score weights.
+        args (argparse.Namespace): The command line options.
+        weight_sets (Optional[Dict[str, List[float]]]): Named sets of score weights to compare, from the --weights-file.
+
+    Returns:
+        Tuple[dict, Dict[str, List[float]], Dict[str, dict], Dict[str, Dict[str, dict]]]: The summary (as in summary.json), the cumulative scores of each craft after each round, and the tournament totals and per-round totals of each craft.
+    """
+    if len(unknownRecords) > 0 and not args.quiet:
+        print(f"Ignored unknown log records: {', '.join(f'{tag} ({count})' for tag, count in unknownRecords.most_common())}")
 
-                # Write per round cumulative score results to summary.csv file.
-                if args.score and not args.no_cumulative:
-                    f.write(f"\n\nName \\ Cumulative Score Per Round," + ",".join(f"{r:>7d}" for r in range(len(next(iter(per_round_scores.values()))))))
-                    for craft in sorted(per_round_scores, key=lambda craft: summary['craft'][craft]['score'], reverse=True):
-                        f.write(f"\n{craft}," + ",".join(f"{s:.2f}" for s in cumsum(per_round_scores[craft])))
+    if not args.no_files and args.results_format != 'jsonl' and len(tournamentData) > 0:
+        write_results(tournamentDir, tournamentData)
 
+    craft_totals, round_totals = aggregate_tournament(tournamentData)
+    summary, cumulative_scores, hasWaypoints, stats = summarise_tournament(tournamentData, tournamentMetadata, craft_totals, round_totals, weights, args)
+    if len(summary['craft']) > 0:
+        if not args.no_files:
+            write_summary_files(tournamentDir, summary, cumulative_scores, args)
+        if not args.quiet:
+            print_summary(summary, tournamentMetadata, cumulative_scores, hasWaypoints, args)
+        if args.weights_file is not None:
+            compare_weights(tournamentDir, summary, stats, weight_sets, args)
     else:
         print(f"No valid log files found in {tournamentDir}.")
+    return summary, cumulative_scores, craft_totals, round_totals
+
+
+def tournament_metadata(tournamentDir: Path) -> dict:
+    """ The tournament ID (from the folder name) and number of rounds. """
+    tournamentMetadata = {}
+    m = re.search('Tournament (\\d+)', str(tournamentDir))
+    if m is not None and len(m.groups()) > 0:
+        tournamentMetadata['ID'] = m.groups()[0]
+    tournamentMetadata['rounds'] = count_rounds(tournamentDir)
+    return tournamentMetadata
+
+
+def parse_tournament(tournamentDir: Path, weights: List[float], args: argparse.Namespace, weight_sets: Optional[Dict[str, List[float]]] = None) -> Tuple[Dict[str, Dict[str, Heat]], dict, dict, Dict[str, List[float]]]:
+    """ Parse the heat logs of a tournament, then write and show its results and summary as requested by the options.
+
+    Args:
+        tournamentDir (Path): The tournament folder.
+        weights (List[float]): The score weights.
+        args (argparse.Namespace): The command line options.
+        weight_sets (Optional[Dict[str, List[float]]]): Named sets of score weights to compare, from the --weights-file.
+
+    Returns:
+        Tuple[Dict[str, Dict[str, Heat]], dict, dict, Dict[str, List[float]]]: The parsed heats (see heat_records.results_dict for the results.json data), the tournament metadata, the summary (as in summary.json) and the cumulative scores of each craft after each round.
+    """
+    tournamentMetadata = tournament_metadata(tournamentDir)
+    heatFiles = find_heat_logs(tournamentDir, args)
+    with ResultsJsonlWriter(jsonl_path(tournamentDir / 'results.json')) as jsonl:
+        stream = not args.no_files and args.results_format != 'json'
+        parsedHeats = parse_heat_files(tournamentDir, heatFiles, args, (lambda round, heat, parsed: jsonl.write_heat(round, log_name(heat), parsed[0].to_dict())) if stream else None)
+    tournamentData, unknownRecords = assemble_tournament(((round, log_name(heat), parsed) for (round, heat), parsed in zip(heatFiles, parsedHeats)), tournamentMetadata)
+    summary, cumulative_scores, craft_totals, round_totals = report_tournament(tournamentDir, tournamentData, tournamentMetadata, unknownRecords, weights, args, weight_sets)
+    if args.follow:
+        follow_tournament(tournamentDir, tournamentData, tournamentMetadata, craft_totals, round_totals, weights, args)
+    return tournamentData, tournamentMetadata, summary, cumulative_scores
+
+
+def batch_task(tournamentDir: Path, weights: List[float], args: argparse.Namespace, weight_sets: Optional[Dict[str, List[float]]] = None) -> str:
+    """ Parse a tournament for tournament_batch.run_batch.
+
+    Args:
+        As for parse_tournament.
+
+    Returns:
+        str: The numbers of heats and craft.
+    """
+    tournamentData, _, summary, _ = parse_tournament(tournamentDir, weights, args, weight_sets)
+    return f"{sum(len(heats) for heats in tournamentData.values())} heats, {len(summary['craft'])} craft"
+
+
+PARTIAL_VERSION = 1
+
+
+def emit_partial(tournamentDir: Path, partial_file: Union[str, Path], args: argparse.Namespace):
+    """ Parse the selected heat logs of a tournament and write them to a partial results file for merge_partials.
+
+    The partial holds the parsed heats rather than their totals so that merging gives exactly the same sums as parsing all the heats in one place, whichever way the heats were split.
+
+    Args:
+        tournamentDir (Path): The tournament folder.
+        partial_file (Union[str, Path]): The partial results file to write.
+        args (argparse.Namespace): The command line options.
+    """
+    tournamentMetadata = tournament_metadata(tournamentDir)
+    heatFiles = find_heat_logs(tournamentDir, args)
+    parsedHeats = parse_heat_files(tournamentDir, heatFiles, args)
+    partial = {
+        'version': PARTIAL_VERSION,
+        'ID': tournamentMetadata.get('ID'),
+        'rounds': sorted(round_folders(tournamentDir)) if not args.current_dir else [],
+        'heats': [[round, log_name(heat), heat_entry(parsed)] for (round, heat), parsed in zip(heatFiles, parsedHeats)],
+    }
+    write_file_atomically(Path(partial_file), json.dumps(partial, ensure_ascii=False))
+    if not args.quiet:
+        print(f"Wrote {len(heatFiles)} heats of {tournamentDir.resolve()} to {partial_file}")
+
+
+def merge_partials(partial_files: List[Union[str, Path]]) -> Tuple[List[Tuple[str, str, Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]]], dict]:
+    """ Combine partial results files from emit_partial.
+
+    The heats are put in the same order as when parsing the tournament folder (rounds in natural order, then heats by name), so the order of the partials doesn't matter.
+    A heat that's in several partials must be the same in each.
+
+    Args:
+        partial_files (List[Union[str, Path]]): The partial results files.
+
+    Returns:
+        Tuple[List[Tuple[str, str, Tuple[Heat, Optional[Tuple[datetime, datetime]], Counter]]], dict]: The round name, heat name and parsed heat of each heat, in order, and the tournament ID and number of rounds.
+
+    Raises:
+        ValueError: If a partial is unreadable or from a different version, or the partials conflict.
+    """
+    entries, IDs, rounds = {}, set(), set()
+    for partial_file in partial_files:
+        try:
+            with open(partial_file, 'r', encoding="utf-8") as f:
+                partial = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Failed to read the partial results file {partial_file}: {e}") from e
+        if not isinstance(partial, dict) or partial.get('version') != PARTIAL_VERSION:
+            raise ValueError(f"{partial_file} isn't a partial results file of version {PARTIAL_VERSION}")
+        if partial['ID'] is not None:
+            IDs.add(partial['ID'])
+        rounds.update(partial['rounds'])
+        for round, heatName, entry in partial['heats']:
+            if entries.setdefault((round, heatName), entry) != entry:
+                raise ValueError(f"The partials have different results for heat {round}/{heatName}")
+    if len(IDs) > 1:
+        raise ValueError(f"The partials are from different tournaments: {', '.join(sorted(IDs))}")
+    tournamentMetadata = {'rounds': len(rounds)}
+    if len(IDs) == 1:
+        tournamentMetadata['ID'] = IDs.pop()
+    heats = [(round, heatName, parsed_heat(entries[(round, heatName)])) for round, heatName in sorted(entries, key=lambda key: (naturalSortKey(key[0]), key[1]))]
+    return heats, tournamentMetadata
+
+
+def merge_tournament(partial_files: List[Union[str, Path]], tournamentDir: Path, weights: List[float], args: argparse.Namespace, weight_sets: Optional[Dict[str, List[float]]] = None) -> Tuple[Dict[str, Dict[str, Heat]], dict, dict, Dict[str, List[float]]]:
+    """ Combine partial results files, then write and show the results and summary of the tournament as requested by the options.
+
+    Args:
+        partial_files (List[Union[str, Path]]): The partial results files.
+        tournamentDir (Path): The folder to write the files to.
+        weights (List[float]): The score weights.
+        args (argparse.Namespace): The command line options.
+        weight_sets (Optional[Dict[str, List[float]]]): Named sets of score weights to compare, from the --weights-file.
+
+    Returns:
+        Tuple[Dict[str, Dict[str, Heat]], dict, dict, Dict[str, List[float]]]: As for parse_tournament.
+    """
+    heats, tournamentMetadata = merge_partials(partial_files)
+    tournamentData, unknownRecords = assemble_tournament(heats, tournamentMetadata)
+    if not args.no_files and args.results_format != 'json':
+        with ResultsJsonlWriter(jsonl_path(tournamentDir / 'results.json')) as jsonl:
+            for round, heatName, (heatData, _, _) in heats:
+                jsonl.write_heat(round, heatName, heatData.to_dict())
+    summary, cumulative_scores, _, _ = report_tournament(tournamentDir, tournamentData, tournamentMetadata, unknownRecords, weights, args, weight_sets)
+    return tournamentData, tournamentMetadata, summary, cumulative_scores
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.version:
+        print(f"Version: {VERSION}")
+        sys.exit()
+
+    if args.follow and (args.merge is not None or args.emit_partial is not None):
+        parser.error("--follow doesn't work with --merge or --emit-partial.")
+    if args.merge is not None and args.emit_partial is not None:
+        parser.error("--merge and --emit-partial can't be used together.")
+    if args.shard is not None and args.emit_partial is None:
+        parser.error("--shard only works with --emit-partial (combine the partials with --merge).")
+    if args.rounds is not None and args.merge is not None:
+        parser.error("--rounds selects the heat logs to parse, it doesn't work with --merge.")
+    if args.rounds is not None and args.emit_partial is None:
+        args.no_files = True  # The results and summary of some of the rounds mustn't replace those of the whole tournament.
+    if args.merge is not None:
+        if len(args.tournament) > 1 or args.all:
+            parser.error("--merge writes to a single tournament folder.")
+        tournamentDirs = [Path(args.tournament[0]) if len(args.tournament) > 0 else Path('')]
+    else:
+        if args.all and (len(args.tournament) > 0 or args.current_dir):
+            parser.error("--all parses the tournament folders in the Logs folder, don't give any others.")
+        tournamentDirs = find_tournament_dirs(args)
+        if args.all and len(tournamentDirs) == 0:
+            parser.error(f"No tournament folders found in {Path(__file__).parent / 'Logs'}.")
+    if args.follow and len(tournamentDirs) > 1:
+        parser.error("--follow only works with a single tournament.")
+    if args.emit_partial is not None and len(tournamentDirs) > 1:
+        parser.error("--emit-partial only works with a single tournament.")
+
+    weights = score_weights(args)
+
+    if args.weights_file is not None:
+        try:
+            weight_sets = load_weights_file(args.weights_file)
+        except (OSError, ValueError) as e:
+            parser.error(f"Failed to load the weights file {args.weights_file}: {e}")
+
+    if args.show_weights:
+        field_width = max(len(f) for f in score_fields)
+        for w, f in zip(weights, score_fields):
+            print(f"{f}:{' ' * (field_width - len(f))} {w}")
+        sys.exit()
+
+    if args.emit_partial is not None:
+        emit_partial(tournamentDirs[0], args.emit_partial, args)
+        sys.exit()
+    if args.merge is not None:
+        try:
+            merge_tournament(args.merge, tournamentDirs[0], weights, args, weight_sets if args.weights_file is not None else None)
+        except ValueError as e:
+            parser.error(str(e))
+        sys.exit()
+
+    if len(tournamentDirs) > 1:  # Parse the tournaments in parallel rather than the heat logs of each one.
+        jobs, args.jobs = args.jobs, 1
+        sys.exit(0 if run_batch(partial(batch_task, weights=weights, args=args, weight_sets=weight_sets if args.weights_file is not None else None), tournamentDirs, jobs, args.quiet) else 1)
+    parse_tournament(tournamentDirs[0], weights, args, weight_sets if args.weights_file is not None else None)
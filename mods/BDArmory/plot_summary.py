@@ -7,13 +7,12 @@ import subprocess
 import sys
 import tempfile
 from pathlib import Path
-from typing import Union
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 
-# Third Party
-import matplotlib.pyplot as plt
-import numpy
+if TYPE_CHECKING:
+    import numpy
 
-VERSION = "1.5"
+VERSION = "1.8"
 
 parser = argparse.ArgumentParser(description="Plot the scores of a tournament as they accumulated per round", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
 parser.add_argument("tournament", nargs="?", type=str, help="The tournament to plot (optional).")
@@ -22,11 +21,6 @@ parser.add_argument('-s', '--save', type=str, nargs='?', const='tmp', help="Save
 parser.add_argument('--transparent', action='store_true', help='Save the PNG image with a transparent background.')
 parser.add_argument("--version", action='store_true', help="Show the script version, then exit.")
 parser.add_argument("-cz", '--cut-zero', action='store_true', help="Cut the y axis off at zero to avoid large negative scores.")
-args = parser.parse_args()
-
-if args.version:
-    print(f"Version: {VERSION}")
-    sys.exit()
 
 
 def naturalSortKey(key: Union[str, Path]):
@@ -38,41 +32,77 @@ def naturalSortKey(key: Union[str, Path]):
         return key  # Otherwise, just use the key.
 
 
-if args.tournament is None:
-    tournamentFolders = sorted(list(dir for dir in ((Path(__file__).parent / "Logs").resolve().glob("Tournament*")) if dir.is_dir()), key=naturalSortKey)
-    tournamentDir = tournamentFolders[-1] if len(tournamentFolders) > 0 else Path('.')
-else:
-    tournamentDir = Path(args.tournament)
-
-with open(tournamentDir / "summary.csv", 'r') as f:
-    data = list(csv.reader(f))
-vessel_count = data.index([]) - 1
-names = [data[row][0] for row in range(len(data) - vessel_count, len(data))]
-scores = numpy.array([[float(v) for v in data[row][1:]] for row in range(len(data) - vessel_count, len(data))])
-plt.figure(figsize=(16, 10), dpi=200)
-plt.plot(scores.transpose(), linewidth=5)
-plt.axhline(color='black')
-if len(names) > 16:  # Roughly half the plot height, put them outside the graph
-    plt.legend(names, loc='upper left', bbox_to_anchor=(1, 1))
-else:
-    plt.legend(names, loc='upper left')
-plt.autoscale(enable=True, tight=True)
-plt.tight_layout()
-if args.cut_zero:
-    y0, y1 = plt.ylim()
-    plt.ylim(max(y0, 0), y1)
-if args.title is not None:
-    plt.title(args.title)
-if args.save:
-    if args.save == 'tmp':
-        fd, filename = tempfile.mkstemp(suffix='.png')
+def read_cumulative_scores(summary_csv: Path) -> Tuple[List[str], 'numpy.ndarray']:
+    """ Read the cumulative scores per round from the end of a summary.csv file.
+
+    Returns:
+        Tuple[List[str], numpy.ndarray]: The craft names and their cumulative scores (craft x round).
+    """
+    import numpy  # Only needed once there are scores to read.
+    with open(summary_csv, 'r') as f:
+        data = list(csv.reader(f))
+    vessel_count = data.index([]) - 1
+    names = [data[row][0] for row in range(len(data) - vessel_count, len(data))]
+    scores = numpy.array([[float(v) for v in data[row][1:]] for row in range(len(data) - vessel_count, len(data))])
+    return names, scores
+
+
+def plot_cumulative_scores(names: List[str], scores: 'numpy.ndarray', title: Optional[str] = None, save: Optional[str] = None, transparent: bool = False, cut_zero: bool = False, view: bool = True):
+    """ Plot the cumulative scores of each craft per round.
+
+    Args:
+        names (List[str]): The craft names.
+        scores (numpy.ndarray): Their cumulative scores (craft x round).
+        title (Optional[str]): A title.
+        save (Optional[str]): Save a PNG image to this file ('tmp' for a temporary file) instead of displaying the graph.
+        transparent (bool): Save the PNG image with a transparent background.
+        cut_zero (bool): Cut the y axis off at zero to avoid large negative scores.
+        view (bool): Open the saved image in an image viewer (ImageMagick's display), if there is one.
+    """
+    import matplotlib.pyplot as plt  # Only needed for plotting.
+    if save:
+        plt.switch_backend('Agg')  # Render without a display.
+    plt.figure(figsize=(16, 10), dpi=200)
+    plt.plot(scores.transpose(), linewidth=5)
+    plt.axhline(color='black')
+    if len(names) > 16:  # Roughly half the plot height, put them outside the graph
+        plt.legend(names, loc='upper left', bbox_to_anchor=(1, 1))
     else:
-        filename = args.save
-    plt.savefig(filename, dpi='figure', bbox_inches='tight', transparent=args.transparent)
-    print(f"Image saved to {filename}")
-    try:
-        subprocess.run(f'display {filename}'.split())
-    except:
-        pass
-else:
-    plt.show(block=True)
+        plt.legend(names, loc='upper left')
+    plt.autoscale(enable=True, tight=True)
+    plt.tight_layout()
+    if cut_zero:
+        y0, y1 = plt.ylim()
+        plt.ylim(max(y0, 0), y1)
+    if title is not None:
+        plt.title(title)
+    if save:
+        if save == 'tmp':
+            fd, filename = tempfile.mkstemp(suffix='.png')
+        else:
+            filename = save
+        plt.savefig(filename, dpi='figure', bbox_inches='tight', transparent=transparent)
+        plt.close()
+        print(f"Image saved to {filename}")
+        if view:
+            try:
+                subprocess.run(['display', filename])
+            except OSError:
+                pass  # No image viewer.
+    else:
+        plt.show(block=True)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.version:
+        print(f"Version: {VERSION}")
+        sys.exit()
+
+    if args.tournament is None:
+        tournamentFolders = sorted(list(dir for dir in ((Path(__file__).parent / "Logs").resolve().glob("Tournament*")) if dir.is_dir()), key=naturalSortKey)
+        tournamentDir = tournamentFolders[-1] if len(tournamentFolders) > 0 else Path('.')
+    else:
+        tournamentDir = Path(args.tournament)
+
+    plot_cumulative_scores(*read_cumulative_scores(tournamentDir / "summary.csv"), args.title, args.save, args.transparent, args.cut_zero)
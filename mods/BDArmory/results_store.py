@@ -0,0 +1,281 @@
+""" Compact store of the parsed tournament results, written alongside results.json.
+
+The store (results.npz) uses integer IDs for the craft and keeps the attacker maps of each craft (e.g., hitsBy) as flat arrays:
+    - header: UTF-8 JSON with the store version, the craft names, the map field names and the round, name, result and duration of each heat.
+    - craft_data: UTF-8 JSON with the per-craft values of each heat, with the maps left as null placeholders.
+    - map_heat, map_craft, map_field, map_size: the heat, craft and field of each map (in placeholder order) and its number of entries.
+    - attacker, value, value_is_int: the entries of all the maps, in order.
+The heat results can be loaded on their own much more quickly than results.json can be loaded and the maps can be used directly as arrays (see read_results_store's map_arrays).
+
+The results can also be written as JSON Lines (results.jsonl), one heat per line (its round and heat names followed by the heat data of results.json), as the heats are parsed.
+That file can be read a heat at a time, so readers that process the heats in turn don't need to hold the whole tournament in memory.
+"""
+
+# Standard library imports
+import json
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional, TextIO, Tuple, Union
+
+STORE_VERSION = 1
+
+
+def store_path(results_file: Union[str, Path]) -> Path:
+    """ The path of the store corresponding to a results.json file. """
+    return Path(results_file).with_suffix('.npz')
+
+
+def json_array(data):
+    """ Encode data as compact UTF-8 JSON in a byte array. """
+    import numpy as np
+    return np.frombuffer(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), dtype=np.uint8)
+
+
+def write_results_store(path: Union[str, Path], results: dict):
+    """ Write the tournament results to a store.
+
+    The store is written to a temporary file first so that readers never see a partially written store.
+
+    Args:
+        path (Union[str, Path]): The store file.
+        results (dict): The tournament results, as in results.json.
+    """
+    import numpy as np  # Only needed for the store itself.
+    path = Path(path)
+    craft_ids, field_ids, heats, heats_craft_data = {}, {}, [], []
+    map_heat, map_craft, map_field, map_size, attacker, value = [], [], [], [], [], []
+    for round_name, round in results.items():
+        for heat_name, heat in round.items():
+            craft_data = []
+            for craft, data in heat['craft'].items():
+                craft_id = craft_ids.setdefault(craft, len(craft_ids))
+                for field, field_value in data.items():
+                    if isinstance(field_value, dict):
+                        map_heat.append(len(heats))
+                        map_craft.append(craft_id)
+                        map_field.append(field_ids.setdefault(field, len(field_ids)))
+                        map_size.append(len(field_value))
+                        attacker.extend(craft_ids.setdefault(other, len(craft_ids)) for other in field_value)
+                        value.extend(field_value.values())
+                craft_data.append([craft_id, {field: None if isinstance(field_value, dict) else field_value for field, field_value in data.items()}])
+            heats.append([round_name, heat_name, heat['result'], heat['duration']])
+            heats_craft_data.append(craft_data)
+    header = {'version': STORE_VERSION, 'craft': list(craft_ids), 'fields': list(field_ids), 'heats': heats}
+    arrays = {
+        'header': json_array(header),
+        'craft_data': json_array(heats_craft_data),
+        'map_heat': np.array(map_heat, dtype=np.int32),
+        'map_craft': np.array(map_craft, dtype=np.int32),
+        'map_field': np.array(map_field, dtype=np.int16),
+        'map_size': np.array(map_size, dtype=np.int32),
+        'attacker': np.array(attacker, dtype=np.int32),
+        'value': np.array(value, dtype=np.float64),
+        'value_is_int': np.array([isinstance(v, int) for v in value], dtype=bool),
+    }
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def read_results_store(path: Union[str, Path], include_craft: bool = True, map_arrays: bool = False) -> dict:
+    """ Read the tournament results from a store.
+
+    Args:
+        path (Union[str, Path]): The store file.
+        include_craft (bool): Include the per-craft data of each heat. Otherwise, the 'craft' of each heat is left empty, which is quicker if only the heat results are needed.
+        map_arrays (bool): Leave the attacker maps as arrays instead of building their dicts, which is quicker for readers that work with arrays anyway.
+            The maps in the per-craft data are then left as None and each heat gets 'maps': the map 'fields' and the 'victim', 'attacker', 'field' and 'value' of each map entry (in map order),
+            with the craft given by their position in the heat's 'craft' (-1 for attackers that aren't in the heat) and the fields by their position in 'fields'.
+
+    Returns:
+        dict: The tournament results, as in results.json.
+    """
+    import numpy as np  # Only needed for the store itself.
+    with np.load(path) as store:
+        header = json.loads(store['header'].tobytes().decode('utf-8'))
+        if header.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported results store version {header.get('version')}")
+        craft, fields = header['craft'], header['fields']
+        results, heats = {}, []
+        for round_name, heat_name, result, duration in header['heats']:
+            heats.append({'result': result, 'duration': duration, 'craft': {}})
+            results.setdefault(round_name, {})[heat_name] = heats[-1]
+        if include_craft:
+            heats_craft_data = json.loads(store['craft_data'].tobytes().decode('utf-8'))
+            for heat, craft_data in zip(heats, heats_craft_data):
+                heat['craft'] = {craft[craft_id]: data for craft_id, data in craft_data}
+            if map_arrays:
+                add_map_arrays(heats, heats_craft_data, store, len(craft), fields)
+            else:
+                attackers = [craft[a] for a in store['attacker'].tolist()]
+                values = [int(v) if i else v for v, i in zip(store['value'].tolist(), store['value_is_int'].tolist())]
+                start = 0
+                for heat_id, craft_id, field_id, size in zip(store['map_heat'].tolist(), store['map_craft'].tolist(), store['map_field'].tolist(), store['map_size'].tolist()):
+                    end = start + size
+                    heats[heat_id]['craft'][craft[craft_id]][fields[field_id]] = dict(zip(attackers[start:end], values[start:end]))
+                    start = end
+    return results
+
+
+def add_map_arrays(heats: List[dict], heats_craft_data: list, store, craft_count: int, fields: List[str]):
+    """ Add the arrays of the attacker map entries of each heat to the heats (see read_results_store's map_arrays).
+
+    Args:
+        heats (List[dict]): The heats, in store order.
+        heats_craft_data (list): The store's craft_data, giving the craft IDs of each heat in order.
+        store: The open store.
+        craft_count (int): The number of craft in the store.
+        fields (List[str]): The map field names.
+    """
+    import numpy as np  # Only needed for the store itself.
+    map_heat, map_size = store['map_heat'], store['map_size']
+    entry_heat = np.repeat(map_heat, map_size)
+    # The position of each craft in its heat, looked up by heat and craft ID.
+    heat_sizes = [len(craft_data) for craft_data in heats_craft_data]
+    keys = np.repeat(np.arange(len(heats), dtype=np.int64), heat_sizes) * craft_count + np.array([craft_id for craft_data in heats_craft_data for craft_id, _ in craft_data], dtype=np.int64)
+    positions = np.concatenate([np.arange(size) for size in heat_sizes]) if len(heats) > 0 else np.zeros(0, dtype=int)
+    order = np.argsort(keys, kind='stable')
+    keys, positions = keys[order], positions[order]
+
+    def position_in_heat(craft_ids: np.ndarray) -> np.ndarray:
+        lookup = entry_heat.astype(np.int64) * craft_count + craft_ids
+        i = np.minimum(np.searchsorted(keys, lookup), max(len(keys) - 1, 0))
+        return np.where(keys[i] == lookup, positions[i], -1) if len(keys) > 0 else np.full(len(lookup), -1)
+
+    victim = position_in_heat(np.repeat(store['map_craft'], map_size))
+    attacker = position_in_heat(store['attacker'])
+    field = np.repeat(store['map_field'], map_size)
+    value = store['value']
+    bounds = np.searchsorted(entry_heat, np.arange(len(heats) + 1))  # The maps are stored in heat order.
+    for heat, start, end in zip(heats, bounds[:-1].tolist(), bounds[1:].tolist()):
+        heat['maps'] = {'fields': fields, 'victim': victim[start:end], 'attacker': attacker[start:end], 'field': field[start:end], 'value': value[start:end]}
+
+
+def load_results(results_file: Union[str, Path], include_craft: bool = True, map_arrays: bool = False) -> dict:
+    """ Load the tournament results, preferring the store over results.json if it's at least as recent.
+
+    Args:
+        results_file (Union[str, Path]): The results.json file.
+        include_craft (bool): Include the per-craft data of each heat (see read_results_store).
+        map_arrays (bool): Give the attacker maps as arrays when they're read from the store (see read_results_store). Heats without 'maps' have them in the per-craft data as usual.
+
+    Returns:
+        dict: The tournament results.
+    """
+    results_file = Path(results_file)
+    store = store_path(results_file)
+    if store.exists() and (not results_file.exists() or store.stat().st_mtime_ns >= results_file.stat().st_mtime_ns):
+        try:
+            return read_results_store(store, include_craft, map_arrays)
+        except Exception:
+            pass  # Missing numpy, unreadable or from a different version, fall back to the JSON.
+    with open(results_file, 'r', encoding="utf-8") as f:
+        return json.load(f)
+
+
+def jsonl_path(results_file: Union[str, Path]) -> Path:
+    """ The path of the JSON Lines results corresponding to a results.json file. """
+    return Path(results_file).with_suffix('.jsonl')
+
+
+class ResultsJsonlWriter:
+    """ Write the tournament results to a JSON Lines file a heat at a time.
+
+    The file is only created once the first heat is written and each heat is flushed as it's written, so that the heats parsed so far are kept if parsing is interrupted.
+    """
+
+    def __init__(self, path: Union[str, Path], append: bool = False):
+        """
+        Args:
+            path (Union[str, Path]): The JSON Lines file.
+            append (bool): Add to the heats already in the file instead of replacing them.
+        """
+        self.path = Path(path)
+        self.append = append
+        self.file: Optional[TextIO] = None
+
+    def write_heat(self, round_name: str, heat_name: str, heat: dict):
+        """ Write a heat, given as the heat data of results.json. """
+        if self.file is None:
+            self.file = open(self.path, 'a' if self.append else 'w', encoding="utf-8")
+        self.file.write(json.dumps({'round': round_name, 'heat': heat_name, **heat}, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self) -> 'ResultsJsonlWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_results_jsonl(path: Union[str, Path], include_craft: bool = True) -> Iterator[Tuple[str, str, dict]]:
+    """ Read the tournament results from a JSON Lines file a heat at a time.
+
+    A final line without a newline (a heat that was still being written) is ignored.
+
+    Args:
+        path (Union[str, Path]): The JSON Lines file.
+        include_craft (bool): Include the per-craft data of each heat. Otherwise, the 'craft' of each heat is left empty.
+
+    Yields:
+        Tuple[str, str, dict]: The round name, heat name and heat data (as in results.json) of each heat, in order.
+    """
+    with open(path, 'r', encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            heat = json.loads(line)
+            round_name, heat_name = heat.pop('round'), heat.pop('heat')
+            if not include_craft:
+                heat['craft'] = {}
+            yield round_name, heat_name, heat
+
+
+def iter_heats(results: dict) -> Iterator[Tuple[str, str, dict]]:
+    """ The round name, heat name and heat data of each heat of the tournament results (as in results.json), in order. """
+    for round_name, heats in results.items():
+        for heat_name, heat in heats.items():
+            yield round_name, heat_name, heat
+
+
+def iter_results(results_file: Union[str, Path], include_craft: bool = True, map_arrays: bool = False) -> Iterator[Tuple[str, str, dict]]:
+    """ Read the tournament results a heat at a time.
+
+    The JSON Lines results are streamed if they're at least as recent as results.json and the store, otherwise the results are loaded as for load_results.
+
+    Args:
+        results_file (Union[str, Path]): The results.json (or results.jsonl) file.
+        include_craft (bool): Include the per-craft data of each heat.
+        map_arrays (bool): Give the attacker maps as arrays when they're read from the store (see load_results).
+
+    Yields:
+        Tuple[str, str, dict]: The round name, heat name and heat data (as in results.json) of each heat, in order.
+    """
+    results_file = Path(results_file)
+    jsonl = jsonl_path(results_file)
+    if results_source(results_file) == jsonl:
+        yield from read_results_jsonl(jsonl, include_craft)
+    else:
+        yield from iter_heats(load_results(results_file, include_craft, map_arrays))
+
+
+def results_source(results_file: Union[str, Path]) -> Path:
+    """ The file that iter_results reads the tournament results from: the JSON Lines results if they're at least as recent as the others, otherwise the store if it's at least as recent as results.json, otherwise results.json. """
+    results_file = Path(results_file)
+    jsonl, store = jsonl_path(results_file), store_path(results_file)
+    if jsonl.exists() and all(not other.exists() or jsonl.stat().st_mtime_ns >= other.stat().st_mtime_ns for other in (results_file, store) if other != jsonl):
+        return jsonl
+    if store.exists() and (not results_file.exists() or store.stat().st_mtime_ns >= results_file.stat().st_mtime_ns):
+        return store
+    return results_file
+
+
+def results_exist(results_file: Union[str, Path]) -> bool:
+    """ Whether there are tournament results for a results.json file (it, the store or the JSON Lines results). """
+    return any(path.exists() for path in (Path(results_file), store_path(results_file), jsonl_path(results_file)))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+# Standard library imports
+import argparse
+import importlib
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# Third party imports
+import numpy as np
+
+# Local imports
+import parse_pvp_scores
+import parse_tournament_log_files
+import plot_summary
+from heat_records import Heat, heat_dicts
+n_choose_k = importlib.import_module("parse_n-choose-k_results")  # Not a valid module name for an import statement.
+
+VERSION = "1.4.1"
+
+parser = argparse.ArgumentParser(description="Parse tournaments and run the later stages (PVP scores, who-beat-who table, score plot) on the parsed data in the same process. Accepts the options of the tournament parser.",
+                                 formatter_class=argparse.ArgumentDefaultsHelpFormatter, parents=[parse_tournament_log_files.parser], conflict_handler='resolve')
+parser.add_argument('--pvp', action='store_true', help="Compute the PVP scores (pvp_scores.json).")
+parser.add_argument('--pvp-csv', action='store_true', help="Also write the PVP score totals to pvp_scores.csv (implies --pvp).")
+parser.add_argument('--pvp-plot', type=str, help="Save a diagram of the PVP score totals to this file in the tournament folder, e.g., pvp_scores.png (implies --pvp).")
+parser.add_argument('--pvp-plot-threshold', type=float, help="Only draw the edges of the PVP diagram with a PVP score of at least this.")
+parser.add_argument('--n-choose-k', type=str, nargs='?', const="n-choose-k.csv", help="Write the who-beat-who table of a N-choose-K style tournament to this file in the tournament folder.")
+parser.add_argument('--plot-scores', type=str, nargs='?', const="scores.png", help="Save a plot of the cumulative scores per round to this file in the tournament folder.")
+parser.add_argument("--version", action='store_true', help="Show the script version, then exit.")
+
+
+def run_stages(tournamentDir: Path, tournamentData: Dict[str, Dict[str, Heat]], summary: dict, cumulative_scores: Dict[str, List[float]], args: argparse.Namespace):
+    """ Run the requested later stages on a parsed tournament.
+
+    The stages convert the heat records to results.json data a heat at a time as they read them.
+
+    Args:
+        tournamentDir (Path): The tournament folder, where the outputs are written.
+        tournamentData (Dict[str, Dict[str, Heat]]): The parsed heats, keyed by round and heat name.
+        summary (dict): The tournament summary, as in summary.json.
+        cumulative_scores (Dict[str, List[float]]): The cumulative scores of each craft after each round.
+        args (argparse.Namespace): The command line options.
+    """
+    if args.pvp or args.pvp_csv or args.pvp_plot is not None:
+        pvp_score = parse_pvp_scores.pvp_scores(heat_dicts(tournamentData), summary['meta']['score weights'])
+        if not args.no_files:
+            parse_pvp_scores.write_pvp_scores(tournamentDir, pvp_score, args.pvp_csv)
+        if args.pvp_plot is not None:
+            parse_pvp_scores.plot_pvp_scores(pvp_score['totals'], args.pvp_plot_threshold, tournamentDir / args.pvp_plot)
+
+    if args.n_choose_k is not None:
+        n_choose_k.write_who_beat_who(tournamentDir / args.n_choose_k, *n_choose_k.who_beat_who(heat_dicts(tournamentData)))
+
+    if args.plot_scores is not None and len(cumulative_scores) > 0:
+        names = sorted(cumulative_scores, key=lambda craft: summary['craft'][craft]['score'], reverse=True)  # As in summary.csv.
+        plot_summary.plot_cumulative_scores(names, np.array([cumulative_scores[craft] for craft in names]), save=str(tournamentDir / args.plot_scores), view=False)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.version:
+        print(f"Version: {VERSION}")
+        sys.exit()
+    if args.follow:
+        parser.error("--follow isn't supported, use the tournament parser directly.")
+    if args.emit_partial is not None:
+        parser.error("--emit-partial isn't supported, use the tournament parser directly.")
+    if args.merge is not None and (len(args.tournament) > 1 or args.all):
+        parser.error("--merge writes to a single tournament folder.")
+    if args.pvp_plot is not None or args.plot_scores is not None:
+        import matplotlib  # Only needed for plotting.
+        matplotlib.use('Agg')  # The plots are only saved.
+
+    tournamentDirs = parse_tournament_log_files.find_tournament_dirs(args) if args.merge is None else [Path(args.tournament[0]) if len(args.tournament) > 0 else Path('')]
+    weights = parse_tournament_log_files.score_weights(args)
+    weight_sets = None
+    if args.weights_file is not None:
+        try:
+            weight_sets = parse_tournament_log_files.load_weights_file(args.weights_file)
+        except (OSError, ValueError) as e:
+            parser.error(f"Failed to load the weights file {args.weights_file}: {e}")
+
+    for tournamentNumber, tournamentDir in enumerate(tournamentDirs):
+        if tournamentNumber > 0 and not args.quiet:
+            print("")
+        if args.merge is not None:
+            try:
+                tournamentData, tournamentMetadata, summary, cumulative_scores = parse_tournament_log_files.merge_tournament(args.merge, tournamentDir, weights, args, weight_sets)
+            except ValueError as e:
+                parser.error(str(e))
+        else:
+            tournamentData, tournamentMetadata, summary, cumulative_scores = parse_tournament_log_files.parse_tournament(tournamentDir, weights, args, weight_sets)
+        if len(summary['craft']) > 0:
+            run_stages(tournamentDir, tournamentData, summary, cumulative_scores, args)
@@ -0,0 +1,95 @@
+""" Process several tournaments in parallel worker processes.
+
+Each tournament is processed by a task function in a worker, with its console output buffered so that the outputs of the tournaments don't interleave.
+The outputs are shown in the order of the tournaments, followed by a table of the status and timing of each tournament.
+"""
+
+# Standard library imports
+import io
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from functools import partial
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+
+def run_task(task: Callable[[Path], Optional[str]], tournamentDir: Path, capture: bool = True) -> Tuple[Path, bool, float, str, str]:
+    """ Process a tournament, catching any exception.
+
+    Args:
+        task (Callable[[Path], Optional[str]]): Processes a tournament and returns a short description of what it did (e.g., the number of heats).
+        tournamentDir (Path): The tournament folder.
+        capture (bool): Buffer the console output instead of printing it.
+
+    Returns:
+        Tuple[Path, bool, float, str, str]: The tournament folder, whether the task succeeded, how long it took (s), the task's description or the error and the console output.
+    """
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        if capture:
+            with redirect_stdout(output), redirect_stderr(output):
+                details = task(tournamentDir)
+        else:
+            details = task(tournamentDir)
+        ok = True
+    except Exception as e:
+        if capture:
+            with redirect_stderr(output):
+                traceback.print_exc()
+        else:
+            traceback.print_exc()
+        ok, details = False, f"{type(e).__name__}: {e}"
+    return tournamentDir, ok, time.perf_counter() - start, details or "", output.getvalue()
+
+
+def run_batch(task: Callable[[Path], Optional[str]], tournamentDirs: List[Path], jobs: int = 1, quiet: bool = False) -> bool:
+    """ Process several tournaments, then show a table of their status and timing.
+
+    Args:
+        task (Callable[[Path], Optional[str]]): Processes a tournament and returns a short description of what it did. It must be picklable (e.g., a module level function or a partial of one) when using worker processes.
+        tournamentDirs (List[Path]): The tournament folders.
+        jobs (int): The number of worker processes to use (0 for one per CPU core, 1 to process the tournaments in this process).
+        quiet (bool): Don't separate the outputs of the tournaments with blank lines.
+
+    Returns:
+        bool: Whether all the tournaments were processed successfully.
+    """
+    start = time.perf_counter()
+    statuses = []
+    if jobs == 1 or len(tournamentDirs) < 2:
+        for tournamentNumber, tournamentDir in enumerate(tournamentDirs):
+            if tournamentNumber > 0 and not quiet:
+                print("")
+            statuses.append(run_task(task, tournamentDir, capture=False))
+    else:
+        workers = min(jobs if jobs > 0 else (os.cpu_count() or 1), len(tournamentDirs))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for tournamentNumber, status in enumerate(executor.map(partial(run_task, task), tournamentDirs)):  # In order, as soon as the earlier ones are done.
+                if tournamentNumber > 0 and not quiet and len(status[4]) > 0:
+                    print("")
+                sys.stdout.write(status[4])
+                sys.stdout.flush()
+                statuses.append(status)
+    print_status_table(statuses, time.perf_counter() - start)
+    return all(status[1] for status in statuses)
+
+
+def print_status_table(statuses: List[Tuple[Path, bool, float, str, str]], elapsed: float):
+    """ Show the status and timing of each tournament.
+
+    Args:
+        statuses (List[Tuple[Path, bool, float, str, str]]): The results of run_task for each tournament.
+        elapsed (float): The total time taken (s).
+    """
+    names = [str(status[0]) if str(status[0]) != '.' else "(current directory)" for status in statuses]
+    name_width = max([len("Tournament")] + [len(name) for name in names])
+    print(f"\n{'Tournament':<{name_width}}  Status  Time (s)  Details")
+    for name, (_, ok, seconds, details, _) in zip(names, statuses):
+        print(f"{name:<{name_width}}  {'ok' if ok else 'FAILED':<6}  {seconds:8.2f}  {details}")
+    failures = sum(1 for status in statuses if not status[1])
+    print(f"{len(statuses) - failures} succeeded, {failures} failed in {elapsed:.2f}s (total {sum(status[2] for status in statuses):.2f}s of processing).")
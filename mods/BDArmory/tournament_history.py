@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+
+# Standard library imports
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Local imports
+from results_store import iter_results, results_exist, results_source
+
+VERSION = "1.1.0"
+SCHEMA_VERSION = 1
+
+parser = argparse.ArgumentParser(description="Cross-tournament history of the parsed tournaments in a SQLite database: ingest the results of the tournaments, then query career stats, head-to-head records and damage trends.", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+parser.add_argument('--db', type=str, default=str(Path(__file__).parent / "Logs" / "tournament_history.sqlite"), help="The history database.")
+parser.add_argument("--version", action='store_true', help="Show the script version, then exit.")
+commands = parser.add_subparsers(dest='command', metavar='command')
+ingest_parser = commands.add_parser('ingest', help="Add parsed tournaments (run the tournament parser on them first) to the database, skipping those that are already in it and unchanged.", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+ingest_parser.add_argument('tournament', type=str, nargs='*', help="Tournament folders to ingest (default: every tournament folder in the Logs folder).")
+ingest_parser.add_argument('--force', action='store_true', help="Ingest the tournaments even if they're unchanged.")
+commands.add_parser('tournaments', help="List the ingested tournaments.")
+career_parser = commands.add_parser('career', help="Career stats of a craft in each tournament and overall.")
+career_parser.add_argument('craft', type=str, help="The craft name.")
+h2h_parser = commands.add_parser('head-to-head', help="The record of two craft against each other in the heats that they were both in.")
+h2h_parser.add_argument('craft', type=str, nargs=2, help="The craft names.")
+damage_parser = commands.add_parser('damage', help="Damage dealt (or taken) by a craft per heat with each weapon type in each tournament.")
+damage_parser.add_argument('craft', type=str, help="The craft name.")
+damage_parser.add_argument('--taken', action='store_true', help="Show the damage taken instead of the damage dealt.")
+damage_parser.add_argument('--totals', action='store_true', help="Show the total damage in each tournament instead of the damage per heat.")
+
+weapon_types = ('guns', 'rockets', 'missiles', 'ramming', 'battle damage')
+attribution_measures = {  # Attribution field: (weapon type, measure).
+    'hitsBy': ('guns', 'hits'),
+    'bulletDamageBy': ('guns', 'damage'),
+    'rocketHitsBy': ('rockets', 'hits'),
+    'rocketPartsHitBy': ('rockets', 'parts'),
+    'rocketDamageBy': ('rockets', 'damage'),
+    'missileHitsBy': ('missiles', 'hits'),
+    'missilePartsHitBy': ('missiles', 'parts'),
+    'missileDamageBy': ('missiles', 'damage'),
+    'rammedPartsLostBy': ('ramming', 'parts'),
+    'battleDamageBy': ('battle damage', 'damage'),
+}
+kill_measures = {  # Killer field: weapon type of the clean kill.
+    'cleanKillBy': 'guns',
+    'cleanRocketKillBy': 'rockets',
+    'cleanMissileKillBy': 'missiles',
+    'cleanRamKillBy': 'ramming',
+}
+
+schema = f"""
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tournaments (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,  -- The resolved tournament folder.
+    name TEXT NOT NULL,
+    tournament_id TEXT,
+    started TEXT,  -- ISO timestamp of the first heat, if known.
+    size INTEGER NOT NULL, mtime INTEGER NOT NULL, hash TEXT NOT NULL,  -- Signature of the results file (results.json, .npz or .jsonl) when ingested.
+    ingested TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS heats (
+    id INTEGER PRIMARY KEY,
+    tournament INTEGER NOT NULL REFERENCES tournaments(id) ON DELETE CASCADE,
+    round TEXT NOT NULL, heat TEXT NOT NULL, result TEXT, duration REAL
+);
+CREATE INDEX IF NOT EXISTS heats_by_tournament ON heats(tournament);
+CREATE TABLE IF NOT EXISTS craft_names (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS craft (  -- The per-craft records of each heat.
+    heat INTEGER NOT NULL REFERENCES heats(id) ON DELETE CASCADE,
+    craft INTEGER NOT NULL REFERENCES craft_names(id),
+    state TEXT, won INTEGER NOT NULL, death_order INTEGER, death_time REAL, hp_remaining REAL,
+    hits INTEGER, shots INTEGER, rocket_strikes INTEGER, rockets_fired INTEGER, parts_lost_to_asteroids INTEGER,
+    PRIMARY KEY (craft, heat)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS craft_by_heat ON craft(heat);
+CREATE TABLE IF NOT EXISTS interactions (  -- What each attacker did to each victim in each heat: hits, parts hit, damage and clean kills with each weapon type.
+    heat INTEGER NOT NULL REFERENCES heats(id) ON DELETE CASCADE,
+    attacker INTEGER NOT NULL REFERENCES craft_names(id),
+    victim INTEGER NOT NULL REFERENCES craft_names(id),
+    weapon TEXT NOT NULL CHECK (weapon IN ({', '.join(f"'{weapon}'" for weapon in weapon_types)})),
+    measure TEXT NOT NULL CHECK (measure IN ('hits', 'parts', 'damage', 'kills')),
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS interactions_by_attacker ON interactions(attacker, measure, victim);
+CREATE INDEX IF NOT EXISTS interactions_by_victim ON interactions(victim, measure, attacker);
+CREATE INDEX IF NOT EXISTS interactions_by_heat ON interactions(heat);
+"""
+
+
+def naturalSortKey(key: Union[str, Path]):
+    if isinstance(key, Path):
+        key = key.name
+    try:
+        return int(key.rsplit(' ')[1])  # If the key ends in an integer, split that off and use that as the sort key.
+    except:
+        return key  # Otherwise, just use the key.
+
+
+def open_history(path: Union[str, Path], create: bool = False) -> sqlite3.Connection:
+    """ Open the history database.
+
+    Args:
+        path (Union[str, Path]): The database file.
+        create (bool): Create the database (and its folder) if it doesn't exist.
+
+    Returns:
+        sqlite3.Connection: The database connection.
+
+    Raises:
+        ValueError: If the database doesn't exist (and isn't to be created) or has a different schema version.
+    """
+    path = Path(path)
+    if not path.exists():
+        if not create:
+            raise ValueError(f"No history database at {path}, ingest some tournaments first.")
+        path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA foreign_keys = ON")
+    db.executescript(schema)
+    version = db.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+    if version is None:
+        with db:
+            db.execute("INSERT INTO meta (key, value) VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+    elif version[0] != str(SCHEMA_VERSION):
+        db.close()
+        raise ValueError(f"The history database {path} has schema version {version[0]} (expected {SCHEMA_VERSION}), delete it and ingest the tournaments again.")
+    return db
+
+
+def file_signature(path: Path) -> dict:
+    """ The size, modification time and content hash of a file. """
+    stat = path.stat()
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'hash': digest.hexdigest()}
+
+
+def craft_name_ids(db: sqlite3.Connection, names: Iterable[str]) -> Dict[str, int]:
+    """ The IDs of craft names in the database, adding those that aren't in it yet. """
+    names = set(names)
+    db.executemany("INSERT OR IGNORE INTO craft_names (name) VALUES (?)", ((name,) for name in names))
+    ids = {}
+    for name in names:
+        ids[name] = db.execute("SELECT id FROM craft_names WHERE name = ?", (name,)).fetchone()[0]
+    return ids
+
+
+def craft_id(db: sqlite3.Connection, name: str) -> int:
+    """ The ID of a craft name in the database.
+
+    Raises:
+        ValueError: If there are no records of the craft.
+    """
+    row = db.execute("SELECT id FROM craft_names WHERE name = ?", (name,)).fetchone()
+    if row is None:
+        raise ValueError(f"No records of {name} in the history.")
+    return row[0]
+
+
+def heat_rows(round_name: str, heat_name: str, heat: dict, ids: Dict[str, int]) -> Tuple[Tuple[str, str, Optional[str], float], List[tuple], List[tuple]]:
+    """ The database rows of a heat.
+
+    Args:
+        round_name (str): The round name.
+        heat_name (str): The heat name.
+        heat (dict): The heat data, as in results.json.
+        ids (Dict[str, int]): The database IDs of the craft names.
+
+    Returns:
+        Tuple[Tuple[str, str, Optional[str], float], List[tuple], List[tuple]]: The heat row (round, heat, result, duration), the craft rows (without the heat) and the interaction rows (without the heat).
+    """
+    result = heat['result']
+    winners = set(next(iter(result['teams'].values())).split(", ")) if result is not None and result['result'] == "Win" else set()
+    craft_rows, interaction_rows = [], []
+    for craft, data in heat['craft'].items():
+        craft_rows.append((ids[craft], data.get('state'), 1 if craft in winners else 0, data.get('deathOrder'), data.get('deathTime'), data.get('HPremaining'),
+                           data.get('hits'), data.get('shots'), data.get('rocket_strikes'), data.get('rockets_fired'), data.get('partsLostToAsteroids')))
+        for field, (weapon, measure) in attribution_measures.items():
+            for attacker, value in data.get(field, {}).items():
+                interaction_rows.append((ids[attacker], ids[craft], weapon, measure, value))
+        for field, weapon in kill_measures.items():
+            if field in data:
+                interaction_rows.append((ids[data[field]], ids[craft], weapon, 'kills', 1))
+    return (round_name, heat_name, result['result'] if result is not None else None, heat['duration']), craft_rows, interaction_rows
+
+
+def heat_craft(heat: dict) -> Iterable[str]:
+    """ The names of all the craft (including attackers) in a heat. """
+    for craft, data in heat['craft'].items():
+        yield craft
+        for field in attribution_measures:
+            yield from data.get(field, {})
+        for field in kill_measures:
+            if field in data:
+                yield data[field]
+
+
+def ingest_tournament(db: sqlite3.Connection, tournamentDir: Path, force: bool = False) -> str:
+    """ Add a parsed tournament to the history, replacing any previous records of it.
+
+    The results are read a heat at a time from results.jsonl, the results store or results.json, whichever is the most recent (see results_store.iter_results).
+    A tournament is skipped if that file has the same size and modification time or, failing that, the same content hash as when it was ingested.
+
+    Args:
+        db (sqlite3.Connection): The history database.
+        tournamentDir (Path): The tournament folder.
+        force (bool): Ingest the tournament even if it's unchanged.
+
+    Returns:
+        str: What was done.
+    """
+    results_file = tournamentDir / "results.json"
+    if not results_exist(results_file):
+        raise ValueError(f"No results in {tournamentDir}, run the tournament parser on it first.")
+    source = results_source(results_file)
+    path = str(tournamentDir.resolve())
+    previous = db.execute("SELECT id, size, mtime, hash FROM tournaments WHERE path = ?", (path,)).fetchone()
+    stat = source.stat()
+    if previous is not None and not force and previous[1] == stat.st_size:
+        if previous[2] == stat.st_mtime_ns:
+            return "unchanged"
+        signature = file_signature(source)
+        if signature['hash'] == previous[3]:
+            with db:
+                db.execute("UPDATE tournaments SET mtime = ? WHERE id = ?", (signature['mtime'], previous[0]))
+            return "unchanged"
+    signature = file_signature(source)  # Before loading, so that a later change gets picked up.
+    started = None
+    try:
+        with open(tournamentDir / "summary.json", 'r', encoding="utf-8") as f:
+            duration = json.load(f)['meta'].get('duration')
+        started = duration[0] if duration is not None else None
+    except (OSError, ValueError, KeyError):
+        pass
+    m = re.search('Tournament (\\d+)', path)
+    heat_count = 0
+    with db:  # One transaction per tournament.
+        if previous is not None:
+            db.execute("DELETE FROM tournaments WHERE id = ?", (previous[0],))
+        tournament = db.execute("INSERT INTO tournaments (path, name, tournament_id, started, size, mtime, hash, ingested) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                (path, tournamentDir.resolve().name, m.groups()[0] if m is not None else None, started, signature['size'], signature['mtime'], signature['hash'], datetime.now().isoformat(timespec='seconds'))).lastrowid
+        ids = {}
+        for round_name, heat_name, heat_data in iter_results(results_file):
+            ids.update(craft_name_ids(db, (name for name in heat_craft(heat_data) if name not in ids)))
+            heat_row, craft_rows, interaction_rows = heat_rows(round_name, heat_name, heat_data, ids)
+            heat = db.execute("INSERT INTO heats (tournament, round, heat, result, duration) VALUES (?, ?, ?, ?, ?)", (tournament,) + heat_row).lastrowid
+            db.executemany("INSERT INTO craft VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", ((heat,) + row for row in craft_rows))
+            db.executemany("INSERT INTO interactions VALUES (?, ?, ?, ?, ?, ?)", ((heat,) + row for row in interaction_rows))
+            heat_count += 1
+    return f"{'re-ingested' if previous is not None else 'ingested'} {heat_count} heats"
+
+
+def print_table(headers: Sequence[str], rows: Iterable[Sequence], float_format: str = "{:.1f}"):
+    """ Print rows as a table with aligned columns (numbers right-aligned). """
+    cells = [[float_format.format(v) if isinstance(v, float) else str(v) if v is not None else "-" for v in row] for row in rows]
+    widths = [max([len(header)] + [len(row[i]) for row in cells]) for i, header in enumerate(headers)]
+    numeric = [i > 0 for i in range(len(headers))]
+    print("  ".join(header.rjust(width) if is_numeric else header.ljust(width) for header, width, is_numeric in zip(headers, widths, numeric)))
+    for row in cells:
+        print("  ".join(cell.rjust(width) if is_numeric else cell.ljust(width) for cell, width, is_numeric in zip(row, widths, numeric)))
+
+
+def list_tournaments(db: sqlite3.Connection):
+    """ Show the ingested tournaments. """
+    rows = db.execute("""
+        SELECT t.name, t.started, COUNT(DISTINCT h.id), COUNT(DISTINCT c.craft), t.ingested FROM tournaments t
+        LEFT JOIN heats h ON h.tournament = t.id LEFT JOIN craft c ON c.heat = h.id
+        GROUP BY t.id ORDER BY t.started, t.name""").fetchall()
+    print_table(("Tournament", "Started", "Heats", "Craft", "Ingested"), rows)
+
+
+def career_stats(db: sqlite3.Connection, craft: str) -> List[tuple]:
+    """ The career stats of a craft in each tournament, in tournament order, and overall.
+
+    Args:
+        db (sqlite3.Connection): The history database.
+        craft (str): The craft name.
+
+    Returns:
+        List[tuple]: For each tournament and then overall: the tournament name, heats, wins, survived, deaths, MIA, clean kills, hits, shots, accuracy (%), damage dealt and damage taken.
+    """
+    craft = craft_id(db, craft)
+    per_tournament = db.execute("""
+        SELECT t.id, t.name, COUNT(*), SUM(c.won), SUM(c.state = 'ALIVE'), SUM(c.state = 'DEAD'), SUM(c.state = 'MIA'), COALESCE(SUM(c.hits), 0), COALESCE(SUM(c.shots), 0)
+        FROM craft c JOIN heats h ON h.id = c.heat JOIN tournaments t ON t.id = h.tournament
+        WHERE c.craft = ? GROUP BY t.id ORDER BY t.started, t.name""", (craft,)).fetchall()
+    dealt = {(tournament, measure): value for tournament, measure, value in db.execute("""
+        SELECT h.tournament, i.measure, SUM(i.value) FROM interactions i JOIN heats h ON h.id = i.heat
+        WHERE i.attacker = ? AND i.measure IN ('kills', 'damage') AND i.victim != i.attacker GROUP BY h.tournament, i.measure""", (craft,))}
+    taken = dict(db.execute("""
+        SELECT h.tournament, SUM(i.value) FROM interactions i JOIN heats h ON h.id = i.heat
+        WHERE i.victim = ? AND i.measure = 'damage' AND i.attacker != i.victim GROUP BY h.tournament""", (craft,)).fetchall())
+    rows = []
+    for tournament, name, heats, wins, survived, deaths, mia, hits, shots in per_tournament:
+        rows.append((name, heats, wins, survived, deaths, mia, int(dealt.get((tournament, 'kills'), 0)), hits, shots, 100 * hits / shots if shots > 0 else 0., dealt.get((tournament, 'damage'), 0.), taken.get(tournament, 0.)))
+    if len(rows) > 0:
+        totals = [sum(row[i] for row in rows) for i in range(1, len(rows[0]))]
+        totals[8] = 100 * totals[6] / totals[7] if totals[7] > 0 else 0.  # Accuracy over all the shots.
+        rows.append(("Overall", *totals))
+    return rows
+
+
+def head_to_head(db: sqlite3.Connection, craft_a: str, craft_b: str) -> Tuple[int, List[tuple]]:
+    """ The record of two craft against each other in the heats that they were both in.
+
+    Args:
+        db (sqlite3.Connection): The history database.
+        craft_a (str): The first craft name.
+        craft_b (str): The second craft name.
+
+    Returns:
+        Tuple[int, List[tuple]]: The number of heats that they were both in and the rows of stats: the stat, the value for craft A and the value for craft B.
+    """
+    a, b = craft_id(db, craft_a), craft_id(db, craft_b)
+    shared = db.execute("""
+        SELECT COUNT(*), SUM(ca.won), SUM(cb.won), SUM(ca.state = 'ALIVE' AND cb.state = 'DEAD'), SUM(cb.state = 'ALIVE' AND ca.state = 'DEAD')
+        FROM craft ca JOIN craft cb ON cb.heat = ca.heat WHERE ca.craft = ? AND cb.craft = ?""", (a, b)).fetchone()
+    heats = shared[0]
+    rows = [("Wins", shared[1] or 0, shared[2] or 0), ("Outlived the other", shared[3] or 0, shared[4] or 0)]
+    against = {}
+    for attacker, victim in ((a, b), (b, a)):
+        for weapon, measure, value in db.execute("SELECT weapon, measure, SUM(value) FROM interactions WHERE attacker = ? AND victim = ? GROUP BY weapon, measure", (attacker, victim)):
+            against[(attacker, weapon, measure)] = value
+    for measure in ('kills', 'hits', 'parts', 'damage'):
+        for weapon in weapon_types:
+            if (a, weapon, measure) in against or (b, weapon, measure) in against:
+                value_a, value_b = against.get((a, weapon, measure), 0), against.get((b, weapon, measure), 0)
+                rows.append((f"{'Clean kills' if measure == 'kills' else 'Parts hit' if measure == 'parts' else measure.capitalize()} ({weapon})", int(value_a) if measure != 'damage' else value_a, int(value_b) if measure != 'damage' else value_b))
+    return heats, rows
+
+
+def damage_trends(db: sqlite3.Connection, craft: str, taken: bool = False, totals: bool = False) -> List[tuple]:
+    """ The damage dealt (or taken) by a craft with each weapon type in each tournament.
+
+    Args:
+        db (sqlite3.Connection): The history database.
+        craft (str): The craft name.
+        taken (bool): The damage taken instead of the damage dealt.
+        totals (bool): The total damage instead of the damage per heat.
+
+    Returns:
+        List[tuple]: For each tournament, in order: the tournament name, heats and the damage (or, for ramming, parts hit) with each weapon type.
+    """
+    craft = craft_id(db, craft)
+    heats = db.execute("""
+        SELECT t.id, t.name, COUNT(*) FROM craft c JOIN heats h ON h.id = c.heat JOIN tournaments t ON t.id = h.tournament
+        WHERE c.craft = ? GROUP BY t.id ORDER BY t.started, t.name""", (craft,)).fetchall()
+    damage = {}
+    for tournament, weapon, value in db.execute(f"""
+            SELECT h.tournament, i.weapon, SUM(i.value) FROM interactions i JOIN heats h ON h.id = i.heat
+            WHERE i.{'victim' if taken else 'attacker'} = ? AND (i.measure = 'damage' OR (i.weapon = 'ramming' AND i.measure = 'parts')) AND i.victim != i.attacker
+            GROUP BY h.tournament, i.weapon""", (craft,)):
+        damage[(tournament, weapon)] = value
+    return [(name, count, *(damage.get((tournament, weapon), 0.) / (1 if totals else count) for weapon in weapon_types)) for tournament, name, count in heats]
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.version:
+        print(f"Version: {VERSION}")
+        sys.exit()
+    if args.command is None:
+        parser.error("No command given.")
+
+    start = time.perf_counter()
+    try:
+        db = open_history(args.db, create=args.command == 'ingest')
+        if args.command == 'ingest':
+            if len(args.tournament) > 0:
+                tournamentDirs = [Path(tournamentDir) for tournamentDir in args.tournament]
+            else:
+                logsDir = Path(__file__).parent / "Logs"
+                tournamentDirs = sorted((dir for dir in logsDir.glob("Tournament*") if dir.is_dir()), key=naturalSortKey) if logsDir.exists() else []
+                if len(tournamentDirs) == 0:
+                    parser.error(f"No tournament folders found in {logsDir}.")
+            failed = False
+            for tournamentDir in tournamentDirs:
+                try:
+                    print(f"{tournamentDir}: {ingest_tournament(db, tournamentDir, args.force)}")
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"{tournamentDir}: failed to ingest: {e}")
+                    failed = True
+            print(f"Done in {time.perf_counter() - start:.2f}s.")
+            sys.exit(1 if failed else 0)
+        elif args.command == 'tournaments':
+            list_tournaments(db)
+        elif args.command == 'career':
+            print_table(("Tournament", "Heats", "Wins", "Survived", "Deaths", "MIA", "Kills", "Hits", "Shots", "Acc%", "Damage", "DmgTaken"), career_stats(db, args.craft))
+        elif args.command == 'head-to-head':
+            heats, rows = head_to_head(db, *args.craft)
+            print(f"{args.craft[0]} vs {args.craft[1]} in {heats} heats")
+            print_table(("", *args.craft), rows)
+        elif args.command == 'damage':
+            print(f"{'Damage taken' if args.taken else 'Damage dealt'} by {args.craft} {'in each tournament' if args.totals else 'per heat'} (ramming in parts)")
+            print_table(("Tournament", "Heats", *(weapon.capitalize() for weapon in weapon_types)), damage_trends(db, args.craft, args.taken, args.totals))
+    except ValueError as e:
+        parser.error(str(e))